@@ -1,13 +1,15 @@
 import streamlit as st
 from snowflake.snowpark.context import get_active_session
 
+from query_log import instrument
+
 st.set_page_config(
     page_title="Fleet Analytics Dashboard",
     page_icon="🚗",
     layout="wide"
 )
 
-session = get_active_session()
+session = instrument(get_active_session(), page="Home")
 
 st.title("Fleet Analytics Dashboard")
 st.markdown("Analysis of GPS trajectory data from the GeoLife dataset")
@@ -18,6 +20,9 @@ st.markdown("### Available Pages:")
 st.markdown("""
 - **Overview** - Summary statistics and distributions
 - **Route Comparison** - Compare actual GPS routes with OpenRouteService calculated routes
+- **Travel Time Analysis** - E-bike travel times from a hexagon to its neighbors (San Francisco)
+- **Accessibility** - City-wide reachability surface for San Francisco
+- **Fleet Map** - All trips on one map, loaded tile by tile for the visible area
 """)
 
 st.divider()
@@ -34,7 +39,7 @@ SELECT
 FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
 """
 
-overview_df = session.sql(overview_query).to_pandas()
+overview_df = session.sql(overview_query, panel="Quick Stats").to_pandas()
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
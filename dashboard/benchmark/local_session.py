@@ -0,0 +1,182 @@
+"""DuckDB-backed stand-in for the Snowpark session used by the dashboard pages
+
+Queries are translated from Snowflake SQL with sqlglot and run on a local
+DuckDB database whose FLEET_DEMOS.ROUTING tables mirror the Snowflake
+ones. H3 functions run as Python UDFs (h3 package), geography values are
+plain GeoJSON, and OPENROUTESERVICE_NATIVE_APP.CORE.DIRECTIONS returns a
+straight-line route. session.file.get_stream reads stage files from the
+ROUTING.STAGE_FILES table (STAGE, PATH, DATA).
+
+Every executed query is recorded in `session.queries` with its wall time,
+rows and bytes transferred, tagged with `session.tag` at the time it ran.
+"""
+import io
+import time
+
+import duckdb
+import h3
+import sqlglot
+from sqlglot import exp
+
+ORS_SPEEDS_KMH = {
+    'driving-car': 50,
+    'driving-hgv': 40,
+    'cycling-electric': 22,
+    'foot-walking': 5,
+}
+
+
+class LocalRow(dict):
+    """Row returned by collect(); supports row['COL'] and row.COL like Snowpark rows"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def as_dict(self):
+        return dict(self)
+
+
+class LocalDataFrame:
+    """Lazy query result with the subset of the Snowpark DataFrame API the pages use"""
+
+    def __init__(self, session, query):
+        self.session = session
+        self.query = query
+
+    def to_pandas(self):
+        return self.session._execute(self.query)
+
+    def collect(self):
+        df = self.to_pandas()
+        return [LocalRow(record) for record in df.to_dict('records')]
+
+
+def translate(query):
+    """Translate a Snowflake query into DuckDB SQL"""
+    tree = sqlglot.parse_one(query, read='snowflake')
+
+    # TABLE(FLATTEN(array)) -> (SELECT UNNEST(array) AS VALUE)
+    for explode in list(tree.find_all(exp.Explode)):
+        source = explode.parent
+        if isinstance(source, exp.From) or not isinstance(source.parent, exp.From):
+            continue
+        source.replace(sqlglot.parse_one(
+            f"(SELECT UNNEST({explode.this.sql('duckdb')}) AS VALUE)", read='duckdb'
+        ))
+
+    # Geography values are kept as GeoJSON
+    for cast in list(tree.find_all(exp.Cast)):
+        if cast.to.this == exp.DataType.Type.GEOGRAPHY:
+            cast.replace(exp.Anonymous(this='TO_JSON', expressions=[cast.this]))
+
+    return tree.sql(dialect='duckdb')
+
+
+def _h3_cell_to_point(cell):
+    lat, lng = h3.cell_to_latlng(cell)
+    return {'x': lng, 'y': lat}
+
+
+def register_functions(con):
+    """Register the Snowflake-only functions the dashboard queries call"""
+    con.create_function('H3_GRID_DISK', lambda cell, k: list(h3.grid_disk(cell, k)),
+                        ['VARCHAR', 'INTEGER'], 'VARCHAR[]')
+    con.create_function('H3_GRID_DISTANCE', h3.grid_distance,
+                        ['VARCHAR', 'VARCHAR'], 'BIGINT')
+    con.create_function('H3_CELL_TO_PARENT', h3.cell_to_parent,
+                        ['VARCHAR', 'INTEGER'], 'VARCHAR')
+    con.create_function('H3_GET_RESOLUTION', h3.get_resolution,
+                        ['VARCHAR'], 'INTEGER')
+    con.create_function('H3_CELL_TO_POINT', _h3_cell_to_point,
+                        ['VARCHAR'], 'STRUCT(x DOUBLE, y DOUBLE)')
+    con.sql("""
+        CREATE OR REPLACE MACRO ST_X(point) AS struct_extract(point, 'x');
+        CREATE OR REPLACE MACRO ST_Y(point) AS struct_extract(point, 'y');
+        CREATE OR REPLACE MACRO ST_ASGEOJSON(geography) AS CAST(geography AS VARCHAR);
+        CREATE OR REPLACE MACRO HAVERSINE(lat1, lon1, lat2, lon2) AS
+            2 * 6371 * asin(sqrt(
+                pow(sin(radians(lat2 - lat1) / 2), 2)
+                + cos(radians(lat1)) * cos(radians(lat2)) * pow(sin(radians(lon2 - lon1) / 2), 2)
+            ));
+    """)
+
+    con.sql("ATTACH IF NOT EXISTS ':memory:' AS openrouteservice_native_app")
+    con.sql("CREATE SCHEMA IF NOT EXISTS openrouteservice_native_app.core")
+    speed = "CASE profile " + " ".join(
+        f"WHEN '{profile}' THEN {kmh}" for profile, kmh in ORS_SPEEDS_KMH.items()
+    ) + " END"
+    con.sql(f"""
+        CREATE OR REPLACE MACRO openrouteservice_native_app.core.directions(profile, start_point, end_point) AS
+            json_object(
+                'features', json_array(json_object(
+                    'type', 'Feature',
+                    'geometry', json_object('type', 'LineString', 'coordinates', [start_point, end_point]),
+                    'properties', json_object('summary', json_object(
+                        'distance', HAVERSINE(start_point[2], start_point[1], end_point[2], end_point[1]) * 1300,
+                        'duration', HAVERSINE(start_point[2], start_point[1], end_point[2], end_point[1]) * 1.3
+                            / ({speed}) * 3600
+                    ))
+                ))
+            )
+    """)
+
+
+class LocalFileOperation:
+    """session.file lookalike reading stage files from ROUTING.STAGE_FILES"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def get_stream(self, stage_location):
+        stage, _, path = stage_location.lstrip('@').partition('/')
+        started = time.perf_counter()
+        row = self.session.con.cursor().execute(
+            "SELECT data FROM fleet_demos.routing.stage_files WHERE stage = ? AND path = ?",
+            [stage.upper(), path]
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(stage_location)
+        data = bytes(row[0])
+        self.session.queries.append({
+            'tag': self.session.tag,
+            'query': f"GET {stage_location}",
+            'seconds': time.perf_counter() - started,
+            'rows': 1,
+            'bytes': len(data),
+        })
+        return io.BytesIO(data)
+
+
+class LocalSession:
+    """Snowpark-session lookalike over a DuckDB database file"""
+
+    def __init__(self, database_path, read_only=True):
+        self.con = duckdb.connect()
+        self.con.sql(f"ATTACH '{database_path}' AS fleet_demos{' (READ_ONLY)' if read_only else ''}")
+        register_functions(self.con)
+        self.file = LocalFileOperation(self)
+        self.tag = None
+        self.queries = []
+
+    def sql(self, query):
+        return LocalDataFrame(self, query)
+
+    def _execute(self, query):
+        started = time.perf_counter()
+        # Each Streamlit run uses its own thread; DuckDB connections are not shared across threads
+        df = self.con.cursor().sql(translate(query)).df()
+        seconds = time.perf_counter() - started
+
+        # Snowflake returns unquoted identifiers in upper case
+        df.columns = [column.upper() for column in df.columns]
+        self.queries.append({
+            'tag': self.tag,
+            'query': ' '.join(query.split())[:120],
+            'seconds': seconds,
+            'rows': len(df),
+            'bytes': int(df.memory_usage(deep=True).sum()),
+        })
+        return df
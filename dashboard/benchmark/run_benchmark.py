@@ -0,0 +1,180 @@
+"""Time dashboard renders against a local DuckDB stand-in for Snowflake
+
+Each page is run headless with Streamlit's AppTest while
+get_active_session() returns a LocalSession over synthetic
+GEOLIFE_CLEAN / SF tables. For every data size and page it records the
+cold render (st.cache_data cleared) and a warm re-render, per-query wall
+time, rows and bytes transferred, and peak Python memory.
+
+Requires duckdb, sqlglot and h3 besides the dashboard's own packages.
+Databases are generated once per size into --data-dir.
+
+Usage:
+    python dashboard/benchmark/run_benchmark.py --points 1M 10M 25M
+    python dashboard/benchmark/run_benchmark.py --points 1M --pages Overview --output overview.json
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTING_DIR = os.path.join(os.path.dirname(DASHBOARD_DIR), 'routing')
+
+# Streamlit puts the main script's directory on sys.path and synthetic_data imports polyline
+# from there; query_log and tile_format are shared from routing/ (mapped by snowflake.yml)
+sys.path.insert(0, ROUTING_DIR)
+sys.path.insert(0, DASHBOARD_DIR)
+
+from local_session import LocalSession
+from synthetic_data import build_database
+
+PAGES = {
+    'Home': 'app.py',
+    'Overview': 'pages/1_Overview.py',
+    'Route Comparison': 'pages/2_Route_Comparison.py',
+    'Travel Time Analysis': 'pages/3_Travel_Time_Analysis.py',
+    'Accessibility': 'pages/4_Accessibility.py',
+    'Fleet Map': 'pages/5_Fleet_Map.py',
+    # Last, so it renders the queries logged by the pages before it
+    'Performance': 'pages/9_Performance.py',
+}
+
+RENDER_TIMEOUT = 600
+
+
+def parse_points(value):
+    """Parse point counts like 1M, 250k or 1000000"""
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    suffix = value[-1].lower()
+    if suffix in multipliers:
+        return int(float(value[:-1]) * multipliers[suffix])
+    return int(value)
+
+
+def select_trip(app):
+    """Route Comparison only renders a trip once a country and mode are picked"""
+    country = app.selectbox(key='country_filter')
+    mode = app.selectbox(key='mode_filter')
+    if country.options and mode.options:
+        country.set_value(country.options[0])
+        mode.set_value(mode.options[0])
+    return app
+
+
+def filter_country(app):
+    """Overview narrows every panel to the trips of a country"""
+    countries = next(widget for widget in app.multiselect if widget.label == "Countries")
+    if countries.options:
+        countries.set_value(countries.options[:1])
+    return app
+
+
+# Interactions run after the first render, timed as part of the page
+PAGE_INTERACTIONS = {
+    'Overview': filter_country,
+    'Route Comparison': select_trip,
+}
+
+
+def timed_run(session, app, tag):
+    session.tag = tag
+    first_query = len(session.queries)
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    app.run(timeout=RENDER_TIMEOUT)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+
+    queries = session.queries[first_query:]
+    return {
+        'render': tag,
+        'seconds': round(seconds, 3),
+        'query_seconds': round(sum(q['seconds'] for q in queries), 3),
+        'queries': len(queries),
+        'rows': sum(q['rows'] for q in queries),
+        'bytes': sum(q['bytes'] for q in queries),
+        'python_peak_mb': round(peak / 2 ** 20, 1),
+        'errors': [str(e.value) for e in app.exception],
+        'query_details': queries,
+    }
+
+
+def benchmark_page(session, page, script):
+    """Render a page cold, run its interactions, then re-render warm"""
+    st.cache_data.clear()
+    app = AppTest.from_file(os.path.join(DASHBOARD_DIR, script), default_timeout=RENDER_TIMEOUT)
+    renders = [timed_run(session, app, 'cold')]
+
+    interact = PAGE_INTERACTIONS.get(page)
+    if interact:
+        interact(app)
+        renders.append(timed_run(session, app, 'interaction'))
+
+    renders.append(timed_run(session, app, 'warm'))
+    return renders
+
+
+def print_results(results):
+    print(f"{'points':>10} {'page':<22} {'render':<12} {'seconds':>8} {'queries':>8} "
+          f"{'rows':>10} {'MB out':>8} {'py peak MB':>10}")
+    for row in results:
+        print(f"{row['points']:>10,} {row['page']:<22} {row['render']:<12} {row['seconds']:>8.2f} "
+              f"{row['queries']:>8} {row['rows']:>10,} {row['bytes'] / 2 ** 20:>8.1f} "
+              f"{row['python_peak_mb']:>10.1f}" + ("  ❌" if row['errors'] else ""))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard renders on a local Snowpark stand-in")
+    parser.add_argument('--points', nargs='+', default=['1M', '10M', '25M'],
+                        help="GEOLIFE_CLEAN sizes to benchmark (e.g. 1M 10M 25M)")
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--data-dir', default=os.path.join(DASHBOARD_DIR, 'benchmark', 'data'))
+    parser.add_argument('--rebuild', action='store_true', help="Regenerate the synthetic databases")
+    parser.add_argument('--output', help="Write all results, including per-query timings, to a JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+    tracemalloc.start()
+
+    results = []
+    for size in args.points:
+        points = parse_points(size)
+        path = os.path.join(args.data_dir, f"geolife_{points}.duckdb")
+        if args.rebuild or not os.path.exists(path):
+            if os.path.exists(path):
+                os.remove(path)
+            print(f"🛠️ Generating {points:,} points into {path}")
+            started = time.perf_counter()
+            build_database(path, points)
+            print(f"   done in {time.perf_counter() - started:.1f}s")
+
+        session = LocalSession(path)
+        with mock.patch('snowflake.snowpark.context.get_active_session', return_value=session):
+            for page in args.pages:
+                for render in benchmark_page(session, page, PAGES[page]):
+                    results.append(dict(points=points, page=page, **render))
+
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print_results(results)
+    print(f"Process peak RSS: {rss_mb:,.0f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"✅ Wrote {len(results)} renders to {args.output}")
+    return 1 if any(row['errors'] for row in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,589 @@
+"""Synthetic FLEET_DEMOS.ROUTING tables for the dashboard benchmark
+
+GEOLIFE_CLEAN is generated in DuckDB with the columns of the ETL output
+(trips of TRIP_POINTS points, 182 users, speeds typical of a mode); most
+trips are in Beijing like the real GeoLife data. GEOLIFE_TRIPS summarizes
+it per trip and is classified with MODE_RULES like the ETL, and
+GEOLIFE_CLASSIFIED joins the two; every MULTIMODAL_EVERY-th trip starts and
+ends on foot, so GEOLIFE_LEGS splits it into three legs. GEOLIFE_MATCHED
+stands in for map-matched trips of the road modes. The SF
+hexagon tables (hexagons, travel time matrix, pyramid, accessibility) are
+built from H3 res-9 cells covering San Francisco.
+
+GEOLIFE_TILE_INDEX and the trajectory tiles come from tile_export.py's own
+query, run through LocalSession; DuckDB has no stages, so the tile files
+are rows of STAGE_FILES, which LocalSession.file reads.
+
+Trip polylines are encoded with the ENCODE_POLYLINE UDF body from etl.sql,
+after checking that the dashboard's polyline.decode reads it back.
+"""
+import os
+import re
+
+import duckdb
+import h3
+import numpy as np
+import pandas as pd
+
+import polyline
+from local_session import LocalSession
+from tile_export import STAGE, tile_features, tiles_query
+from tile_format import encode, tile_path
+
+ETL_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'etl.sql')
+
+TRIP_POINTS = 500
+# Every MULTIMODAL_EVERY-th trip walks for WALK_POINTS points at both ends
+MULTIMODAL_EVERY = 4
+WALK_POINTS = 60
+WALK_KMH = 4
+USERS = 182
+
+# Zoom levels exported for the Fleet Map, around its default zoom of 11
+TILE_ZOOMS = range(9, 14)
+
+# (country code, country name, center lat, center lon, share of trips)
+COUNTRIES = [
+    ('CN', 'China', 39.91, 116.40, 0.90),
+    ('US', 'United States of America', 47.61, -122.33, 0.04),
+    ('JP', 'Japan', 35.68, 139.69, 0.03),
+    ('DE', 'Germany', 52.52, 13.40, 0.02),
+    ('KR', 'South Korea', 37.57, 126.98, 0.01),
+]
+
+# (mode, typical speed km/h)
+MODES = [
+    ('walking', 4),
+    ('running', 9),
+    ('cycling', 15),
+    ('driving_urban', 30),
+    ('driving_highway', 75),
+    ('train_airplane', 120),
+    ('stationary', 0.5),
+]
+
+# (priority, mode, min avg, max avg, max max, min median speed), as in etl.sql
+MODE_RULES = [
+    (1, 'stationary', None, 1, None, None),
+    (2, 'walking', 1, 6, 15, None),
+    (3, 'running', 6, 12, 20, None),
+    (4, 'cycling', 8, 25, 45, None),
+    (5, 'train_airplane', 80, None, None, None),
+    (6, 'train_airplane', 60.01, None, None, 80.01),
+    (7, 'driving_highway', 40, None, None, 60),
+    (8, 'driving_urban', 15, 80, None, None),
+]
+
+# Routing profile per mode of matched trips, as in routing/map_matcher.py
+MATCHED_PROFILES = {
+    'walking': 'foot-walking',
+    'running': 'foot-walking',
+    'cycling': 'cycling-electric',
+    'driving_urban': 'driving-car',
+    'driving_highway': 'driving-car',
+}
+
+SF_BOUNDS = (37.70, -122.52, 37.83, -122.35)
+SF_RESOLUTION = 9
+SF_MATRIX_RINGS = 15
+EBIKE_KMH = 20
+DETOUR_FACTOR = 1.3
+
+
+def create_geolife_clean(con, points):
+    """Create ROUTING.GEOLIFE_CLEAN with `points` GPS points"""
+    trips = max(1, points // TRIP_POINTS)
+    countries = ", ".join(
+        f"('{code}', '{name}', {lat}, {lon}, {share})" for code, name, lat, lon, share in COUNTRIES
+    )
+    modes = ", ".join(f"({i}, '{mode}', {speed})" for i, (mode, speed) in enumerate(MODES))
+
+    con.sql(f"""
+        CREATE OR REPLACE TABLE routing.geolife_clean AS
+        WITH countries AS (
+            SELECT *, SUM(share) OVER (ORDER BY share DESC) AS cumulative
+            FROM (VALUES {countries}) c(country_code, country_name, lat, lon, share)
+        ),
+        modes AS (
+            SELECT * FROM (VALUES {modes}) m(mode_index, transportation_mode, speed)
+        ),
+        trips AS (
+            SELECT
+                t.range AS trip,
+                (hash(t.range) % 1000) / 1000.0 AS country_draw,
+                hash(t.range * 31) % {len(MODES)} AS mode_index,
+                ((hash(t.range * 17) % 2000) / 10000.0) - 0.1 AS lat_offset,
+                ((hash(t.range * 13) % 2000) / 10000.0) - 0.1 AS lon_offset,
+                TIMESTAMP '2008-01-01' + INTERVAL (hash(t.range * 7) % 126144000) SECOND AS started_at
+            FROM range({trips}) t
+        ),
+        trip_context AS (
+            SELECT
+                t.*,
+                m.transportation_mode,
+                m.speed,
+                c.country_code,
+                c.country_name,
+                c.lat + t.lat_offset AS start_lat,
+                c.lon + t.lon_offset AS start_lon
+            FROM trips t
+            JOIN modes m ON m.mode_index = t.mode_index
+            JOIN countries c
+                ON t.country_draw < c.cumulative
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY t.trip ORDER BY c.cumulative) = 1
+        ),
+        gps AS (
+            SELECT
+                lpad(CAST(tc.trip % {USERS} AS VARCHAR), 3, '0') AS uid,
+                strftime(tc.started_at, '%Y%m%d%H%M%S') AS tid,
+                p.range AS seq,
+                tc.start_lat + p.range * tc.speed * 0.0000125 AS lat,
+                tc.start_lon + p.range * tc.speed * 0.0000125 * ((tc.trip % 3) - 1) AS lng,
+                tc.started_at + INTERVAL (p.range * 5) SECOND AS event_timestamp,
+                GREATEST(0, (
+                    CASE
+                        WHEN tc.trip % {MULTIMODAL_EVERY} = 0
+                            AND (p.range < {WALK_POINTS} OR p.range >= {TRIP_POINTS - WALK_POINTS})
+                        THEN {WALK_KMH}
+                        ELSE tc.speed
+                    END
+                ) * (0.7 + random() * 0.6)) AS speed,
+                tc.country_code,
+                tc.country_name
+            FROM trip_context tc
+            CROSS JOIN range({TRIP_POINTS}) p
+        )
+        SELECT
+            uid,
+            tid,
+            lat,
+            lng,
+            0 AS zero_col,
+            50.0 AS alt,
+            CAST(epoch(event_timestamp) / 86400 AS DOUBLE) AS dayno,
+            CAST(event_timestamp AS DATE) AS event_date,
+            CAST(event_timestamp AS TIME) AS event_time,
+            event_timestamp,
+            'POINT(' || lng || ' ' || lat || ')' AS geometry,
+            CASE WHEN seq = 0 THEN 0 ELSE 5 END AS time_lag,
+            speed,
+            country_code,
+            country_name
+        FROM gps
+        ORDER BY uid, tid, event_timestamp
+    """)
+
+
+def etl_python_function(name):
+    """Load the handler of a Python UDF defined in etl.sql"""
+    with open(ETL_SQL) as f:
+        match = re.search(
+            rf"FUNCTION FLEET_DEMOS\.ROUTING\.{name}\(.*?HANDLER = '(\w+)'\s+AS \$\$(.*?)\$\$", f.read(), re.S
+        )
+    namespace = {}
+    exec(match.group(2), namespace)
+    return namespace[match.group(1)]
+
+
+def load_polyline_encoder():
+    """Get ENCODE_POLYLINE from etl.sql, failing if polyline.decode does not read its output back"""
+    encode = etl_python_function('ENCODE_POLYLINE')
+    sample = [[116.40001, 39.91002], [116.41234, 39.90011], [-122.33457, 47.60987], [0.0, -0.00001]]
+    decoded = polyline.decode(encode(sample))
+    if decoded != sample:
+        raise RuntimeError(f"ENCODE_POLYLINE in etl.sql and polyline.decode disagree: {sample} -> {decoded}")
+    return encode
+
+
+def create_geolife_trips(con):
+    """Create ROUTING.GEOLIFE_TRIPS, one row per GEOLIFE_CLEAN trip, classified with ROUTING.MODE_RULES"""
+    encode = load_polyline_encoder()
+    con.create_function('encode_polyline', lambda coordinates: encode(coordinates), ['DOUBLE[][]'], 'VARCHAR')
+    rules = ", ".join(
+        "(" + ", ".join("NULL" if v is None else repr(v) for v in rule) + ")" for rule in MODE_RULES
+    )
+    con.sql(f"""
+        CREATE OR REPLACE TABLE routing.mode_rules AS
+        SELECT * FROM (VALUES {rules})
+            r(priority, transportation_mode, min_avg_speed, max_avg_speed, max_max_speed, min_median_speed)
+    """)
+    con.sql("""
+        CREATE OR REPLACE TABLE routing.geolife_trips AS
+        SELECT
+            uid,
+            tid,
+            uid || '-' || tid AS trip_id,
+            mode(country_code) AS country_code,
+            mode(country_name) AS country_name,
+            CAST(NULL AS VARCHAR) AS transportation_mode,
+            COUNT(*) AS point_count,
+            MIN(event_timestamp) AS start_time,
+            MAX(event_timestamp) AS end_time,
+            arg_min(lng, event_timestamp) AS start_lng,
+            arg_min(lat, event_timestamp) AS start_lat,
+            arg_max(lng, event_timestamp) AS end_lng,
+            arg_max(lat, event_timestamp) AS end_lat,
+            ROUND(AVG(speed) FILTER (WHERE speed >= 0), 2) AS trip_avg_speed,
+            ROUND(MAX(speed) FILTER (WHERE speed >= 0), 2) AS trip_max_speed,
+            ROUND(MEDIAN(speed) FILTER (WHERE speed >= 0), 2) AS trip_median_speed,
+            ROUND(SUM(CASE WHEN speed >= 0 THEN speed * time_lag / 3600 ELSE 0 END), 3) AS trip_length_km,
+            encode_polyline(list([lng, lat] ORDER BY event_timestamp)) AS trip_polyline,
+            CAST(to_json(
+                list([point_index, speed_bucket] ORDER BY event_timestamp) FILTER (WHERE is_bucket_start)
+            ) AS VARCHAR) AS speed_breaks
+        FROM (
+            SELECT
+                *,
+                speed_bucket IS NOT NULL
+                    AND speed_bucket IS DISTINCT FROM
+                        LAG(speed_bucket) OVER (PARTITION BY uid, tid ORDER BY event_timestamp) AS is_bucket_start
+            FROM (
+                SELECT
+                    *,
+                    ROW_NUMBER() OVER (PARTITION BY uid, tid ORDER BY event_timestamp) - 1 AS point_index,
+                    CASE
+                        WHEN segment_speed > 60 THEN 3
+                        WHEN segment_speed > 30 THEN 2
+                        WHEN segment_speed > 10 THEN 1
+                        WHEN segment_speed IS NOT NULL THEN 0
+                    END AS speed_bucket
+                FROM (
+                    SELECT
+                        *,
+                        (speed + LEAD(speed) OVER (PARTITION BY uid, tid ORDER BY event_timestamp)) / 2
+                            AS segment_speed
+                    FROM routing.geolife_clean
+                )
+            )
+        )
+        GROUP BY uid, tid
+        ORDER BY country_name, uid, tid
+    """)
+    con.sql("""
+        UPDATE routing.geolife_trips t
+        SET transportation_mode = c.transportation_mode
+        FROM (
+            SELECT
+                tr.uid,
+                tr.tid,
+                COALESCE(r.transportation_mode, 'unknown') AS transportation_mode
+            FROM routing.geolife_trips tr
+            LEFT JOIN routing.mode_rules r
+                ON (r.min_avg_speed IS NULL OR tr.trip_avg_speed >= r.min_avg_speed)
+                AND (r.max_avg_speed IS NULL OR tr.trip_avg_speed < r.max_avg_speed)
+                AND (r.max_max_speed IS NULL OR tr.trip_max_speed < r.max_max_speed)
+                AND (r.min_median_speed IS NULL OR tr.trip_median_speed >= r.min_median_speed)
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY tr.uid, tr.tid ORDER BY r.priority) = 1
+        ) c
+        WHERE t.uid = c.uid
+            AND t.tid = c.tid
+    """)
+    con.sql("""
+        CREATE OR REPLACE VIEW routing.geolife_classified AS
+        SELECT
+            g.*,
+            t.transportation_mode,
+            t.trip_avg_speed,
+            t.trip_max_speed,
+            t.trip_median_speed
+        FROM routing.geolife_clean g
+        LEFT JOIN routing.geolife_trips t
+            ON t.uid = g.uid
+            AND t.tid = g.tid
+    """)
+
+
+def create_geolife_legs(con):
+    """Create ROUTING.GEOLIFE_LEGS, the single-mode legs of every trip, like etl.sql Step 5"""
+    con.sql("""
+        CREATE OR REPLACE TABLE routing.geolife_legs AS
+        WITH smoothed AS (
+            SELECT
+                uid,
+                tid,
+                event_timestamp,
+                lat,
+                lng,
+                speed,
+                time_lag,
+                AVG(speed) FILTER (WHERE speed >= 0) OVER (
+                    PARTITION BY uid, tid ORDER BY event_timestamp
+                    ROWS BETWEEN 5 PRECEDING AND 5 FOLLOWING
+                ) AS smoothed_speed
+            FROM routing.geolife_clean
+        ),
+        regimes AS (
+            SELECT
+                *,
+                CASE
+                    WHEN smoothed_speed < 1 THEN 'stop'
+                    WHEN smoothed_speed < 7 THEN 'foot'
+                    WHEN smoothed_speed < 25 THEN 'cycle'
+                    WHEN smoothed_speed >= 25 THEN 'motor'
+                END AS regime,
+                time_lag > 300 AS is_gap
+            FROM smoothed
+        ),
+        run_starts AS (
+            SELECT
+                *,
+                regime IS DISTINCT FROM LAG(regime) OVER (PARTITION BY uid, tid ORDER BY event_timestamp)
+                    OR is_gap AS is_run_start
+            FROM regimes
+        ),
+        run_ends AS (
+            SELECT
+                *,
+                COALESCE(LEAD(is_run_start) OVER (PARTITION BY uid, tid ORDER BY event_timestamp), TRUE) AS is_run_end
+            FROM run_starts
+        ),
+        runs AS (
+            SELECT
+                *,
+                COALESCE(
+                    CASE WHEN is_run_start THEN event_timestamp END,
+                    LAG(CASE WHEN is_run_start THEN event_timestamp END IGNORE NULLS)
+                        OVER (PARTITION BY uid, tid ORDER BY event_timestamp)
+                ) AS run_start_time,
+                COALESCE(
+                    CASE WHEN is_run_end THEN event_timestamp END,
+                    LEAD(CASE WHEN is_run_end THEN event_timestamp END IGNORE NULLS)
+                        OVER (PARTITION BY uid, tid ORDER BY event_timestamp)
+                ) AS run_end_time
+            FROM run_ends
+        ),
+        kept_runs AS (
+            SELECT
+                *,
+                CASE
+                    WHEN date_diff('second', run_start_time, run_end_time) < 120 THEN NULL
+                    ELSE regime
+                END AS kept_regime
+            FROM runs
+        ),
+        filled AS (
+            SELECT
+                *,
+                COALESCE(
+                    kept_regime,
+                    LAG(kept_regime IGNORE NULLS) OVER (PARTITION BY uid, tid ORDER BY event_timestamp),
+                    LEAD(kept_regime IGNORE NULLS) OVER (PARTITION BY uid, tid ORDER BY event_timestamp),
+                    regime
+                ) AS leg_regime
+            FROM kept_runs
+        ),
+        leg_starts AS (
+            SELECT
+                *,
+                leg_regime IS DISTINCT FROM LAG(leg_regime) OVER (PARTITION BY uid, tid ORDER BY event_timestamp)
+                    OR is_gap AS is_leg_start
+            FROM filled
+        ),
+        legs AS (
+            SELECT
+                *,
+                SUM(CASE WHEN is_leg_start THEN 1 ELSE 0 END) OVER (
+                    PARTITION BY uid, tid ORDER BY event_timestamp
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) AS leg_no
+            FROM leg_starts
+        )
+        SELECT
+            uid,
+            tid,
+            CAST(leg_no AS INTEGER) AS leg_no,
+            uid || '-' || tid AS trip_id,
+            uid || '-' || tid || '-' || CAST(leg_no AS INTEGER) AS leg_id,
+            any_value(leg_regime) AS speed_regime,
+            CAST(NULL AS VARCHAR) AS transportation_mode,
+            COUNT(*) AS point_count,
+            MIN(event_timestamp) AS start_time,
+            MAX(event_timestamp) AS end_time,
+            date_diff('second', MIN(event_timestamp), MAX(event_timestamp)) AS duration_seconds,
+            arg_min(lng, event_timestamp) AS start_lng,
+            arg_min(lat, event_timestamp) AS start_lat,
+            arg_max(lng, event_timestamp) AS end_lng,
+            arg_max(lat, event_timestamp) AS end_lat,
+            ROUND(SUM(CASE WHEN is_leg_start OR speed < 0 THEN 0 ELSE speed * time_lag / 3600 END), 3) AS length_km,
+            ROUND(AVG(speed) FILTER (WHERE speed >= 0), 2) AS leg_avg_speed,
+            ROUND(MAX(speed) FILTER (WHERE speed >= 0), 2) AS leg_max_speed,
+            ROUND(MEDIAN(speed) FILTER (WHERE speed >= 0), 2) AS leg_median_speed
+        FROM legs
+        GROUP BY uid, tid, leg_no
+        ORDER BY uid, tid, leg_no
+    """)
+    con.sql("""
+        UPDATE routing.geolife_legs l
+        SET transportation_mode = c.transportation_mode
+        FROM (
+            SELECT
+                lg.uid,
+                lg.tid,
+                lg.leg_no,
+                COALESCE(r.transportation_mode, 'unknown') AS transportation_mode
+            FROM routing.geolife_legs lg
+            LEFT JOIN routing.mode_rules r
+                ON (r.min_avg_speed IS NULL OR lg.leg_avg_speed >= r.min_avg_speed)
+                AND (r.max_avg_speed IS NULL OR lg.leg_avg_speed < r.max_avg_speed)
+                AND (r.max_max_speed IS NULL OR lg.leg_max_speed < r.max_max_speed)
+                AND (r.min_median_speed IS NULL OR lg.leg_median_speed >= r.min_median_speed)
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY lg.uid, lg.tid, lg.leg_no ORDER BY r.priority) = 1
+        ) c
+        WHERE l.uid = c.uid
+            AND l.tid = c.tid
+            AND l.leg_no = c.leg_no
+    """)
+
+
+def create_geolife_matched(con):
+    """Create ROUTING.GEOLIFE_MATCHED like routing/map_matcher.py: every 20th point as the line, 5% longer than the GPS path"""
+    profiles = ", ".join(f"('{mode}', '{profile}')" for mode, profile in MATCHED_PROFILES.items())
+    con.sql(f"""
+        CREATE OR REPLACE TABLE routing.geolife_matched AS
+        WITH profiles AS (
+            SELECT * FROM (VALUES {profiles}) p(transportation_mode, routing_profile)
+        ),
+        waypoints AS (
+            SELECT
+                g.uid,
+                g.tid,
+                g.event_timestamp,
+                g.lng,
+                g.lat,
+                g.speed * g.time_lag / 3600 AS step_km,
+                ROW_NUMBER() OVER (PARTITION BY g.uid, g.tid ORDER BY g.event_timestamp) AS seq
+            FROM routing.geolife_clean g
+        )
+        SELECT
+            w.uid,
+            w.tid,
+            t.trip_id,
+            p.routing_profile,
+            COUNT(*) FILTER (WHERE w.seq % 20 = 1) AS waypoint_count,
+            ROUND(SUM(w.step_km), 3) AS gps_length_km,
+            ROUND(SUM(w.step_km) * 1.05, 3) AS matched_length_km,
+            ROUND(date_diff('second', MIN(w.event_timestamp), MAX(w.event_timestamp)) / 60, 2)
+                AS matched_duration_minutes,
+            CAST(json_object(
+                'type', 'LineString',
+                'coordinates', list([w.lng, w.lat] ORDER BY w.event_timestamp) FILTER (WHERE w.seq % 20 = 1)
+            ) AS VARCHAR) AS matched_geometry
+        FROM waypoints w
+        JOIN routing.geolife_trips t ON t.uid = w.uid AND t.tid = w.tid
+        JOIN profiles p ON p.transportation_mode = t.transportation_mode
+        GROUP BY w.uid, w.tid, t.trip_id, p.routing_profile
+        ORDER BY w.uid, w.tid
+    """)
+
+
+def sf_hexagons():
+    """Get the H3 cells covering San Francisco with their centers"""
+    min_lat, min_lon, max_lat, max_lon = SF_BOUNDS
+    polygon = h3.LatLngPoly([
+        (min_lat, min_lon), (min_lat, max_lon), (max_lat, max_lon), (max_lat, min_lon)
+    ])
+    cells = sorted(h3.polygon_to_cells(polygon, SF_RESOLUTION))
+    centers = [h3.cell_to_latlng(cell) for cell in cells]
+    return pd.DataFrame({
+        'hex_id': cells,
+        'latitude': [lat for lat, _ in centers],
+        'longitude': [lon for _, lon in centers],
+    })
+
+
+def create_sf_tables(con):
+    """Create SF_HEXAGONS, SF_TRAVEL_TIME_MATRIX, SF_TRAVEL_TIME_PYRAMID and SF_ACCESSIBILITY"""
+    hexagons = sf_hexagons()
+    cells = set(hexagons['hex_id'])
+    pairs = [
+        (origin, dest)
+        for origin in hexagons['hex_id']
+        for dest in h3.grid_disk(origin, SF_MATRIX_RINGS)
+        if dest in cells and dest != origin
+    ]
+    matrix = pd.DataFrame(pairs, columns=['origin_hex', 'dest_hex'])
+    centers = hexagons.set_index('hex_id')
+    lat1 = np.radians(matrix['origin_hex'].map(centers['latitude']))
+    lon1 = np.radians(matrix['origin_hex'].map(centers['longitude']))
+    lat2 = np.radians(matrix['dest_hex'].map(centers['latitude']))
+    lon2 = np.radians(matrix['dest_hex'].map(centers['longitude']))
+    haversine = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    matrix['distance_km'] = 2 * 6371 * np.arcsin(np.sqrt(haversine)) * DETOUR_FACTOR
+    matrix['duration_minutes'] = matrix['distance_km'] / EBIKE_KMH * 60
+
+    levels = []
+    for level in [1, 2]:
+        resolution = SF_RESOLUTION - level
+        parent = {cell: h3.cell_to_parent(cell, resolution) for cell in cells}
+        parents = matrix.assign(
+            origin_hex=matrix['origin_hex'].map(parent),
+            dest_hex=matrix['dest_hex'].map(parent),
+        )
+        grouped = parents.groupby(['origin_hex', 'dest_hex']).agg(
+            min_duration_minutes=('duration_minutes', 'min'),
+            median_duration_minutes=('duration_minutes', 'median'),
+            median_distance_km=('distance_km', 'median'),
+            pair_count=('duration_minutes', 'size'),
+        ).reset_index()
+        grouped.insert(0, 'resolution', resolution)
+        grouped.insert(0, 'level', level)
+        levels.append(grouped)
+    pyramid = pd.concat(levels, ignore_index=True)
+
+    con.register('hexagons_df', hexagons)
+    con.register('matrix_df', matrix)
+    con.register('pyramid_df', pyramid)
+    con.sql("CREATE OR REPLACE TABLE routing.sf_hexagons AS SELECT * FROM hexagons_df")
+    con.sql("CREATE OR REPLACE TABLE routing.sf_travel_time_matrix AS SELECT * FROM matrix_df")
+    con.sql("CREATE OR REPLACE TABLE routing.sf_travel_time_pyramid AS SELECT * FROM pyramid_df")
+    con.sql("""
+        CREATE OR REPLACE TABLE routing.sf_accessibility AS
+        SELECT
+            h.hex_id,
+            h.latitude,
+            h.longitude,
+            COUNT(*) FILTER (WHERE m.duration_minutes <= 5) AS reachable_5_min,
+            COUNT(*) FILTER (WHERE m.duration_minutes <= 10) AS reachable_10_min,
+            COUNT(*) FILTER (WHERE m.duration_minutes <= 15) AS reachable_15_min,
+            MEDIAN(m.duration_minutes) AS median_duration_minutes,
+            COUNT(m.dest_hex) AS destination_count
+        FROM routing.sf_hexagons h
+        LEFT JOIN routing.sf_travel_time_matrix m
+            ON m.origin_hex = h.hex_id
+        GROUP BY h.hex_id, h.latitude, h.longitude
+    """)
+
+
+def create_geolife_tiles(path):
+    """Create ROUTING.GEOLIFE_TILE_INDEX and the tile files, like routing/tile_export.py with its defaults"""
+    session = LocalSession(path, read_only=False)
+    index_rows, files = [], []
+    for zoom in TILE_ZOOMS:
+        tiles = session.sql(tiles_query(zoom, tolerance_px=1, max_features=5000, max_points=20000)).to_pandas()
+        for row in tiles.itertuples():
+            x, y = int(row.TILE_X), int(row.TILE_Y)
+            data = encode(zoom, x, y, tile_features(row.FEATURES))
+            index_rows.append((zoom, x, y, int(row.FEATURE_COUNT), int(row.POINT_COUNT), len(data)))
+            files.append((STAGE, tile_path(zoom, x, y), data))
+
+    con = session.con
+    con.register('tile_index_df', pd.DataFrame(index_rows, columns=[
+        'zoom', 'tile_x', 'tile_y', 'feature_count', 'point_count', 'tile_bytes'
+    ]))
+    con.register('stage_files_df', pd.DataFrame(files, columns=['stage', 'path', 'data']))
+    con.sql("CREATE OR REPLACE TABLE fleet_demos.routing.geolife_tile_index AS SELECT * FROM tile_index_df")
+    con.sql("CREATE OR REPLACE TABLE fleet_demos.routing.stage_files AS SELECT * FROM stage_files_df")
+    con.close()
+
+
+def build_database(path, points):
+    """Write a DuckDB database file with all tables the dashboard reads"""
+    con = duckdb.connect(path)
+    con.sql("CREATE SCHEMA IF NOT EXISTS routing")
+    create_geolife_clean(con, points)
+    create_geolife_trips(con)
+    create_geolife_legs(con)
+    create_geolife_matched(con)
+    create_sf_tables(con)
+    con.close()
+    create_geolife_tiles(path)
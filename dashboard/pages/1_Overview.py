@@ -3,13 +3,15 @@ import pandas as pd
 import altair as alt
 from snowflake.snowpark.context import get_active_session
 
+from query_log import instrument
+
 st.set_page_config(
     page_title="Overview - Fleet Analytics",
     page_icon="📊",
     layout="wide"
 )
 
-session = get_active_session()
+session = instrument(get_active_session(), page="Overview")
 
 st.title("Fleet Analytics Overview")
 st.markdown("Detailed analysis of GPS trajectory data")
@@ -17,28 +19,29 @@ st.markdown("Detailed analysis of GPS trajectory data")
 with st.sidebar:
     st.header("Filters")
     
-    users_query = "SELECT DISTINCT UID FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN ORDER BY UID"
-    users_df = session.sql(users_query).to_pandas()
+    users_query = "SELECT DISTINCT UID FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS ORDER BY UID"
+    users_df = session.sql(users_query, panel="Filter: Users").to_pandas()
     selected_users = st.multiselect(
         "Users",
         options=users_df["UID"].tolist(),
         default=None
     )
     
-    modes_query = "SELECT DISTINCT transportation_mode FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN WHERE transportation_mode IS NOT NULL ORDER BY transportation_mode"
-    modes_df = session.sql(modes_query).to_pandas()
+    modes_query = "SELECT DISTINCT transportation_mode FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS WHERE transportation_mode IS NOT NULL ORDER BY transportation_mode"
+    modes_df = session.sql(modes_query, panel="Filter: Modes").to_pandas()
     selected_modes = st.multiselect(
         "Transportation Modes",
         options=modes_df["TRANSPORTATION_MODE"].tolist(),
         default=None
     )
     
-    countries_query = "SELECT DISTINCT country_name FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN WHERE country_name IS NOT NULL ORDER BY country_name"
-    countries_df = session.sql(countries_query).to_pandas()
+    countries_query = "SELECT DISTINCT country_name FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS WHERE country_name IS NOT NULL ORDER BY country_name"
+    countries_df = session.sql(countries_query, panel="Filter: Countries").to_pandas()
     selected_countries = st.multiselect(
         "Countries",
         options=countries_df["COUNTRY_NAME"].tolist(),
-        default=None
+        default=None,
+        help="Trips whose points are mostly in these countries"
     )
 
 where_clauses = []
@@ -54,6 +57,14 @@ if selected_countries:
 
 where_clause = " AND " + " AND ".join(where_clauses) if where_clauses else ""
 
+# Filters select trips; point panels take every point of the selected trips
+trip_filter = f"""
+    AND (UID, TID) IN (
+        SELECT UID, TID
+        FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+        WHERE 1=1 {where_clause}
+    )""" if where_clauses else ""
+
 overview_query = f"""
 SELECT 
     COUNT(*) as total_points,
@@ -62,10 +73,10 @@ SELECT
     ROUND(AVG(SPEED), 2) as avg_speed,
     ROUND(MAX(SPEED), 2) as max_speed
 FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
-WHERE 1=1 {where_clause}
+WHERE 1=1 {trip_filter}
 """
 
-overview_df = session.sql(overview_query).to_pandas()
+overview_df = session.sql(overview_query, panel="Summary Metrics").to_pandas()
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -110,15 +121,15 @@ with col1:
         mode_query = f"""
         SELECT 
             transportation_mode,
-            COUNT(DISTINCT CONCAT(UID, '-', TID)) as trip_count,
+            COUNT(*) as trip_count,
             ROUND(AVG(trip_avg_speed), 2) as avg_speed
-        FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+        FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
         WHERE transportation_mode IS NOT NULL {where_clause}
         GROUP BY transportation_mode
         ORDER BY trip_count DESC
         """
         
-        mode_df = session.sql(mode_query).to_pandas()
+        mode_df = session.sql(mode_query, panel="Transportation Mode Distribution").to_pandas()
         
         if not mode_df.empty:
             chart = alt.Chart(mode_df).mark_bar().encode(
@@ -139,16 +150,16 @@ with col2:
         country_query = f"""
         SELECT 
             country_name,
-            COUNT(DISTINCT CONCAT(UID, '-', TID)) as trip_count,
-            COUNT(*) as point_count
-        FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+            COUNT(*) as trip_count,
+            SUM(point_count) as point_count
+        FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
         WHERE country_name IS NOT NULL {where_clause}
         GROUP BY country_name
         ORDER BY trip_count DESC
         LIMIT 10
         """
         
-        country_df = session.sql(country_query).to_pandas()
+        country_df = session.sql(country_query, panel="Top Countries by Trips").to_pandas()
         
         if not country_df.empty:
             chart = alt.Chart(country_df).mark_bar().encode(
@@ -175,16 +186,13 @@ with st.container():
         ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY trip_avg_speed), 2) as median_speed,
         ROUND(PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY trip_avg_speed), 2) as p75_speed,
         ROUND(MAX(trip_avg_speed), 2) as max_speed
-    FROM (
-        SELECT DISTINCT UID, TID, transportation_mode, trip_avg_speed
-        FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
-        WHERE transportation_mode IS NOT NULL {where_clause}
-    )
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+    WHERE transportation_mode IS NOT NULL {where_clause}
     GROUP BY transportation_mode
     ORDER BY median_speed
     """
     
-    speed_dist_df = session.sql(speed_dist_query).to_pandas()
+    speed_dist_df = session.sql(speed_dist_query, panel="Speed Distribution by Mode").to_pandas()
     
     if not speed_dist_df.empty:
         st.dataframe(
@@ -206,8 +214,8 @@ with col3:
         SELECT 
             country_name,
             transportation_mode,
-            COUNT(DISTINCT CONCAT(UID, '-', TID)) as trip_count
-        FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+            COUNT(*) as trip_count
+        FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
         WHERE country_name IS NOT NULL 
             AND transportation_mode IS NOT NULL
             {where_clause}
@@ -215,7 +223,7 @@ with col3:
         ORDER BY country_name, trip_count DESC
         """
         
-        mode_country_df = session.sql(mode_country_query).to_pandas()
+        mode_country_df = session.sql(mode_country_query, panel="Mode by Country").to_pandas()
         
         if not mode_country_df.empty:
             top_countries = mode_country_df.groupby("COUNTRY_NAME")["TRIP_COUNT"].sum().nlargest(5).index
@@ -241,8 +249,8 @@ with col4:
             country_name,
             transportation_mode,
             ROUND(AVG(trip_avg_speed), 2) as avg_speed,
-            COUNT(DISTINCT CONCAT(UID, '-', TID)) as trip_count
-        FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+            COUNT(*) as trip_count
+        FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
         WHERE country_name IS NOT NULL 
             AND transportation_mode IS NOT NULL
             {where_clause}
@@ -252,7 +260,7 @@ with col4:
         LIMIT 20
         """
         
-        speed_country_df = session.sql(speed_country_query).to_pandas()
+        speed_country_df = session.sql(speed_country_query, panel="Speed by Mode and Country").to_pandas()
         
         if not speed_country_df.empty:
             st.dataframe(
@@ -273,19 +281,17 @@ with st.container():
         TID,
         transportation_mode,
         country_name,
-        COUNT(*) as points,
+        point_count as points,
         trip_avg_speed,
         trip_max_speed,
         trip_median_speed
-    FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
     WHERE 1=1 {where_clause}
-    GROUP BY UID, TID, transportation_mode, country_name, 
-             trip_avg_speed, trip_max_speed, trip_median_speed
     ORDER BY trip_avg_speed DESC
     LIMIT 100
     """
     
-    sample_df = session.sql(sample_query).to_pandas()
+    sample_df = session.sql(sample_query, panel="Sample Trip Data").to_pandas()
     
     if not sample_df.empty:
         st.dataframe(
@@ -1,15 +1,19 @@
+import json
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
 from snowflake.snowpark.context import get_active_session
 
+from polyline import decode
+from query_log import instrument
+
 st.set_page_config(
     page_title="Route Comparison - Fleet Analytics",
     page_icon="🗺️",
     layout="wide"
 )
 
-session = get_active_session()
+session = instrument(get_active_session(), page="Route Comparison")
 
 st.title("Route Comparison")
 st.markdown("Compare actual GPS trajectories with OpenRouteService calculated routes")
@@ -17,20 +21,19 @@ st.markdown("Compare actual GPS trajectories with OpenRouteService calculated ro
 # Get list of trips
 trips_query = """
 SELECT 
-    CONCAT(UID, '-', TID) as trip_id,
+    trip_id,
     UID,
     TID,
     transportation_mode,
     country_name,
-    COUNT(*) as points,
+    point_count as points,
     ROUND(trip_avg_speed, 2) as avg_speed
-FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
 WHERE transportation_mode IS NOT NULL
-GROUP BY UID, TID, transportation_mode, country_name, trip_avg_speed
 ORDER BY UID, TID
 """
 
-trips_df = session.sql(trips_query).to_pandas()
+trips_df = session.sql(trips_query, panel="Trip List").to_pandas()
 
 with st.sidebar:
     st.header("Trip Selection")
@@ -83,23 +86,58 @@ with st.sidebar:
         st.info("Please select both country and transportation mode to see available trips")
         st.stop()
     
+    trip_info = filtered_df[filtered_df['TRIP_ID'] == selected_trip].iloc[0]
+    uid, tid = selected_trip.split('-')
+    
+    # Single-mode legs of the trip (etl.sql Step 5)
+    legs_query = f"""
+    SELECT 
+        leg_no,
+        transportation_mode,
+        point_count,
+        start_time,
+        end_time,
+        ROUND(duration_seconds / 60, 1) as duration_minutes,
+        length_km,
+        leg_avg_speed as avg_speed
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_LEGS
+    WHERE UID = '{uid}' AND TID = '{tid}'
+    ORDER BY leg_no
+    """
+    legs_df = session.sql(legs_query, panel="Trip Legs").to_pandas()
+    
+    selected_leg = None
+    if len(legs_df) > 1:
+        selected_leg = st.selectbox(
+            "Leg",
+            [None] + legs_df['LEG_NO'].tolist(),
+            format_func=lambda x: "Whole trip" if x is None else (
+                f"Leg {x}: {legs_df[legs_df['LEG_NO']==x]['TRANSPORTATION_MODE'].iloc[0]} "
+                f"({legs_df[legs_df['LEG_NO']==x]['DURATION_MINUTES'].iloc[0]} min)"
+            ),
+            index=0
+        )
+    
     st.divider()
     
     # Profile selector for ORS
     ors_profile_map = {
-        'car': 'driving-car',
-        'taxi': 'driving-car',
-        'bus': 'driving-car',
-        'motorcycle': 'driving-car',
-        'train': 'driving-car',
-        'subway': 'driving-car',
-        'bike': 'cycling-electric',
-        'walk': 'foot-walking',
-        'run': 'foot-walking'
+        'walking': 'foot-walking',
+        'running': 'foot-walking',
+        'stationary': 'foot-walking',
+        'cycling': 'cycling-electric',
+        'driving_urban': 'driving-car',
+        'driving_highway': 'driving-car',
+        'train_airplane': 'driving-car'
     }
     
-    trip_info = filtered_df[filtered_df['TRIP_ID'] == selected_trip].iloc[0]
-    default_profile = ors_profile_map.get(trip_info['TRANSPORTATION_MODE'], 'driving-car')
+    if selected_leg is None:
+        leg_info = None
+        route_mode = trip_info['TRANSPORTATION_MODE']
+    else:
+        leg_info = legs_df[legs_df['LEG_NO'] == selected_leg].iloc[0]
+        route_mode = leg_info['TRANSPORTATION_MODE']
+    default_profile = ors_profile_map.get(route_mode, 'driving-car')
     
     ors_profile = st.selectbox(
         "ORS Routing Profile",
@@ -107,91 +145,75 @@ with st.sidebar:
         index=['driving-car', 'driving-hgv', 'cycling-electric', 'foot-walking'].index(default_profile)
     )
     
-    st.info(f"**Trip Info:**\n- Mode: {trip_info['TRANSPORTATION_MODE']}\n- Points: {trip_info['POINTS']}\n- Avg Speed: {trip_info['AVG_SPEED']} km/h\n- Country: {trip_info['COUNTRY_NAME']}")
-
-# Get actual trip data with geospatial aggregation and metrics
-uid, tid = selected_trip.split('-')
-
-# Get trip segments with speed-based color coding AND trip metrics
-segments_query = f"""
-WITH ordered_points AS (
-    SELECT 
-        LAT,
-        LNG,
-        SPEED,
-        GEOMETRY as point,
-        EVENT_TIMESTAMP,
-        TIME_LAG,
-        ROW_NUMBER() OVER (ORDER BY EVENT_TIMESTAMP) as rn
-    FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
-    WHERE UID = '{uid}' AND TID = '{tid}'
-    ORDER BY EVENT_TIMESTAMP
-),
-segments AS (
-    SELECT 
-        p1.LAT as lat1,
-        p1.LNG as lon1,
-        p2.LAT as lat2,
-        p2.LNG as lon2,
-        TO_GEOGRAPHY(
-            OBJECT_CONSTRUCT(
-                'type', 'LineString',
-                'coordinates', ARRAY_CONSTRUCT(
-                    ARRAY_CONSTRUCT(p1.LNG, p1.LAT),
-                    ARRAY_CONSTRUCT(p2.LNG, p2.LAT)
-                )
-            )
-        ) as segment_geom,
-        (p1.SPEED + p2.SPEED) / 2 as avg_speed,
-        p2.TIME_LAG as segment_duration_seconds,
-        p1.rn
-    FROM ordered_points p1
-    JOIN ordered_points p2 ON p2.rn = p1.rn + 1
-),
-trip_metrics AS (
-    SELECT 
-        SUM(TIME_LAG) as total_duration_seconds
-    FROM ordered_points
-    WHERE TIME_LAG IS NOT NULL
-)
+    st.info(f"**Trip Info:**\n- Mode: {trip_info['TRANSPORTATION_MODE']}\n- Points: {trip_info['POINTS']}\n- Avg Speed: {trip_info['AVG_SPEED']} km/h\n- Country: {trip_info['COUNTRY_NAME']}\n- Legs: {len(legs_df)}")
+    
+    if leg_info is not None:
+        st.info(f"**Leg {selected_leg}:**\n- Mode: {leg_info['TRANSPORTATION_MODE']}\n- Points: {leg_info['POINT_COUNT']}\n- Avg Speed: {leg_info['AVG_SPEED']} km/h\n- Length: {leg_info['LENGTH_KM']} km")
+
+# Speed buckets of etl.sql SPEED_BREAKS: color and legend label
+SPEED_COLORS = {
+    0: [0, 255, 0, 200],    # Green for < 10 km/h
+    1: [255, 255, 0, 200],  # Yellow for 10-30 km/h
+    2: [255, 165, 0, 200],  # Orange for 30-60 km/h
+    3: [255, 0, 0, 200],    # Red for > 60 km/h
+}
+SPEED_LABELS = {0: "< 10 km/h", 1: "10-30 km/h", 2: "30-60 km/h", 3: "> 60 km/h"}
+
+# Trip geometry: one encoded polyline per trip, decoded here
+geometry_query = f"""
 SELECT 
-    s.lat1,
-    s.lon1,
-    s.lat2,
-    s.lon2,
-    ST_ASGEOJSON(s.segment_geom) as segment_geojson,
-    ROUND(s.avg_speed, 2) as avg_speed,
-    s.segment_duration_seconds,
-    -- Color coding based on speed (Red=fast, Yellow=medium, Green=slow)
-    CASE 
-        WHEN s.avg_speed > 60 THEN '[255, 0, 0, 200]'    -- Red for > 60 km/h
-        WHEN s.avg_speed > 30 THEN '[255, 165, 0, 200]'  -- Orange for 30-60 km/h
-        WHEN s.avg_speed > 10 THEN '[255, 255, 0, 200]'  -- Yellow for 10-30 km/h
-        ELSE '[0, 255, 0, 200]'                         -- Green for < 10 km/h
-    END as color,
-    tm.total_duration_seconds,
-    ROUND(SUM(s.avg_speed * (s.segment_duration_seconds / 3600.0)) OVER (), 2) as total_distance_km
-FROM segments s
-CROSS JOIN trip_metrics tm
-ORDER BY s.rn
+    trip_polyline,
+    speed_breaks,
+    trip_length_km,
+    TIMESTAMPDIFF(SECOND, start_time, end_time) as duration_seconds
+FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+WHERE country_name = '{selected_country}'
+    AND transportation_mode = '{selected_mode}'
+    AND UID = '{uid}' AND TID = '{tid}'
 """
 
-segments_df = session.sql(segments_query).to_pandas()
+geometry_df = session.sql(geometry_query, panel="Trip Geometry").to_pandas()
 
-if segments_df.empty:
+if geometry_df.empty or not geometry_df['TRIP_POLYLINE'].iloc[0]:
     st.error("No data found for selected trip")
     st.stop()
 
+path = decode(geometry_df['TRIP_POLYLINE'].iloc[0])
+speed_breaks = geometry_df['SPEED_BREAKS'].iloc[0]
+if isinstance(speed_breaks, str):
+    speed_breaks = json.loads(speed_breaks)
+
+# Legs cover the trip's points in order, so a leg is a slice of the path
+if leg_info is not None:
+    first_point = int(legs_df[legs_df['LEG_NO'] < selected_leg]['POINT_COUNT'].sum())
+    last_point = first_point + int(leg_info['POINT_COUNT']) - 1
+    actual_duration_minutes = leg_info['DURATION_MINUTES']
+    actual_distance_km = round(leg_info['LENGTH_KM'], 2)
+else:
+    first_point, last_point = 0, len(path) - 1
+    actual_duration_minutes = round(geometry_df['DURATION_SECONDS'].iloc[0] / 60, 2)
+    actual_distance_km = round(geometry_df['TRIP_LENGTH_KM'].iloc[0], 2)
+
 # Get start and end points
-start_lat = segments_df.iloc[0]['LAT1']
-start_lon = segments_df.iloc[0]['LON1']
-end_lat = segments_df.iloc[-1]['LAT2']
-end_lon = segments_df.iloc[-1]['LON2']
+start_lon, start_lat = path[first_point]
+end_lon, end_lat = path[last_point]
 
-# Get actual trip metrics (already calculated from summing TIME_LAG)
-actual_duration_seconds = segments_df.iloc[0]['TOTAL_DURATION_SECONDS']
-actual_duration_minutes = round(actual_duration_seconds / 60, 2)
-actual_distance_km = segments_df.iloc[0]['TOTAL_DISTANCE_KM']
+# Trip snapped to the road network (routing/map_matcher.py), whole trips only
+matched_df = pd.DataFrame()
+if leg_info is None:
+    matched_query = f"""
+    SELECT 
+        routing_profile,
+        matched_length_km,
+        matched_duration_minutes,
+        ST_ASGEOJSON(matched_geometry) as matched_geojson
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_MATCHED
+    WHERE UID = '{uid}' AND TID = '{tid}'
+    """
+    matched_df = session.sql(matched_query, panel="Matched Trip").to_pandas()
+
+if not matched_df.empty:
+    actual_distance_km = round(matched_df['MATCHED_LENGTH_KM'].iloc[0], 2)
 
 st.divider()
 
@@ -209,7 +231,19 @@ with col2:
     st.write("**Actual GPS Trajectory**")
     st.write(f"Distance: {actual_distance_km} km")
     st.write(f"Duration: {actual_duration_minutes} min")
-    st.write(f"Segments: {len(segments_df)}")
+    st.write(f"Points: {last_point - first_point + 1}")
+    if not matched_df.empty:
+        st.caption(f"Distance matched to the {matched_df['ROUTING_PROFILE'].iloc[0]} road network")
+    else:
+        st.caption("Distance from recorded GPS speeds")
+
+if len(legs_df) > 1:
+    st.write("**Trip Legs**")
+    st.dataframe(
+        legs_df[['LEG_NO', 'TRANSPORTATION_MODE', 'POINT_COUNT', 'DURATION_MINUTES', 'LENGTH_KM', 'AVG_SPEED']],
+        use_container_width=True,
+        hide_index=True
+    )
 
 # Calculate ORS route automatically
 with st.spinner("Calculating OpenRouteService route..."):
@@ -230,7 +264,7 @@ with st.spinner("Calculating OpenRouteService route..."):
         FROM result
         """
         
-        ors_result = session.sql(ors_query).to_pandas()
+        ors_result = session.sql(ors_query, panel="ORS Route").to_pandas()
         
         if not ors_result.empty:
             st.session_state['ors_result'] = ors_result
@@ -319,15 +353,17 @@ elif max_diff < 2.0:
 else:
     zoom_level = 7
 
-# Prepare segment data for PathLayer with color coding
+# One path per run of segments in the same speed bucket
 segment_paths = []
-for _, row in segments_df.iterrows():
-    segment_paths.append({
-        "path": [[row['LON1'], row['LAT1']], [row['LON2'], row['LAT2']]],
-        "color": eval(row['COLOR']),  # Convert string representation to list
-        "speed": row['AVG_SPEED'],
-        "tooltip": f"Actual route - Speed: {row['AVG_SPEED']:.1f} km/h"
-    })
+for i, (break_point, bucket) in enumerate(speed_breaks):
+    next_break = speed_breaks[i + 1][0] if i + 1 < len(speed_breaks) else len(path) - 1
+    run_start, run_end = max(break_point, first_point), min(next_break, last_point)
+    if run_start < run_end:
+        segment_paths.append({
+            "path": path[run_start:run_end + 1],
+            "color": SPEED_COLORS[bucket],
+            "tooltip": f"Actual route - Speed: {SPEED_LABELS[bucket]}"
+        })
 
 # Create layers
 layers = [
@@ -361,6 +397,24 @@ layers = [
     ),
 ]
 
+# Add map-matched trip if available
+if not matched_df.empty:
+    matched_geojson = json.loads(matched_df['MATCHED_GEOJSON'].iloc[0])
+    layers.append(
+        pdk.Layer(
+            "PathLayer",
+            data=[{
+                "path": matched_geojson['coordinates'],
+                "tooltip": "Map-matched trip"
+            }],
+            get_path="path",
+            get_color=[150, 0, 200, 180],  # Purple for the matched trip
+            get_width=3,
+            width_min_pixels=2,
+            pickable=True,
+        )
+    )
+
 # Add ORS route if calculated
 if 'ors_calculated' in st.session_state and st.session_state['ors_calculated']:
     try:
@@ -369,7 +423,6 @@ if 'ors_calculated' in st.session_state and st.session_state['ors_calculated']:
         
         # Parse if it's a string
         if isinstance(geometry_geojson, str):
-            import json
             geometry_geojson = json.loads(geometry_geojson)
         
         if 'coordinates' in geometry_geojson:
@@ -418,6 +471,7 @@ st.markdown("""
   - 🟡 **Yellow**: 10-30 km/h (slow)
   - 🟢 **Green**: < 10 km/h (very slow)
 - 🔵 **Blue Line**: OpenRouteService calculated route
+- 🟣 **Purple Line**: Trip matched to the road network (when available)
 - 🟢 **Green Marker**: Trip start point
 - 🔴 **Red Marker**: Trip end point
 """)
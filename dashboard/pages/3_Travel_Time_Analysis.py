@@ -1,15 +1,18 @@
+import math
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
 from snowflake.snowpark.context import get_active_session
 
+from query_log import cache_data, instrument
+
 st.set_page_config(
     page_title="Travel Time Analysis - Fleet Analytics",
     page_icon="🗺️",
     layout="wide"
 )
 
-session = get_active_session()
+session = instrument(get_active_session(), page="Travel Time Analysis")
 
 st.title("🗺️ Travel Time Analysis")
 st.markdown("Explore e-bike travel times from any hexagon to its nearest neighbors (San Francisco)")
@@ -43,7 +46,7 @@ def get_color_for_time(minutes):
     return color_stops[-1][1]
 
 # Helper function to calculate k-ring neighbors using Snowflake H3 functions
-@st.cache_data
+@cache_data
 def get_k_ring_neighbors(hex_id, k):
     """Get all hexagons within k rings using Snowflake's H3_GRID_DISK function"""
     query = f"""
@@ -67,7 +70,7 @@ def get_k_ring_neighbors(hex_id, k):
     return neighbors, hex_to_ring
 
 # Query available hexagons
-@st.cache_data
+@cache_data
 def get_available_hexagons():
     """Get list of all SF hexagons"""
     query = """
@@ -81,6 +84,29 @@ def get_available_hexagons():
     df = session.sql(query).to_pandas()
     return df
 
+# Resolution pyramid: level 0 is the matrix itself, level N is N resolutions coarser
+MAX_PYRAMID_LEVEL = 2
+POLYGON_BUDGET = 1500
+
+def hexagons_in_rings(k):
+    """Number of hexagons within k rings (including the origin)"""
+    return 3 * k * (k + 1) + 1
+
+def pick_pyramid_level(k):
+    """Coarsest level needed to keep the rendered hexagon count within budget"""
+    for level in range(MAX_PYRAMID_LEVEL + 1):
+        if hexagons_in_rings(k) / 7 ** level <= POLYGON_BUDGET:
+            return level
+    return MAX_PYRAMID_LEVEL
+
+def rings_at_level(k, level):
+    """Rings covering the same distance at a coarser level (edge length grows ~sqrt(7)x)"""
+    return max(1, math.ceil(k / math.sqrt(7) ** level))
+
+def zoom_for_rings(k):
+    """Map zoom that fits k rings around the origin"""
+    return max(9, min(13, round(14 - math.log2(k + 1) * 0.75)))
+
 # Load available hexagons
 with st.spinner("Loading hexagons..."):
     hexagons_df = get_available_hexagons()
@@ -104,6 +130,24 @@ k_rings = st.sidebar.slider(
     help="Number of hexagon rings to visualize (Ring 1 = 6 neighbors, Ring 10 = ~331 hexagons, Ring 50 = ~7,651 hexagons)"
 )
 
+detail_options = {
+    "Auto": None,
+    "Full resolution": 0,
+    "Coarse (1 level up)": 1,
+    "Coarser (2 levels up)": 2,
+}
+
+selected_detail = st.sidebar.selectbox(
+    "Map Detail",
+    list(detail_options.keys()),
+    index=0,
+    help=f"Auto keeps the map under ~{POLYGON_BUDGET:,} hexagons by switching to parent-resolution aggregates"
+)
+
+pyramid_level = detail_options[selected_detail]
+if pyramid_level is None:
+    pyramid_level = pick_pyramid_level(k_rings)
+
 st.sidebar.divider()
 
 # Color legend
@@ -118,13 +162,8 @@ st.sidebar.markdown("🔴 **18-21 min** - Far")
 st.sidebar.markdown("🔴 **21-24 min** - Very far")
 st.sidebar.markdown("🔴 **24+ min** - Distant")
 
-# Get k-ring neighbors
-neighbors, hex_to_ring = get_k_ring_neighbors(selected_hex, k_rings)
-
-st.info(f"**Selected Hexagon:** `{selected_hex}` | **Analyzing {len(neighbors)} hexagons** (1 origin + {len(neighbors)-1} neighbors across {k_rings} rings)")
-
 # Query travel times
-@st.cache_data
+@cache_data
 def get_travel_times(origin_hex, neighbor_hexes):
     """Get travel times from origin to all neighbors"""
     # Create a temporary table or use array for IN clause
@@ -152,25 +191,75 @@ def get_travel_times(origin_hex, neighbor_hexes):
     df = session.sql(query).to_pandas()
     return df
 
-# Load travel times
-with st.spinner("Loading travel times..."):
-    travel_times_df = get_travel_times(selected_hex, neighbors)
+# Query aggregated travel times from the resolution pyramid
+@cache_data
+def get_pyramid_travel_times(origin_hex, k, level):
+    """Get parent-cell travel times within k rings of the origin's parent at a pyramid level"""
+    query = f"""
+    WITH origin AS (
+        SELECT H3_CELL_TO_PARENT('{origin_hex}', H3_GET_RESOLUTION('{origin_hex}') - {level}) AS cell
+    )
+    SELECT 
+        p.ORIGIN_HEX,
+        p.DEST_HEX,
+        p.MEDIAN_DISTANCE_KM AS DISTANCE_KM,
+        p.MEDIAN_DURATION_MINUTES AS DURATION_MINUTES,
+        p.MIN_DURATION_MINUTES,
+        p.PAIR_COUNT,
+        ST_Y(H3_CELL_TO_POINT(p.DEST_HEX)) AS DEST_LAT,
+        ST_X(H3_CELL_TO_POINT(p.DEST_HEX)) AS DEST_LON,
+        H3_GRID_DISTANCE(p.ORIGIN_HEX, p.DEST_HEX) AS RING
+    FROM FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_PYRAMID p
+    JOIN origin o
+        ON p.ORIGIN_HEX = o.cell
+    WHERE p.LEVEL = {level}
+        AND H3_GRID_DISTANCE(p.ORIGIN_HEX, p.DEST_HEX) <= {k}
+    """
+    
+    df = session.sql(query).to_pandas()
+    return df
 
-# Add origin hexagon itself with 0 travel time
 origin_row = hexagons_df[hexagons_df['HEX_ID'] == selected_hex].copy()
-origin_row['ORIGIN_HEX'] = selected_hex
-origin_row['DEST_HEX'] = selected_hex
-origin_row['DISTANCE_KM'] = 0.0
-origin_row['DURATION_MINUTES'] = 0.0
-origin_row['ORIGIN_LAT'] = origin_row['LATITUDE']
-origin_row['ORIGIN_LON'] = origin_row['LONGITUDE']
-origin_row['DEST_LAT'] = origin_row['LATITUDE']
-origin_row['DEST_LON'] = origin_row['LONGITUDE']
-
-travel_times_df = pd.concat([travel_times_df, origin_row[['ORIGIN_HEX', 'DEST_HEX', 'DISTANCE_KM', 'DURATION_MINUTES', 'ORIGIN_LAT', 'ORIGIN_LON', 'DEST_LAT', 'DEST_LON']]], ignore_index=True)
 
-# Add ring information to dataframe
-travel_times_df['RING'] = travel_times_df['DEST_HEX'].map(hex_to_ring)
+if pyramid_level == 0:
+    # Get k-ring neighbors
+    neighbors, hex_to_ring = get_k_ring_neighbors(selected_hex, k_rings)
+    
+    st.info(f"**Selected Hexagon:** `{selected_hex}` | **Analyzing {len(neighbors)} hexagons** (1 origin + {len(neighbors)-1} neighbors across {k_rings} rings)")
+    
+    # Load travel times
+    with st.spinner("Loading travel times..."):
+        travel_times_df = get_travel_times(selected_hex, neighbors)
+    
+    # Add origin hexagon itself with 0 travel time
+    origin_row['ORIGIN_HEX'] = selected_hex
+    origin_row['DEST_HEX'] = selected_hex
+    origin_row['DISTANCE_KM'] = 0.0
+    origin_row['DURATION_MINUTES'] = 0.0
+    origin_row['ORIGIN_LAT'] = origin_row['LATITUDE']
+    origin_row['ORIGIN_LON'] = origin_row['LONGITUDE']
+    origin_row['DEST_LAT'] = origin_row['LATITUDE']
+    origin_row['DEST_LON'] = origin_row['LONGITUDE']
+    
+    travel_times_df = pd.concat([travel_times_df, origin_row[['ORIGIN_HEX', 'DEST_HEX', 'DISTANCE_KM', 'DURATION_MINUTES', 'ORIGIN_LAT', 'ORIGIN_LON', 'DEST_LAT', 'DEST_LON']]], ignore_index=True)
+    
+    # Add ring information to dataframe
+    travel_times_df['RING'] = travel_times_df['DEST_HEX'].map(hex_to_ring)
+    
+    origin_cell = selected_hex
+else:
+    level_rings = rings_at_level(k_rings, pyramid_level)
+    
+    with st.spinner("Loading aggregated travel times..."):
+        travel_times_df = get_pyramid_travel_times(selected_hex, level_rings, pyramid_level)
+    
+    if travel_times_df.empty:
+        st.warning("No aggregated travel times found. Run the SF_TRAVEL_TIME_PYRAMID step of the ETL first.")
+        st.stop()
+    
+    origin_cell = travel_times_df['ORIGIN_HEX'].iloc[0]
+    
+    st.info(f"**Selected Hexagon:** `{selected_hex}` | **Showing {len(travel_times_df)} parent hexagons** ({pyramid_level} level(s) coarser, {level_rings} rings ≈ {k_rings} base rings) - values are medians over all hexagon pairs in each parent")
 
 # Add color based on travel time
 travel_times_df['COLOR'] = travel_times_df['DURATION_MINUTES'].apply(get_color_for_time)
@@ -187,21 +276,21 @@ with col1:
     )
 
 with col2:
-    avg_time = travel_times_df[travel_times_df['DEST_HEX'] != selected_hex]['DURATION_MINUTES'].mean()
+    avg_time = travel_times_df[travel_times_df['DEST_HEX'] != origin_cell]['DURATION_MINUTES'].mean()
     st.metric(
         "Avg Travel Time",
         f"{avg_time:.1f} min"
     )
 
 with col3:
-    max_time = travel_times_df[travel_times_df['DEST_HEX'] != selected_hex]['DURATION_MINUTES'].max()
+    max_time = travel_times_df[travel_times_df['DEST_HEX'] != origin_cell]['DURATION_MINUTES'].max()
     st.metric(
         "Max Travel Time",
         f"{max_time:.1f} min"
     )
 
 with col4:
-    avg_dist = travel_times_df[travel_times_df['DEST_HEX'] != selected_hex]['DISTANCE_KM'].mean()
+    avg_dist = travel_times_df[travel_times_df['DEST_HEX'] != origin_cell]['DISTANCE_KM'].mean()
     st.metric(
         "Avg Distance",
         f"{avg_dist:.1f} km"
@@ -210,7 +299,7 @@ with col4:
 # Statistics by ring
 st.subheader("📈 Travel Time by Ring")
 
-ring_stats = travel_times_df[travel_times_df['DEST_HEX'] != selected_hex].groupby('RING').agg({
+ring_stats = travel_times_df[travel_times_df['DEST_HEX'] != origin_cell].groupby('RING').agg({
     'DURATION_MINUTES': ['min', 'mean', 'max', 'count'],
     'DISTANCE_KM': 'mean'
 }).round(1)
@@ -261,7 +350,7 @@ center_lon = origin_row['LONGITUDE'].iloc[0]
 view_state = pdk.ViewState(
     latitude=center_lat,
     longitude=center_lon,
-    zoom=11,
+    zoom=zoom_for_rings(k_rings),
     pitch=0,
     bearing=0
 )
@@ -293,7 +382,7 @@ st.pydeck_chart(deck, use_container_width=True)
 
 # Detailed data table
 with st.expander("📋 View Detailed Data"):
-    detailed_data = travel_times_df[travel_times_df['DEST_HEX'] != selected_hex][
+    detailed_data = travel_times_df[travel_times_df['DEST_HEX'] != origin_cell][
         ['DEST_HEX', 'RING', 'DURATION_MINUTES', 'DISTANCE_KM', 'DEST_LAT', 'DEST_LON']
     ].copy()
     detailed_data = detailed_data.sort_values(['RING', 'DURATION_MINUTES'])
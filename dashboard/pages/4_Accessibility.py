@@ -0,0 +1,209 @@
+import streamlit as st
+import pandas as pd
+import pydeck as pdk
+from snowflake.snowpark.context import get_active_session
+
+from query_log import cache_data, instrument
+
+st.set_page_config(
+    page_title="Accessibility - Fleet Analytics",
+    page_icon="🗺️",
+    layout="wide"
+)
+
+session = instrument(get_active_session(), page="Accessibility")
+
+st.title("🗺️ Accessibility Surface")
+st.markdown("How many hexagons can be reached by e-bike from every hexagon in San Francisco")
+
+# Metric options: (column, label, higher_is_better)
+metric_options = {
+    "Reachable within 5 min": ("REACHABLE_5_MIN", "hexagons", True),
+    "Reachable within 10 min": ("REACHABLE_10_MIN", "hexagons", True),
+    "Reachable within 15 min": ("REACHABLE_15_MIN", "hexagons", True),
+    "Median travel time": ("MEDIAN_DURATION_MINUTES", "min", False),
+}
+
+# Color stops from poorly served (red) to well served (green)
+color_stops = [
+    [178, 34, 34, 200],    # Dark red
+    [255, 69, 0, 200],     # Orange-red
+    [255, 165, 0, 200],    # Orange
+    [255, 215, 0, 200],    # Gold
+    [154, 205, 50, 200],   # Yellow-green
+    [50, 205, 50, 200],    # Lime green
+    [34, 139, 34, 200],    # Dark green
+]
+
+@cache_data(ttl=3600)
+def get_accessibility():
+    """Get the precomputed accessibility surface for all SF hexagons"""
+    query = """
+    SELECT
+        HEX_ID,
+        LATITUDE,
+        LONGITUDE,
+        REACHABLE_5_MIN,
+        REACHABLE_10_MIN,
+        REACHABLE_15_MIN,
+        MEDIAN_DURATION_MINUTES,
+        DESTINATION_COUNT
+    FROM FLEET_DEMOS.ROUTING.SF_ACCESSIBILITY
+    """
+    return session.sql(query).to_pandas()
+
+def get_colors(values, higher_is_better):
+    """Map values to color stops by percentile rank (robust to outliers)"""
+    ranks = values.rank(pct=True)
+    if not higher_is_better:
+        ranks = 1 - ranks
+    buckets = (ranks * (len(color_stops) - 1)).round()
+    return [
+        color_stops[int(b)] if not pd.isna(b) else [128, 128, 128, 180]
+        for b in buckets
+    ]
+
+with st.spinner("Loading accessibility surface..."):
+    accessibility_df = get_accessibility()
+
+if accessibility_df.empty:
+    st.warning("No accessibility data found. Run the SF_ACCESSIBILITY step of the ETL first.")
+    st.stop()
+
+st.sidebar.header("Settings")
+
+selected_metric = st.sidebar.selectbox(
+    "Metric",
+    list(metric_options.keys()),
+    index=1,
+    help="Metric used to color the hexagons"
+)
+
+worst_n = st.sidebar.slider(
+    "Poorly Served Hexagons to List",
+    min_value=10,
+    max_value=200,
+    value=25,
+    step=5
+)
+
+st.sidebar.divider()
+
+st.sidebar.markdown("### Color Legend")
+st.sidebar.markdown("🟢 **Green** - Best served (top percentiles)")
+st.sidebar.markdown("🟡 **Yellow** - Average")
+st.sidebar.markdown("🔴 **Red** - Poorly served (bottom percentiles)")
+st.sidebar.markdown("⚪ **Gray** - No routed destinations")
+
+metric_column, metric_unit, higher_is_better = metric_options[selected_metric]
+
+map_data = accessibility_df.copy()
+map_data['COLOR'] = get_colors(map_data[metric_column], higher_is_better)
+
+# Summary statistics
+st.subheader("📊 City-wide Summary")
+
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric(
+        "Hexagons",
+        f"{len(map_data):,}"
+    )
+
+with col2:
+    st.metric(
+        "Median Reachable (10 min)",
+        f"{map_data['REACHABLE_10_MIN'].median():,.0f}"
+    )
+
+with col3:
+    st.metric(
+        "Median Travel Time",
+        f"{map_data['MEDIAN_DURATION_MINUTES'].median():.1f} min"
+    )
+
+with col4:
+    st.metric(
+        "Hexagons Without Routes",
+        f"{(map_data['DESTINATION_COUNT'] == 0).sum():,}"
+    )
+
+# Map visualization
+st.subheader("🗺️ Accessibility Map")
+
+map_data = map_data.rename(columns={
+    'HEX_ID': 'hex',
+    'REACHABLE_5_MIN': 'r5',
+    'REACHABLE_10_MIN': 'r10',
+    'REACHABLE_15_MIN': 'r15',
+    'MEDIAN_DURATION_MINUTES': 'median_time'
+})
+
+h3_layer = pdk.Layer(
+    'H3HexagonLayer',
+    map_data[['hex', 'r5', 'r10', 'r15', 'median_time', 'COLOR']],
+    get_hexagon='hex',
+    get_fill_color='COLOR',
+    opacity=0.7,
+    pickable=True,
+    stroked=False,
+    filled=True,
+    extruded=False,
+    auto_highlight=True
+)
+
+view_state = pdk.ViewState(
+    latitude=accessibility_df['LATITUDE'].mean(),
+    longitude=accessibility_df['LONGITUDE'].mean(),
+    zoom=11,
+    pitch=0,
+    bearing=0
+)
+
+tooltip = {
+    "html": """
+    <b>Hexagon:</b> {hex}<br/>
+    <b>Within 5 min:</b> {r5}<br/>
+    <b>Within 10 min:</b> {r10}<br/>
+    <b>Within 15 min:</b> {r15}<br/>
+    <b>Median Time:</b> {median_time} min
+    """,
+    "style": {
+        "backgroundColor": "steelblue",
+        "color": "white",
+        "padding": "10px"
+    }
+}
+
+deck = pdk.Deck(
+    layers=[h3_layer],
+    initial_view_state=view_state,
+    tooltip=tooltip,
+    map_style='light'
+)
+
+st.pydeck_chart(deck, use_container_width=True)
+
+# Poorly served areas
+st.subheader("⚠️ Poorly Served Hexagons")
+
+worst_df = accessibility_df.sort_values(
+    metric_column,
+    ascending=higher_is_better
+).head(worst_n)[
+    ['HEX_ID', 'REACHABLE_5_MIN', 'REACHABLE_10_MIN', 'REACHABLE_15_MIN',
+     'MEDIAN_DURATION_MINUTES', 'LATITUDE', 'LONGITUDE']
+]
+worst_df.columns = ['Hexagon', 'Within 5 min', 'Within 10 min', 'Within 15 min',
+                    'Median Time (min)', 'Latitude', 'Longitude']
+
+st.dataframe(
+    worst_df,
+    use_container_width=True,
+    hide_index=True
+)
+
+st.divider()
+
+st.caption("💡 **Tip:** Use the Travel Time Analysis page to drill into a single poorly served hexagon.")
@@ -0,0 +1,181 @@
+import streamlit as st
+import pandas as pd
+import pydeck as pdk
+from snowflake.snowpark.context import get_active_session
+
+from query_log import cache_data, instrument
+from tile_format import decode, tile_path, to_lon_lat, visible_tiles
+
+st.set_page_config(
+    page_title="Fleet Map - Fleet Analytics",
+    page_icon="🛰️",
+    layout="wide"
+)
+
+session = instrument(get_active_session(), page="Fleet Map")
+
+st.title("🛰️ Fleet Map")
+st.markdown("All GeoLife trips, loaded tile by tile for the visible map area")
+
+TILE_STAGE = "FLEET_DEMOS.ROUTING.GEOLIFE_TILES"
+TILE_INDEX = "FLEET_DEMOS.ROUTING.GEOLIFE_TILE_INDEX"
+
+# Size of the map in screen pixels (st.pydeck_chart is 500 px high); it decides how many tiles are in view
+MAP_WIDTH_PX = 1200
+MAP_HEIGHT_PX = 500
+
+SPEED_COLORS = {
+    0: [0, 255, 0, 160],    # Green for < 10 km/h
+    1: [255, 255, 0, 160],  # Yellow for 10-30 km/h
+    2: [255, 165, 0, 160],  # Orange for 30-60 km/h
+    3: [255, 0, 0, 160],    # Red for > 60 km/h
+}
+SPEED_LABELS = {0: "< 10 km/h", 1: "10-30 km/h", 2: "30-60 km/h", 3: "> 60 km/h"}
+
+@cache_data(ttl=3600)
+def get_zoom_levels():
+    """Get the zoom levels exported by routing/tile_export.py"""
+    query = f"SELECT DISTINCT ZOOM FROM {TILE_INDEX} ORDER BY ZOOM"
+    return session.sql(query, panel="Zoom Levels").to_pandas()["ZOOM"].astype(int).tolist()
+
+@cache_data(ttl=3600)
+def get_areas():
+    """Get the countries with trips and the median start point of their trips"""
+    query = """
+    SELECT
+        country_name,
+        COUNT(*) as trip_count,
+        MEDIAN(start_lat) as center_lat,
+        MEDIAN(start_lng) as center_lng
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+    WHERE country_name IS NOT NULL
+    GROUP BY country_name
+    ORDER BY trip_count DESC
+    """
+    return session.sql(query, panel="Areas").to_pandas()
+
+@cache_data(ttl=3600, max_entries=512)
+def get_tile(zoom, x, y):
+    """Get the compressed bytes of one tile from the stage"""
+    return session.file.get_stream(f"@{TILE_STAGE}/{tile_path(zoom, x, y)}").read()
+
+zoom_levels = get_zoom_levels()
+if not zoom_levels:
+    st.warning("No tiles exported yet. Run `python routing/tile_export.py` first.")
+    st.stop()
+
+areas_df = get_areas()
+
+with st.sidebar:
+    st.header("Map View")
+
+    area = st.selectbox(
+        "Area",
+        options=areas_df["COUNTRY_NAME"].tolist(),
+        format_func=lambda name: f"{name} ({areas_df.set_index('COUNTRY_NAME').loc[name, 'TRIP_COUNT']:,} trips)"
+    )
+    area_row = areas_df[areas_df["COUNTRY_NAME"] == area].iloc[0]
+
+    # Keyed by area, so picking another area recenters the map
+    center_lat = st.number_input(
+        "Center latitude", min_value=-85.0, max_value=85.0,
+        value=round(float(area_row["CENTER_LAT"]), 4), step=0.01, format="%.4f",
+        key=f"center_lat_{area}"
+    )
+    center_lng = st.number_input(
+        "Center longitude", min_value=-180.0, max_value=180.0,
+        value=round(float(area_row["CENTER_LNG"]), 4), step=0.01, format="%.4f",
+        key=f"center_lng_{area}"
+    )
+    zoom = st.select_slider(
+        "Zoom",
+        options=zoom_levels,
+        value=min(zoom_levels, key=lambda level: abs(level - 11))
+    )
+
+    selected_buckets = st.multiselect(
+        "Speeds",
+        options=list(SPEED_LABELS),
+        default=list(SPEED_LABELS),
+        format_func=SPEED_LABELS.get
+    )
+
+    st.caption("Tiles outside the view are not loaded; move the center or zoom to load others.")
+
+# Only tiles in view that were exported (empty ocean tiles have no file)
+tiles_in_view = visible_tiles(center_lng, center_lat, zoom, MAP_WIDTH_PX, MAP_HEIGHT_PX)
+x_list = ", ".join(str(x) for x in sorted({x for x, _ in tiles_in_view}))
+tile_query = f"""
+SELECT
+    TILE_X,
+    TILE_Y,
+    FEATURE_COUNT,
+    POINT_COUNT,
+    TILE_BYTES
+FROM {TILE_INDEX}
+WHERE ZOOM = {zoom}
+    AND TILE_X IN ({x_list})
+    AND TILE_Y BETWEEN {min(y for _, y in tiles_in_view)} AND {max(y for _, y in tiles_in_view)}
+"""
+tile_df = session.sql(tile_query, panel="Visible Tiles").to_pandas()
+
+paths = []
+for tile in tile_df.itertuples():
+    tile_x, tile_y = int(tile.TILE_X), int(tile.TILE_Y)
+    _, _, _, features = decode(get_tile(zoom, tile_x, tile_y))
+    for bucket, avg_speed, points in features:
+        if bucket not in selected_buckets:
+            continue
+        paths.append({
+            "path": [to_lon_lat(zoom, tile_x, tile_y, point) for point in points],
+            "color": SPEED_COLORS[bucket],
+            "tooltip": f"{SPEED_LABELS[bucket]} - avg {avg_speed} km/h"
+        })
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Tiles Loaded", f"{len(tile_df):,} of {len(tiles_in_view):,} in view")
+with col2:
+    st.metric("Paths", f"{len(paths):,}")
+with col3:
+    st.metric("Points", f"{int(tile_df['POINT_COUNT'].sum()):,}")
+with col4:
+    st.metric("Tile Data", f"{tile_df['TILE_BYTES'].sum() / 1024:,.0f} KB")
+
+path_layer = pdk.Layer(
+    'PathLayer',
+    pd.DataFrame(paths, columns=["path", "color", "tooltip"]),
+    get_path='path',
+    get_color='color',
+    width_min_pixels=1,
+    width_max_pixels=3,
+    get_width=2,
+    pickable=True
+)
+
+view_state = pdk.ViewState(
+    latitude=center_lat,
+    longitude=center_lng,
+    zoom=zoom,
+    pitch=0
+)
+
+deck = pdk.Deck(
+    layers=[path_layer],
+    initial_view_state=view_state,
+    map_style='light',
+    tooltip={"text": "{tooltip}"}
+)
+
+st.pydeck_chart(deck, use_container_width=True)
+
+# Legend
+st.markdown("""
+**Legend:**
+- **Speed Color Coding** (average speed of each path piece):
+  - 🔴 **Red**: > 60 km/h (fast)
+  - 🟠 **Orange**: 30-60 km/h (medium)
+  - 🟡 **Yellow**: 10-30 km/h (slow)
+  - 🟢 **Green**: < 10 km/h (very slow)
+- Paths are simplified to about one point per screen pixel at the selected zoom
+""")
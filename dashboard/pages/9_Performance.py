@@ -0,0 +1,119 @@
+import streamlit as st
+import pandas as pd
+from snowflake.snowpark.context import get_active_session
+
+from query_log import EVENT_TABLE, LOGGER_NAME, cache_stats, instrument, recent_queries
+
+st.set_page_config(
+    page_title="Performance - Fleet Analytics",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+session = instrument(get_active_session(), page="Performance")
+
+st.title("⏱️ Query Performance")
+st.markdown("Slowest panels and cache hit rates, to pick the next queries to optimize")
+
+queries_df = pd.DataFrame(recent_queries())
+queries_df = queries_df[queries_df['page'] != "Performance"] if not queries_df.empty else queries_df
+
+st.subheader("Slowest Panels (this app server)")
+
+if queries_df.empty:
+    st.info("No queries recorded yet - open the other pages first")
+else:
+    panels_df = queries_df.groupby(['page', 'panel']).agg(
+        runs=('seconds', 'size'),
+        p50_seconds=('seconds', 'median'),
+        p95_seconds=('seconds', lambda s: s.quantile(0.95)),
+        max_seconds=('seconds', 'max'),
+        total_seconds=('seconds', 'sum'),
+        avg_rows=('rows', 'mean'),
+        avg_mb=('bytes', lambda b: b.mean() / 2 ** 20),
+        errors=('error', lambda e: e.notna().sum()),
+    ).reset_index().sort_values('p95_seconds', ascending=False)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Queries", f"{len(queries_df):,}")
+    with col2:
+        st.metric("Total Query Time", f"{queries_df['seconds'].sum():,.1f} s")
+    with col3:
+        st.metric("Slowest Panel (p95)", f"{panels_df['p95_seconds'].iloc[0]:.2f} s")
+
+    st.dataframe(
+        panels_df.round({'p50_seconds': 3, 'p95_seconds': 3, 'max_seconds': 3, 'total_seconds': 2, 'avg_rows': 0, 'avg_mb': 2}),
+        use_container_width=True,
+        hide_index=True
+    )
+
+st.subheader("Cache Hit Rates")
+
+stats = cache_stats()
+if not stats:
+    st.info("No cached panels called yet")
+else:
+    cache_df = pd.DataFrame([
+        {
+            'page': page,
+            'panel': panel,
+            'calls': counts['calls'],
+            'misses': counts['misses'],
+            'hit_rate': 100 * (1 - counts['misses'] / counts['calls']) if counts['calls'] else None,
+        }
+        for (page, panel), counts in stats.items()
+    ]).sort_values('hit_rate')
+
+    st.dataframe(
+        cache_df,
+        column_config={'hit_rate': st.column_config.ProgressColumn("Hit Rate", min_value=0, max_value=100, format="%.0f%%")},
+        use_container_width=True,
+        hide_index=True
+    )
+
+if not queries_df.empty:
+    with st.expander("🐢 Slowest Queries"):
+        slowest_df = queries_df.sort_values('seconds', ascending=False).head(20)
+        st.dataframe(
+            slowest_df[['page', 'panel', 'seconds', 'rows', 'bytes', 'query']],
+            use_container_width=True,
+            hide_index=True
+        )
+
+st.divider()
+
+st.subheader("History (event table, last 7 days)")
+st.caption(f"Query logs of all app servers and the Profile Manager, from `{EVENT_TABLE}`")
+
+history_query = f"""
+WITH logs AS (
+    SELECT TRY_PARSE_JSON(VALUE::STRING) AS entry
+    FROM {EVENT_TABLE}
+    WHERE RECORD_TYPE = 'LOG'
+        AND SCOPE:name::STRING = '{LOGGER_NAME}'
+        AND TIMESTAMP >= DATEADD(day, -7, CURRENT_TIMESTAMP())
+)
+SELECT
+    entry:page::STRING AS page,
+    entry:panel::STRING AS panel,
+    COUNT(*) AS runs,
+    ROUND(MEDIAN(entry:seconds::FLOAT), 3) AS p50_seconds,
+    ROUND(APPROX_PERCENTILE(entry:seconds::FLOAT, 0.95), 3) AS p95_seconds,
+    ROUND(AVG(entry:rows::NUMBER), 0) AS avg_rows,
+    COUNT_IF(entry:error IS NOT NULL AND NOT IS_NULL_VALUE(entry:error)) AS errors
+FROM logs
+WHERE entry IS NOT NULL
+GROUP BY page, panel
+ORDER BY p95_seconds DESC
+LIMIT 50
+"""
+
+try:
+    history_df = session.sql(history_query, panel="Event Table History").to_pandas()
+    if history_df.empty:
+        st.info("No query logs in the event table yet")
+    else:
+        st.dataframe(history_df, use_container_width=True, hide_index=True)
+except Exception as e:
+    st.info(f"Event table not available ({e}). Set an event table for the account to keep query history.")
@@ -0,0 +1,57 @@
+"""Google encoded polylines for trip geometries
+
+GEOLIFE_TRIPS.TRIP_POLYLINE holds every point of a trip in this format
+(5 decimals, ~1 m), written by the ENCODE_POLYLINE UDF in etl.sql; the
+benchmark database build checks decode() against that UDF. Coordinates
+are [lon, lat] pairs like GeoJSON, while the encoded text is lat/lon as
+in the Google format.
+
+    path = decode(trip['TRIP_POLYLINE'])
+"""
+PRECISION = 5
+
+
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+def encode(coordinates, precision=PRECISION):
+    """Encode a list of [lon, lat] pairs"""
+    factor = 10 ** precision
+    result = []
+    prev_lat, prev_lon = 0, 0
+    for lon, lat in coordinates:
+        lat, lon = int(round(lat * factor)), int(round(lon * factor))
+        result.append(_encode_value(lat - prev_lat))
+        result.append(_encode_value(lon - prev_lon))
+        prev_lat, prev_lon = lat, lon
+    return ''.join(result)
+
+
+def decode(text, precision=PRECISION):
+    """Decode an encoded polyline into a list of [lon, lat] pairs"""
+    factor = 10 ** precision
+    coordinates = []
+    index, lat, lon = 0, 0, 0
+    while index < len(text):
+        deltas = []
+        for _ in range(2):
+            shift, value = 0, 0
+            while True:
+                byte = ord(text[index]) - 63
+                index += 1
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coordinates.append([lon / factor, lat / factor])
+    return coordinates
@@ -253,6 +253,38 @@ WHERE d.SUBTYPE = 'country'
 AND d.class = 'land';
 
 
+-- ============================================================
+-- Country H3 Index
+-- ============================================================
+-- Purpose: Attribute features to countries with an equi-join instead of
+--          testing every feature against every country polygon
+-- Source: FLEET_DEMOS.ROUTING.COUNTRIES
+-- Target: FLEET_DEMOS.ROUTING.COUNTRY_H3_CELLS
+--
+-- Index Strategy:
+--   - H3_COVERAGE lists the resolution 4 cells (~1,770 km2) touching each
+--     country; cells on a border appear once per country
+--   - is_interior: cell lies completely inside the country, so features
+--     in it need no exact ST_INTERSECTS test
+--
+-- Usage:
+--   JOIN COUNTRY_H3_CELLS h
+--       ON h.h3_cell = H3_POINT_TO_CELL(ST_CENTROID(feature.geometry), 4)
+--   then ST_INTERSECTS against COUNTRIES only where NOT h.is_interior
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.COUNTRY_H3_CELLS AS
+SELECT 
+    c.id as country_id,
+    c.iso_code,
+    c.english_name,
+    cell.value::INTEGER as h3_cell,
+    ST_WITHIN(H3_CELL_TO_BOUNDARY(cell.value::INTEGER), c.geometry) as is_interior
+FROM FLEET_DEMOS.ROUTING.COUNTRIES c,
+    LATERAL FLATTEN(input => H3_COVERAGE(c.geometry, 4)) cell
+ORDER BY h3_cell;
+
+
 -- ============================================================
 -- GEOLIFE Clean Routes Table (Step 1: Cleaning)
 -- ============================================================
@@ -363,9 +395,14 @@ ORDER BY s.UID, s.TID, s.EVENT_TIMESTAMP;
 -- Method:
 --   - LEFT JOIN with COUNTRIES table using ST_WITHIN
 --   - Points outside country boundaries will have NULL country values
+--
+-- Layout:
+--   - Last rewrite of the point table; clustered by (UID, TID) so
+--     single-trip fetches read a few micro-partitions
 -- ============================================================
 
-CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN AS
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+CLUSTER BY (UID, TID) AS
 SELECT 
     g.UID,
     g.TID,
@@ -388,94 +425,513 @@ LEFT JOIN FLEET_DEMOS.ROUTING.COUNTRIES c
 ORDER BY g.UID, g.TID, g.EVENT_TIMESTAMP;
 
 
+-- Equality lookups from the dashboard filters (user, trip, country)
+ALTER TABLE FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+    ADD SEARCH OPTIMIZATION ON EQUALITY(UID, TID, COUNTRY_NAME);
+
+
+-- ============================================================
+-- Transportation Mode Rules
+-- ============================================================
+-- Purpose: Thresholds of the rule-based trip classifier
+-- Target: FLEET_DEMOS.ROUTING.MODE_RULES
+--
+-- Rule Semantics:
+--   - Rules are tried in PRIORITY order; the first one whose bounds all
+--     hold gives the trip's mode, 'unknown' if none does
+--   - min_* bounds are inclusive (>=), max_* bounds exclusive (<),
+--     NULL means unbounded
+--   - Trip speeds are rounded to 2 decimals, so a strict "> 60" is
+--     written as min 60.01
+--   - Several rows may share a mode (train_airplane is an OR of two rules)
+--
+-- Rules (based on GeoLife research):
+--   * Stationary: avg_speed < 1 km/h
+--   * Walking: avg_speed 1-6 km/h, max_speed < 15 km/h
+--   * Running: avg_speed 6-12 km/h, max_speed < 20 km/h
+--   * Cycling: avg_speed 8-25 km/h, max_speed < 45 km/h
+--   * Train/Airplane: avg_speed >= 80 km/h, or > 60 km/h with median > 80 km/h
+--   * Driving (highway): avg_speed >= 40 km/h, median >= 60 km/h
+--   * Driving (urban): avg_speed 15-80 km/h
+--
+-- Usage:
+--   - Change a threshold here, then re-run the Step 4 and Step 5
+--     UPDATEs; only the trip and leg tables are rewritten
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.MODE_RULES (
+    priority NUMBER PRIMARY KEY,
+    transportation_mode VARCHAR(30),
+    min_avg_speed FLOAT,
+    max_avg_speed FLOAT,
+    max_max_speed FLOAT,
+    min_median_speed FLOAT
+) AS
+SELECT * FROM VALUES
+    (1, 'stationary', NULL, 1, NULL, NULL),
+    (2, 'walking', 1, 6, 15, NULL),
+    (3, 'running', 6, 12, 20, NULL),
+    (4, 'cycling', 8, 25, 45, NULL),
+    (5, 'train_airplane', 80, NULL, NULL, NULL),
+    (6, 'train_airplane', 60.01, NULL, NULL, 80.01),
+    (7, 'driving_highway', 40, NULL, NULL, 60),
+    (8, 'driving_urban', 15, 80, NULL, NULL)
+AS t(priority, transportation_mode, min_avg_speed, max_avg_speed, max_max_speed, min_median_speed);
+
+
+-- ============================================================
+-- Polyline Encoder
+-- ============================================================
+-- Purpose: Encode an ordered array of [lon, lat] pairs as a Google
+--          encoded polyline (5 decimals, ~1 m)
+-- Target: FLEET_DEMOS.ROUTING.ENCODE_POLYLINE
+--
+-- Notes:
+--   - Decoded by dashboard/polyline.py; the benchmark database build
+--     (dashboard/benchmark/synthetic_data.py) runs this body and fails
+--     if polyline.decode does not read its output back
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION FLEET_DEMOS.ROUTING.ENCODE_POLYLINE(coordinates ARRAY)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+HANDLER = 'encode'
+AS $$
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+def encode(coordinates):
+    if coordinates is None:
+        return None
+    result = []
+    prev_lat, prev_lon = 0, 0
+    for lon, lat in coordinates:
+        lat, lon = int(round(float(lat) * 1e5)), int(round(float(lon) * 1e5))
+        result.append(_encode_value(lat - prev_lat))
+        result.append(_encode_value(lon - prev_lon))
+        prev_lat, prev_lon = lat, lon
+    return ''.join(result)
+$$;
+
+
 -- ============================================================
--- GEOLIFE Clean Routes Table (Step 3: Transportation Mode Classification)
+-- GEOLIFE Trip Summary Table (Step 3: Trip Statistics)
 -- ============================================================
--- Purpose: Classify trips by transportation mode using rule-based approach
+-- Purpose: One row per trip with its speed statistics; the only table the
+--          mode classifier writes to
 -- Source: FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
--- Target: FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN (replaces existing)
--- 
--- Classification Strategy:
---   - Calculate trip-level speed statistics (avg, max, median, p75)
---   - Apply hierarchical rules based on GeoLife research:
---     * Stationary: avg_speed < 1 km/h
---     * Walking: avg_speed 1-6 km/h, max_speed < 15 km/h
---     * Running: avg_speed 6-12 km/h, max_speed < 20 km/h
---     * Cycling: avg_speed 8-25 km/h, max_speed < 45 km/h
---     * Driving (urban): avg_speed 15-50 km/h, median < 60 km/h
---     * Driving (highway): avg_speed > 40 km/h, median >= 60 km/h
---     * Train/Airplane: avg_speed > 80 km/h
+-- Target: FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+--
+-- Summary Strategy:
+--   - Country is the one most points of the trip fall in (MODE), so trips
+--     crossing a border are listed once
+--   - Start/end points and times from MIN_BY/MAX_BY over EVENT_TIMESTAMP
+--   - Only the statistics the rules use: avg, max and median speed of the
+--     points with SPEED >= 0
+--   - transportation_mode is filled by Step 4
+--
+-- Geometry:
+--   - trip_polyline: every point as a Google encoded polyline
+--     (ENCODE_POLYLINE), a few bytes per point instead of a row
+--   - speed_breaks: [point index, speed bucket] where the bucket of the
+--     segment starting at that point changes; buckets are the Route
+--     Comparison colors: 0 (<= 10 km/h), 1 (<= 30), 2 (<= 60), 3 (> 60),
+--     from the mean speed of the segment's two points
+--   - trip_length_km: recorded path length (sum of SPEED * TIME_LAG)
+--
+-- Layout:
+--   - Clustered by (COUNTRY_NAME, TRANSPORTATION_MODE), the filters of the
+--     Route Comparison trip selector
+--
+-- Use Cases:
+--   - Trip lists without aggregating 14M GPS points on every page load
+--   - Resolving a trip to its (UID, TID) before fetching its points
+--   - Route Comparison map from one row per trip, decoded in the app
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+CLUSTER BY (COUNTRY_NAME, TRANSPORTATION_MODE) AS
+SELECT 
+    UID,
+    TID,
+    CONCAT(UID, '-', TID) as trip_id,
+    MODE(country_code) as country_code,
+    MODE(country_name) as country_name,
+    NULL::VARCHAR(30) as transportation_mode,
+    COUNT(*) as point_count,
+    MIN(EVENT_TIMESTAMP) as start_time,
+    MAX(EVENT_TIMESTAMP) as end_time,
+    MIN_BY(LNG, EVENT_TIMESTAMP) as start_lng,
+    MIN_BY(LAT, EVENT_TIMESTAMP) as start_lat,
+    MAX_BY(LNG, EVENT_TIMESTAMP) as end_lng,
+    MAX_BY(LAT, EVENT_TIMESTAMP) as end_lat,
+    ROUND(AVG(IFF(SPEED >= 0, SPEED, NULL)), 2) as trip_avg_speed,
+    ROUND(MAX(IFF(SPEED >= 0, SPEED, NULL)), 2) as trip_max_speed,
+    ROUND(MEDIAN(IFF(SPEED >= 0, SPEED, NULL)), 2) as trip_median_speed,
+    ROUND(SUM(IFF(SPEED >= 0, SPEED * TIME_LAG / 3600, 0)), 3) as trip_length_km,
+    FLEET_DEMOS.ROUTING.ENCODE_POLYLINE(
+        ARRAY_AGG(ARRAY_CONSTRUCT(LNG, LAT)) WITHIN GROUP (ORDER BY EVENT_TIMESTAMP)
+    ) as trip_polyline,
+    ARRAY_AGG(IFF(is_bucket_start, ARRAY_CONSTRUCT(point_index, speed_bucket), NULL))
+        WITHIN GROUP (ORDER BY EVENT_TIMESTAMP) as speed_breaks
+FROM (
+    SELECT 
+        *,
+        speed_bucket IS NOT NULL
+            AND speed_bucket IS DISTINCT FROM
+                LAG(speed_bucket) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP) as is_bucket_start
+    FROM (
+        SELECT 
+            *,
+            ROW_NUMBER() OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP) - 1 as point_index,
+            CASE
+                WHEN segment_speed > 60 THEN 3
+                WHEN segment_speed > 30 THEN 2
+                WHEN segment_speed > 10 THEN 1
+                WHEN segment_speed IS NOT NULL THEN 0
+            END as speed_bucket
+        FROM (
+            SELECT 
+                *,
+                (SPEED + LEAD(SPEED) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)) / 2 as segment_speed
+            FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+        )
+    )
+)
+GROUP BY UID, TID
+ORDER BY country_name, UID, TID;
+
+
+-- ============================================================
+-- GEOLIFE Trip Classification (Step 4: Transportation Mode)
+-- ============================================================
+-- Purpose: Classify trips by transportation mode with MODE_RULES
+-- Source: FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS, FLEET_DEMOS.ROUTING.MODE_RULES
+-- Target: FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS (transportation_mode, in place)
 --
 -- Method:
---   - CTE calculates trip statistics and applies classification rules
---   - LEFT JOIN to add transportation_mode to each GPS point
+--   - Every trip is joined to the rules whose bounds hold; QUALIFY keeps
+--     the rule with the lowest priority
+--   - Only trips whose mode changes are updated, so re-running after a
+--     rule change rewrites a fraction of a ~15k row table
+--   - Points get their mode at read time through GEOLIFE_CLASSIFIED
 --
 -- References:
 --   - GeoLife GPS Trajectory Dataset (Microsoft Research)
 --   - 73 users with manual labels: walk, bike, bus, car, subway, train, airplane
 -- ============================================================
 
-CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN AS
-WITH trip_statistics AS (
+UPDATE FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS t
+SET transportation_mode = c.transportation_mode
+FROM (
+    SELECT 
+        tr.UID,
+        tr.TID,
+        COALESCE(r.transportation_mode, 'unknown') as transportation_mode
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS tr
+    LEFT JOIN FLEET_DEMOS.ROUTING.MODE_RULES r
+        ON (r.min_avg_speed IS NULL OR tr.trip_avg_speed >= r.min_avg_speed)
+        AND (r.max_avg_speed IS NULL OR tr.trip_avg_speed < r.max_avg_speed)
+        AND (r.max_max_speed IS NULL OR tr.trip_max_speed < r.max_max_speed)
+        AND (r.min_median_speed IS NULL OR tr.trip_median_speed >= r.min_median_speed)
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY tr.UID, tr.TID ORDER BY r.priority) = 1
+) c
+WHERE t.UID = c.UID
+    AND t.TID = c.TID
+    AND t.transportation_mode IS DISTINCT FROM c.transportation_mode;
+
+
+-- ============================================================
+-- GEOLIFE Classified Points View
+-- ============================================================
+-- Purpose: GPS points with their trip's mode and speed statistics
+-- Source: FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN, FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+-- Target: FLEET_DEMOS.ROUTING.GEOLIFE_CLASSIFIED
+--
+-- Notes:
+--   - Joined at read time; a mode filter selects trips first and the
+--     (UID, TID) clustering of GEOLIFE_CLEAN prunes their points
+-- ============================================================
+
+CREATE OR REPLACE VIEW FLEET_DEMOS.ROUTING.GEOLIFE_CLASSIFIED AS
+SELECT 
+    g.*,
+    t.transportation_mode,
+    t.trip_avg_speed,
+    t.trip_max_speed,
+    t.trip_median_speed
+FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN g
+LEFT JOIN FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS t
+    ON t.UID = g.UID
+    AND t.TID = g.TID;
+
+
+-- ============================================================
+-- GEOLIFE Trip Legs (Step 5: Stop and Segment Detection)
+-- ============================================================
+-- Purpose: Split trips into single-mode legs (walk -> subway -> walk)
+-- Source: FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+-- Target: FLEET_DEMOS.ROUTING.GEOLIFE_LEGS
+--
+-- Segmentation Strategy:
+--   - Speed smoothed over the 5 points before and after each point
+--   - Speed regime per point: stop (< 1 km/h), foot (1-7 km/h),
+--     cycle (7-25 km/h), motor (>= 25 km/h)
+--   - Consecutive points with the same regime form a run; runs shorter
+--     than 120 s (traffic lights, GPS noise) take the regime of the run
+--     before them (or after, at the start of a trip)
+--   - A leg starts where the filled regime changes or after a gap of
+--     more than 300 s between points (signal loss, station stop)
+--   - Leg length is the sum of SPEED * TIME_LAG within the leg
+--
+-- Method:
+--   - One scan of GEOLIFE_CLEAN; every window is partitioned by
+--     (UID, TID) ordered by EVENT_TIMESTAMP, so the points are sorted once
+--   - Gaps-and-islands: a run's start and end times are carried to its
+--     points with LAG/LEAD IGNORE NULLS of the start and end flags, and a
+--     running SUM of start flags numbers the legs
+--   - transportation_mode is filled with MODE_RULES like GEOLIFE_TRIPS
+--
+-- Layout:
+--   - Clustered by (UID, TID); a trip's legs are read with the same
+--     filter as its points, and a leg's points by its time range
+--
+-- Use Cases:
+--   - Per-leg ORS routing comparison with the leg's own profile
+--   - Multi-modal trip statistics
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GEOLIFE_LEGS
+CLUSTER BY (UID, TID) AS
+WITH smoothed AS (
     SELECT 
         UID,
         TID,
-        COUNT(*) as point_count,
-        ROUND(AVG(SPEED), 2) as avg_speed,
-        ROUND(MAX(SPEED), 2) as max_speed,
-        ROUND(MIN(SPEED), 2) as min_speed,
-        ROUND(STDDEV(SPEED), 2) as stddev_speed,
-        ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY SPEED), 2) as median_speed,
-        ROUND(PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY SPEED), 2) as p75_speed,
-        ROUND(PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY SPEED), 2) as p25_speed
+        EVENT_TIMESTAMP,
+        LAT,
+        LNG,
+        SPEED,
+        TIME_LAG,
+        AVG(IFF(SPEED >= 0, SPEED, NULL)) OVER (
+            PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP
+            ROWS BETWEEN 5 PRECEDING AND 5 FOLLOWING
+        ) as smoothed_speed
     FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
-    WHERE SPEED >= 0
-    GROUP BY UID, TID
 ),
-trip_classification AS (
+regimes AS (
     SELECT 
-        UID,
-        TID,
-        point_count,
-        avg_speed,
-        max_speed,
-        median_speed,
+        *,
         CASE
-            WHEN avg_speed < 1 THEN 'stationary'
-            WHEN avg_speed >= 1 AND avg_speed < 6 AND max_speed < 15 THEN 'walking'
-            WHEN avg_speed >= 6 AND avg_speed < 12 AND max_speed < 20 THEN 'running'
-            WHEN avg_speed >= 8 AND avg_speed < 25 AND max_speed < 45 THEN 'cycling'
-            WHEN avg_speed >= 80 OR (avg_speed > 60 AND median_speed > 80) THEN 'train_airplane'
-            WHEN avg_speed >= 40 AND median_speed >= 60 THEN 'driving_highway'
-            WHEN avg_speed >= 15 AND avg_speed < 80 THEN 'driving_urban'
-            ELSE 'unknown'
-        END AS transportation_mode
-    FROM trip_statistics
+            WHEN smoothed_speed < 1 THEN 'stop'
+            WHEN smoothed_speed < 7 THEN 'foot'
+            WHEN smoothed_speed < 25 THEN 'cycle'
+            WHEN smoothed_speed >= 25 THEN 'motor'
+        END as regime,
+        TIME_LAG > 300 as is_gap
+    FROM smoothed
+),
+run_starts AS (
+    SELECT 
+        *,
+        regime IS DISTINCT FROM LAG(regime) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+            OR is_gap as is_run_start
+    FROM regimes
+),
+run_ends AS (
+    SELECT 
+        *,
+        COALESCE(LEAD(is_run_start) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP), TRUE) as is_run_end
+    FROM run_starts
+),
+runs AS (
+    -- Start and end time of each point's run, carried from the run's first
+    -- and last point within the same (UID, TID) order
+    SELECT 
+        *,
+        COALESCE(
+            IFF(is_run_start, EVENT_TIMESTAMP, NULL),
+            LAG(IFF(is_run_start, EVENT_TIMESTAMP, NULL)) IGNORE NULLS
+                OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+        ) as run_start_time,
+        COALESCE(
+            IFF(is_run_end, EVENT_TIMESTAMP, NULL),
+            LEAD(IFF(is_run_end, EVENT_TIMESTAMP, NULL)) IGNORE NULLS
+                OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+        ) as run_end_time
+    FROM run_ends
+),
+kept_runs AS (
+    SELECT 
+        *,
+        IFF(TIMESTAMPDIFF(SECOND, run_start_time, run_end_time) < 120, NULL, regime) as kept_regime
+    FROM runs
+),
+filled AS (
+    SELECT 
+        *,
+        COALESCE(
+            kept_regime,
+            LAG(kept_regime) IGNORE NULLS OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP),
+            LEAD(kept_regime) IGNORE NULLS OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP),
+            regime
+        ) as leg_regime
+    FROM kept_runs
+),
+leg_starts AS (
+    SELECT 
+        *,
+        leg_regime IS DISTINCT FROM LAG(leg_regime) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+            OR is_gap as is_leg_start
+    FROM filled
+),
+legs AS (
+    SELECT 
+        *,
+        SUM(IFF(is_leg_start, 1, 0)) OVER (
+            PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) as leg_no
+    FROM leg_starts
 )
 SELECT 
-    g.UID,
-    g.TID,
-    g.LAT,
-    g.LNG,
-    g.ZERO_COL,
-    g.ALT,
-    g.DAYNO,
-    g.EVENT_DATE,
-    g.EVENT_TIME,
-    g.EVENT_TIMESTAMP,
-    g.GEOMETRY,
-    g.TIME_LAG,
-    g.SPEED,
-    g.country_code,
-    g.country_name,
-    tc.transportation_mode,
-    tc.avg_speed as trip_avg_speed,
-    tc.max_speed as trip_max_speed,
-    tc.median_speed as trip_median_speed
-FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN g
-LEFT JOIN trip_classification tc
-    ON g.UID = tc.UID AND g.TID = tc.TID
-ORDER BY g.UID, g.TID, g.EVENT_TIMESTAMP;
+    UID,
+    TID,
+    leg_no,
+    CONCAT(UID, '-', TID) as trip_id,
+    CONCAT(UID, '-', TID, '-', leg_no) as leg_id,
+    ANY_VALUE(leg_regime) as speed_regime,
+    NULL::VARCHAR(30) as transportation_mode,
+    COUNT(*) as point_count,
+    MIN(EVENT_TIMESTAMP) as start_time,
+    MAX(EVENT_TIMESTAMP) as end_time,
+    TIMESTAMPDIFF(SECOND, MIN(EVENT_TIMESTAMP), MAX(EVENT_TIMESTAMP)) as duration_seconds,
+    MIN_BY(LNG, EVENT_TIMESTAMP) as start_lng,
+    MIN_BY(LAT, EVENT_TIMESTAMP) as start_lat,
+    MAX_BY(LNG, EVENT_TIMESTAMP) as end_lng,
+    MAX_BY(LAT, EVENT_TIMESTAMP) as end_lat,
+    ROUND(SUM(IFF(is_leg_start OR SPEED < 0, 0, SPEED * TIME_LAG / 3600)), 3) as length_km,
+    ROUND(AVG(IFF(SPEED >= 0, SPEED, NULL)), 2) as leg_avg_speed,
+    ROUND(MAX(IFF(SPEED >= 0, SPEED, NULL)), 2) as leg_max_speed,
+    ROUND(MEDIAN(IFF(SPEED >= 0, SPEED, NULL)), 2) as leg_median_speed
+FROM legs
+GROUP BY UID, TID, leg_no
+ORDER BY UID, TID, leg_no;
+
+-- Classify legs with the same rules as trips
+UPDATE FLEET_DEMOS.ROUTING.GEOLIFE_LEGS l
+SET transportation_mode = c.transportation_mode
+FROM (
+    SELECT 
+        lg.UID,
+        lg.TID,
+        lg.leg_no,
+        COALESCE(r.transportation_mode, 'unknown') as transportation_mode
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_LEGS lg
+    LEFT JOIN FLEET_DEMOS.ROUTING.MODE_RULES r
+        ON (r.min_avg_speed IS NULL OR lg.leg_avg_speed >= r.min_avg_speed)
+        AND (r.max_avg_speed IS NULL OR lg.leg_avg_speed < r.max_avg_speed)
+        AND (r.max_max_speed IS NULL OR lg.leg_max_speed < r.max_max_speed)
+        AND (r.min_median_speed IS NULL OR lg.leg_median_speed >= r.min_median_speed)
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY lg.UID, lg.TID, lg.leg_no ORDER BY r.priority) = 1
+) c
+WHERE l.UID = c.UID
+    AND l.TID = c.TID
+    AND l.leg_no = c.leg_no
+    AND l.transportation_mode IS DISTINCT FROM c.transportation_mode;
+
+
+-- ============================================================
+-- GEOLIFE Map-Matched Trips (Step 6: Road Network Matching)
+-- ============================================================
+-- Purpose: Trip geometry snapped to the ORS road network with its exact
+--          length, for like-for-like comparison with ORS routes
+-- Source: FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS, FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+-- Target: FLEET_DEMOS.ROUTING.GEOLIFE_MATCHED
+--
+-- Build (per region, with that region's ORS profile active):
+--   python routing/map_matcher.py
+--   python routing/map_matcher.py --modes driving_urban driving_highway --limit 500
+--
+-- Method:
+--   - Points thinned to one waypoint every 200 m of recorded path
+--   - ORS route through the waypoints with the trip mode's profile,
+--     in chained requests of at most 50 waypoints run in parallel
+--   - Stationary, train/airplane and unknown trips are not matched
+--   - A run replaces the rows of the trips it matched; rebuilding
+--     GEOLIFE_CLEAN recreates the table empty
+--
+-- Output Schema:
+--   - routing_profile: ORS profile the trip was matched with
+--   - waypoint_count: Waypoints routed through
+--   - gps_length_km: Recorded path length (sum of SPEED * TIME_LAG)
+--   - matched_length_km / matched_duration_minutes: ORS route summary
+--   - matched_geometry: Matched LineString
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GEOLIFE_MATCHED (
+    UID VARCHAR,
+    TID VARCHAR,
+    TRIP_ID VARCHAR,
+    ROUTING_PROFILE VARCHAR(30),
+    WAYPOINT_COUNT NUMBER,
+    GPS_LENGTH_KM FLOAT,
+    MATCHED_LENGTH_KM FLOAT,
+    MATCHED_DURATION_MINUTES FLOAT,
+    MATCHED_GEOMETRY GEOGRAPHY
+)
+CLUSTER BY (UID, TID);
+
+
+-- ============================================================
+-- GEOLIFE Trajectory Tiles (Step 7: Fleet Map Export)
+-- ============================================================
+-- Purpose: All trips as zoom-levelled binary map tiles, so the fleet map
+--          loads only the tiles in view instead of 14M points
+-- Source: FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+-- Target: @FLEET_DEMOS.ROUTING.GEOLIFE_TILES (<zoom>/<x>/<y>.glt),
+--         FLEET_DEMOS.ROUTING.GEOLIFE_TILE_INDEX
+--
+-- Build (after Step 2; re-run when GEOLIFE_CLEAN changes):
+--   python routing/tile_export.py
+--   python routing/tile_export.py --min-zoom 10 --max-zoom 12   (some zoom levels)
+--
+-- Method:
+--   - Slippy map tiles (Web Mercator), zoom 6-14 by default
+--   - Per zoom, consecutive points within one screen pixel are merged,
+--     so a tile holds about as many points as it can show
+--   - Paths are cut into features per tile and speed bucket
+--     (< 10, 10-30, 30-60, > 60 km/h) with their average speed
+--   - At most 5000 features and 20000 points per tile, which bounds what
+--     a map view loads
+--   - Tile format: routing/tile_format.py (zlib-compressed binary)
+--
+-- Layout:
+--   - Server-side encryption, so the dashboard reads the stage directly
+--   - The index lists the tiles of every zoom level; the fleet map
+--     queries it for the tiles in view and fetches only those files
+-- ============================================================
+
+CREATE STAGE IF NOT EXISTS FLEET_DEMOS.ROUTING.GEOLIFE_TILES
+    ENCRYPTION = (TYPE = 'SNOWFLAKE_SSE');
+
+-- IF NOT EXISTS: re-running this script keeps the exported zoom levels,
+-- whose files stay on the stage
+CREATE TABLE IF NOT EXISTS FLEET_DEMOS.ROUTING.GEOLIFE_TILE_INDEX (
+    ZOOM NUMBER,
+    TILE_X NUMBER,
+    TILE_Y NUMBER,
+    FEATURE_COUNT NUMBER,
+    POINT_COUNT NUMBER,
+    TILE_BYTES NUMBER
+);
 
 
 -- ============================================================
@@ -485,17 +941,28 @@ ORDER BY g.UID, g.TID, g.EVENT_TIMESTAMP;
 -- Source: OVERTURE_MAPS__BASE.CARTO.INFRASTRUCTURE
 -- Target: FLEET_DEMOS.ROUTING.HGV_PARKINGS
 -- 
--- Data Strategy:
---   - Filter for transit parking infrastructure
+-- Build (this script only creates the empty table; rows are written only
+-- by poi_extract.py):
+--   python routing/poi_extract.py --all-countries --kinds parkings
+--   python routing/poi_extract.py --countries DE AT --kinds parkings   (refresh some countries)
+--
+-- Data Strategy (filter first, attribute last):
+--   - Filter for transit parking infrastructure on plain columns
+--   - Only include areal geometries: ST_DIMENSION = 2 (polygons and
+--     multipolygons) instead of parsing ST_ASGEOJSON output
 --   - Extract locations with HGV tag = 'yes' or 'designated'
---   - Join with country boundaries for country attribution
---   - Only include polygon geometries (exclude points/lines)
+--   - Attribute countries on the few remaining parkings through
+--     COUNTRY_H3_CELLS, one parallel task per country; exact
+--     ST_INTERSECTS only in border cells
+--   - The refreshed countries replace their rows in one transaction
 --
 -- Source Tags Structure:
 --   - Uses LATERAL FLATTEN to parse nested key_value array
 --   - Extracts 'hgv' tag value from OSM source_tags
 --
 -- Output Schema:
+--   - iso_code: ISO country code (clustering key)
+--   - id: Overture Maps infrastructure ID
 --   - english_name: Country name
 --   - geometry: Parking location polygon
 --
@@ -506,44 +973,109 @@ ORDER BY g.UID, g.TID, g.EVENT_TIMESTAMP;
 --   - Cross-border logistics planning
 -- ============================================================
 
-CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.HGV_PARKINGS AS
-SELECT 
-    c.english_name, 
-    l.geometry 
-FROM OVERTURE_MAPS__BASE.CARTO.INFRASTRUCTURE l
-INNER JOIN FLEET_DEMOS.ROUTING.COUNTRIES c
-    ON ST_INTERSECTS(c.geometry, l.geometry)
-, LATERAL FLATTEN(input => l.source_tags:key_value) hgv_tag
-WHERE l.class ILIKE 'parking%'
-    AND l.subtype ILIKE 'transit'
-    AND ST_ASGEOJSON(l.geometry):type::string ILIKE 'POLYGON'
-    AND hgv_tag.value:key::string = 'hgv'
-    AND hgv_tag.value:value::string IN ('yes', 'designated');
+-- Migration: tables built before the per-country extract have no ISO_CODE
+-- or ID column; drop them so the current schema is created below
+EXECUTE IMMEDIATE $$
+BEGIN
+    IF ((SELECT COUNT(*)
+         FROM FLEET_DEMOS.INFORMATION_SCHEMA.COLUMNS
+         WHERE TABLE_SCHEMA = 'ROUTING'
+             AND TABLE_NAME = 'HGV_PARKINGS'
+             AND COLUMN_NAME IN ('ISO_CODE', 'ID')) < 2) THEN
+        DROP TABLE IF EXISTS FLEET_DEMOS.ROUTING.HGV_PARKINGS;
+    END IF;
+END;
+$$;
+
+-- IF NOT EXISTS: re-running this script keeps the extracted countries
+CREATE TABLE IF NOT EXISTS FLEET_DEMOS.ROUTING.HGV_PARKINGS (
+    iso_code VARCHAR(2),
+    id VARCHAR,
+    english_name VARCHAR(100),
+    geometry GEOGRAPHY
+)
+CLUSTER BY (iso_code);
+
+
+-- ============================================================
+-- Retail Brand Reference Tables
+-- ============================================================
+-- Purpose: Brands and place categories the retail store extracts keep
+-- Target: FLEET_DEMOS.ROUTING.RETAIL_BRANDS, FLEET_DEMOS.ROUTING.RETAIL_CATEGORIES
+--
+-- RETAIL_BRANDS:
+--   - iso_code: country the brand is extracted for
+--   - canonical_name: normalized brand name written to the stores table
+--   - match_token: upper-case text searched for in the place name; several
+--     tokens may map to one brand; tokens are matched literally, longest
+--     first
+--
+-- Usage:
+--   - Adding a brand, a spelling or a country is an INSERT here; the
+--     extract builds one regex alternation from all tokens of a country
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.RETAIL_BRANDS (
+    iso_code VARCHAR(2),
+    canonical_name VARCHAR(50),
+    match_token VARCHAR(50)
+) AS
+SELECT * FROM VALUES
+    ('DE', 'REWE', 'REWE'),
+    ('DE', 'LIDL', 'LIDL'),
+    ('DE', 'ALDI', 'ALDI'),
+    ('DE', 'NETTO', 'NETTO'),
+    ('DE', 'PENNY', 'PENNY'),
+    ('DE', 'EDEKA', 'EDEKA')
+AS t(iso_code, canonical_name, match_token);
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.RETAIL_CATEGORIES (
+    category VARCHAR(100) PRIMARY KEY
+) AS
+SELECT * FROM VALUES
+    ('grocery_store'),
+    ('supermarket'),
+    ('convenience_store'),
+    ('discount_store'),
+    ('international_grocery_store'),
+    ('specialty_grocery_store'),
+    ('health_food_store'),
+    ('wholesale_store'),
+    ('department_store')
+AS t(category);
 
 
 -- ============================================================
--- Germany Retail Stores from Overture Maps
+-- Retail Stores from Overture Maps (per country)
 -- ============================================================
--- Purpose: Extract major retail store locations in Germany
+-- Purpose: Extract major retail store locations for every onboarded market
 -- Source: OVERTURE_MAPS__PLACES.CARTO.PLACE
--- Target: FLEET_DEMOS.ROUTING.GERMANY_RETAIL_STORES
--- 
+-- Target: FLEET_DEMOS.ROUTING.RETAIL_STORES
+--
+-- Build (this script only creates the empty table; rows are written only
+-- by poi_extract.py):
+--   python routing/poi_extract.py --all-countries --kinds stores
+--   python routing/poi_extract.py --countries DE --kinds stores   (refresh one market)
+--
 -- Brands Included:
---   - REWE (supermarket chain)
---   - LIDL (discount supermarket)
---   - ALDI (discount supermarket)
---   - NETTO (discount supermarket)
---   - PENNY (discount supermarket)
---   - EDEKA (supermarket chain)
+--   - Rows of RETAIL_BRANDS, per country
 --
 -- Category Filtering:
---   - Only includes retail/grocery categories
+--   - Only includes retail/grocery categories listed in RETAIL_CATEGORIES
 --   - Excludes restaurants, bars, services, medical facilities
---   - Categories: grocery_store, supermarket, convenience_store,
---     discount_store, international_grocery_store, specialty_grocery_store,
---     health_food_store, wholesale_store, department_store
+--
+-- Method (cheapest filters first, one Overture scan per run):
+--   1. Category in RETAIL_CATEGORIES
+--   2. Name contains any brand token of the requested countries
+--      (one regex alternation)
+--   3. Point in an H3 cell of a requested country (COUNTRY_H3_CELLS)
+--   4. Per country, in parallel: brand = the country's token matched by
+--      REGEXP_SUBSTR; inside the country, with exact ST_INTERSECTS only
+--      for stores in border cells
+--   5. The refreshed countries replace their rows in one transaction
 --
 -- Output Schema:
+--   - iso_code: ISO country code (clustering key)
 --   - id: Overture Maps place ID
 --   - store_name: Primary store name (e.g., "REWE City Markt Berlin")
 --   - category: Store category (from Overture Maps)
@@ -558,41 +1090,257 @@ WHERE l.class ILIKE 'parking%'
 --   - Delivery time window planning
 -- ============================================================
 
-CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.GERMANY_RETAIL_STORES AS
+-- Migration: tables built before the per-country extract have no ISO_CODE
+-- or ID column; drop them so the current schema is created below
+EXECUTE IMMEDIATE $$
+BEGIN
+    IF ((SELECT COUNT(*)
+         FROM FLEET_DEMOS.INFORMATION_SCHEMA.COLUMNS
+         WHERE TABLE_SCHEMA = 'ROUTING'
+             AND TABLE_NAME = 'RETAIL_STORES'
+             AND COLUMN_NAME IN ('ISO_CODE', 'ID')) < 2) THEN
+        DROP TABLE IF EXISTS FLEET_DEMOS.ROUTING.RETAIL_STORES;
+    END IF;
+END;
+$$;
+
+-- IF NOT EXISTS: re-running this script keeps the extracted countries
+CREATE TABLE IF NOT EXISTS FLEET_DEMOS.ROUTING.RETAIL_STORES (
+    iso_code VARCHAR(2),
+    id VARCHAR,
+    store_name VARCHAR,
+    category VARCHAR(100),
+    geometry GEOGRAPHY,
+    addresses VARIANT,
+    canonical_name VARCHAR(50)
+)
+CLUSTER BY (iso_code, canonical_name);
+
+
+-- ============================================================
+-- Germany Retail Stores
+-- ============================================================
+-- Purpose: German slice of RETAIL_STORES under its original name
+-- Source: FLEET_DEMOS.ROUTING.RETAIL_STORES
+-- Target: FLEET_DEMOS.ROUTING.GERMANY_RETAIL_STORES
+--
+-- Output Schema:
+--   - Same columns as before: id, store_name, category, geometry,
+--     addresses, canonical_name
+--
+-- Migration:
+--   - Earlier versions built GERMANY_RETAIL_STORES as a table, which a
+--     view cannot replace; the table is dropped first (a view from an
+--     earlier run of this script is left to CREATE OR REPLACE)
+-- ============================================================
+
+EXECUTE IMMEDIATE $$
+BEGIN
+    IF (EXISTS (SELECT 1
+                FROM FLEET_DEMOS.INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_SCHEMA = 'ROUTING'
+                    AND TABLE_NAME = 'GERMANY_RETAIL_STORES'
+                    AND TABLE_TYPE = 'BASE TABLE')) THEN
+        DROP TABLE FLEET_DEMOS.ROUTING.GERMANY_RETAIL_STORES;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE VIEW FLEET_DEMOS.ROUTING.GERMANY_RETAIL_STORES AS
 SELECT 
-    p.id,
-    p.names:primary::string as store_name,
-    p.categories:primary::string as category,
-    p.geometry,
-    p.addresses,
-    CASE
-        WHEN p.names:primary::string ILIKE '%REWE%' THEN 'REWE'
-        WHEN p.names:primary::string ILIKE '%LIDL%' THEN 'LIDL'
-        WHEN p.names:primary::string ILIKE '%ALDI%' THEN 'ALDI'
-        WHEN p.names:primary::string ILIKE '%NETTO%' THEN 'NETTO'
-        WHEN p.names:primary::string ILIKE '%PENNY%' THEN 'PENNY'
-        WHEN p.names:primary::string ILIKE '%EDEKA%' THEN 'EDEKA'
-    END as canonical_name
-FROM OVERTURE_MAPS__PLACES.CARTO.PLACE p
-INNER JOIN FLEET_DEMOS.ROUTING.COUNTRIES c
-    ON ST_INTERSECTS(c.geometry, p.geometry)
-WHERE c.english_name = 'Germany'
-    AND (
-        p.names:primary::string ILIKE '%REWE%'
-        OR p.names:primary::string ILIKE '%LIDL%'
-        OR p.names:primary::string ILIKE '%ALDI%'
-        OR p.names:primary::string ILIKE '%NETTO%'
-        OR p.names:primary::string ILIKE '%PENNY%'
-        OR p.names:primary::string ILIKE '%EDEKA%'
-    )
-    AND p.categories:primary::string IN (
-        'grocery_store',
-        'supermarket',
-        'convenience_store',
-        'discount_store',
-        'international_grocery_store',
-        'specialty_grocery_store',
-        'health_food_store',
-        'wholesale_store',
-        'department_store'
-    );
+    id,
+    store_name,
+    category,
+    geometry,
+    addresses,
+    canonical_name
+FROM FLEET_DEMOS.ROUTING.RETAIL_STORES
+WHERE iso_code = 'DE';
+
+
+-- ============================================================
+-- San Francisco Accessibility Surface
+-- ============================================================
+-- Purpose: Precompute how well every SF hexagon is served by e-bike
+-- Source: FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX, FLEET_DEMOS.ROUTING.SF_HEXAGONS
+-- Target: FLEET_DEMOS.ROUTING.SF_ACCESSIBILITY
+--
+-- Metrics (per origin hexagon):
+--   - reachable_5_min / reachable_10_min / reachable_15_min:
+--     number of destination hexagons reachable within the threshold
+--   - median_duration_minutes: median travel time to all routed destinations
+--   - destination_count: number of routed destinations (coverage of the matrix)
+--
+-- Method:
+--   - Single GROUP BY pass over the matrix using COUNT_IF and MEDIAN
+--   - LEFT JOIN from SF_HEXAGONS so hexagons without routes are kept (count 0)
+--   - Self pairs (origin = destination) are excluded
+--
+-- Use Cases:
+--   - Accessibility page: one H3 layer for the whole city
+--   - Finding poorly served areas without selecting origins one by one
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.SF_ACCESSIBILITY AS
+SELECT 
+    h.HEX_ID,
+    h.LATITUDE,
+    h.LONGITUDE,
+    COUNT_IF(m.DURATION_MINUTES <= 5) as reachable_5_min,
+    COUNT_IF(m.DURATION_MINUTES <= 10) as reachable_10_min,
+    COUNT_IF(m.DURATION_MINUTES <= 15) as reachable_15_min,
+    ROUND(MEDIAN(m.DURATION_MINUTES), 2) as median_duration_minutes,
+    COUNT(m.DEST_HEX) as destination_count
+FROM FLEET_DEMOS.ROUTING.SF_HEXAGONS h
+LEFT JOIN FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX m
+    ON m.ORIGIN_HEX = h.HEX_ID
+    AND m.DEST_HEX <> m.ORIGIN_HEX
+GROUP BY h.HEX_ID, h.LATITUDE, h.LONGITUDE
+ORDER BY h.HEX_ID;
+
+
+-- ============================================================
+-- San Francisco Travel Time Pyramid (Multi-resolution)
+-- ============================================================
+-- Purpose: Coarser H3 aggregates of the travel time matrix for zoomed-out views
+-- Source: FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX
+-- Target: FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_PYRAMID
+--
+-- Aggregation Strategy:
+--   - LEVEL 1 = parent cells one resolution coarser than the matrix (~7x fewer cells)
+--   - LEVEL 2 = parent cells two resolutions coarser (~49x fewer cells)
+--   - Each (origin parent, destination parent) pair keeps min/median duration,
+--     median distance and the number of fine pairs it summarizes
+--
+-- Method:
+--   - Base resolution is read from the hex ids with H3_GET_RESOLUTION
+--   - One pass over the matrix, cross joined with the level list
+--   - Sorted by LEVEL, ORIGIN_HEX so single-origin lookups prune well
+--
+-- Use Cases:
+--   - Travel Time Analysis page keeps the rendered polygon count roughly
+--     constant as the number of rings grows
+-- ============================================================
+
+CREATE OR REPLACE TABLE FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_PYRAMID AS
+WITH levels AS (
+    SELECT column1 as level
+    FROM VALUES (1), (2)
+),
+base AS (
+    SELECT 
+        ORIGIN_HEX,
+        DEST_HEX,
+        DISTANCE_KM,
+        DURATION_MINUTES,
+        H3_GET_RESOLUTION(ORIGIN_HEX) as base_resolution
+    FROM FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX
+)
+SELECT 
+    l.level,
+    b.base_resolution - l.level as resolution,
+    H3_CELL_TO_PARENT(b.ORIGIN_HEX, b.base_resolution - l.level) as origin_hex,
+    H3_CELL_TO_PARENT(b.DEST_HEX, b.base_resolution - l.level) as dest_hex,
+    ROUND(MIN(b.DURATION_MINUTES), 2) as min_duration_minutes,
+    ROUND(MEDIAN(b.DURATION_MINUTES), 2) as median_duration_minutes,
+    ROUND(MEDIAN(b.DISTANCE_KM), 2) as median_distance_km,
+    COUNT(*) as pair_count
+FROM base b
+CROSS JOIN levels l
+GROUP BY 1, 2, 3, 4
+ORDER BY level, origin_hex, dest_hex;
+
+
+-- ============================================================
+-- SF Travel Time Matrix Clustering
+-- ============================================================
+-- Purpose: Keep single-origin lookups on the matrix pruned
+-- Target: FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX
+--
+-- Notes:
+--   - routing/matrix_builder.py creates the matrix with the same clustering
+--     key and search optimization; these statements cover matrices built
+--     before that
+-- ============================================================
+
+ALTER TABLE FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX CLUSTER BY (ORIGIN_HEX);
+
+ALTER TABLE FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX
+    ADD SEARCH OPTIMIZATION ON EQUALITY(ORIGIN_HEX);
+
+
+-- ============================================================
+-- Pruning Verification
+-- ============================================================
+-- Purpose: Check that point lookups touch a handful of micro-partitions
+--
+-- Method:
+--   - SYSTEM$CLUSTERING_INFORMATION: average depth close to 1 means
+--     each key value lives in very few partitions
+--   - Run one lookup per table, then read partitions scanned/total of its
+--     TableScan from GET_QUERY_OPERATOR_STATS(LAST_QUERY_ID())
+--   - Expected: single trip and single origin scan < 1% of partitions
+--     (pruning_ratio > 0.99) once automatic clustering has caught up
+-- ============================================================
+
+SELECT SYSTEM$CLUSTERING_INFORMATION('FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN', '(UID, TID)');
+SELECT SYSTEM$CLUSTERING_INFORMATION('FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX', '(ORIGIN_HEX)');
+
+-- Result cache would hide the scan
+ALTER SESSION SET USE_CACHED_RESULT = FALSE;
+
+SET (sample_uid, sample_tid, sample_country, sample_mode) = (
+    SELECT UID, TID, country_name, transportation_mode
+    FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+    WHERE country_name IS NOT NULL
+    ORDER BY RANDOM()
+    LIMIT 1
+);
+
+SET sample_origin = (
+    SELECT ORIGIN_HEX
+    FROM FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX
+    ORDER BY RANDOM()
+    LIMIT 1
+);
+
+-- Single trip (Route Comparison)
+SELECT COUNT(*), MIN(EVENT_TIMESTAMP), MAX(EVENT_TIMESTAMP)
+FROM FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN
+WHERE UID = $sample_uid AND TID = $sample_tid;
+
+SELECT 
+    'GEOLIFE_CLEAN (UID, TID)' as lookup,
+    operator_statistics:pruning:partitions_scanned::NUMBER as partitions_scanned,
+    operator_statistics:pruning:partitions_total::NUMBER as partitions_total,
+    ROUND(1 - partitions_scanned / NULLIF(partitions_total, 0), 4) as pruning_ratio
+FROM TABLE(GET_QUERY_OPERATOR_STATS(LAST_QUERY_ID()))
+WHERE operator_type = 'TableScan';
+
+-- Single origin (Travel Time Analysis)
+SELECT COUNT(*), MEDIAN(DURATION_MINUTES)
+FROM FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX
+WHERE ORIGIN_HEX = $sample_origin;
+
+SELECT 
+    'SF_TRAVEL_TIME_MATRIX (ORIGIN_HEX)' as lookup,
+    operator_statistics:pruning:partitions_scanned::NUMBER as partitions_scanned,
+    operator_statistics:pruning:partitions_total::NUMBER as partitions_total,
+    ROUND(1 - partitions_scanned / NULLIF(partitions_total, 0), 4) as pruning_ratio
+FROM TABLE(GET_QUERY_OPERATOR_STATS(LAST_QUERY_ID()))
+WHERE operator_type = 'TableScan';
+
+-- Country and mode (Route Comparison trip selector)
+SELECT COUNT(*)
+FROM FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS
+WHERE country_name = $sample_country AND transportation_mode = $sample_mode;
+
+SELECT 
+    'GEOLIFE_TRIPS (COUNTRY_NAME, TRANSPORTATION_MODE)' as lookup,
+    operator_statistics:pruning:partitions_scanned::NUMBER as partitions_scanned,
+    operator_statistics:pruning:partitions_total::NUMBER as partitions_total,
+    ROUND(1 - partitions_scanned / NULLIF(partitions_total, 0), 4) as pruning_ratio
+FROM TABLE(GET_QUERY_OPERATOR_STATS(LAST_QUERY_ID()))
+WHERE operator_type = 'TableScan';
+
+ALTER SESSION UNSET USE_CACHED_RESULT;
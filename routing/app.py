@@ -2,318 +2,272 @@ import streamlit as st
 import time
 from snowflake.snowpark.context import get_active_session
 
+from graph_builder import (
+    ACTIVE_STATUSES,
+    current_builds,
+    ensure_builds_table,
+    refresh_builds,
+    start_build,
+)
+from ors_inventory import (
+    GRAPHS_STAGE,
+    PROFILE_STAGE,
+    index_graph_files,
+    index_profile_files,
+    missing_graph_profiles,
+)
+from ors_status import ReadinessTracker, read_configured_profiles
+from profile_switch import (
+    ORS_SERVICE,
+    STEP_LABELS,
+    BlueGreenSwitch,
+    ProfileSwitch,
+    SnowflakeServices,
+)
+from query_log import cache_data, cache_stats, instrument, recent_queries
+from service_snapshot import UNKNOWN_PROFILE, collect_snapshot
+from service_spec import DEFAULT_ROUTING_PROFILES, plan_sizing
+
 st.set_page_config(
     page_title="ORS Profile Manager",
     page_icon="🗺️",
     layout="wide"
 )
 
-session = get_active_session()
+session = instrument(get_active_session(), page="Profile Manager")
 
 st.title("🗺️ OpenRouteService Profile Manager")
 st.markdown("Manage and switch between different routing profiles")
 
 st.divider()
 
-@st.cache_data(ttl=30)
-def get_available_profiles():
-    """Get all available profiles from the stage"""
+@cache_data(ttl=30)
+def get_profile_inventory():
+    """Index all profiles with one LIST of the profile stage and one of the graphs stage"""
     try:
-        result = session.sql("""
-            LIST @OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SPCS_STAGE
+        result = session.sql(f"""
+            LIST @{PROFILE_STAGE}
         """).collect()
-        
-        profiles = set()
-        for row in result:
-            name = row['name']
-            if '/' in name:
-                profile_name = name.split('/')[1]
-                if profile_name and profile_name not in ['Notebook']:
-                    profiles.add(profile_name)
-        
-        return sorted(list(profiles))
+        inventory = index_profile_files(result)
     except Exception as e:
         st.error(f"Error fetching profiles: {e}")
-        return []
-
-@st.cache_data(ttl=30)
-def get_profile_details(profile_name):
-    """Get details about a specific profile"""
+        return {}
+    
     try:
         result = session.sql(f"""
-            LIST @OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SPCS_STAGE/{profile_name}/
+            LIST @{GRAPHS_STAGE}
         """).collect()
-        
-        details = {
-            'map_file': None,
-            'map_size': 0,
-            'config_exists': False
-        }
-        
-        for row in result:
-            name = row['name']
-            if name.endswith('.osm.pbf') and 'example' not in name.lower():
-                details['map_file'] = name.split('/')[-1]
-                details['map_size'] = row['size']
-            elif name.endswith('ors-config.yml'):
-                details['config_exists'] = True
-        
-        return details
+        index_graph_files(inventory, result)
     except Exception as e:
-        return None
+        st.warning(f"Could not list graphs stage: {e}")
+    
+    return inventory
+
+def get_available_profiles():
+    """Get all available profiles from the stage"""
+    return sorted(get_profile_inventory().keys())
+
+def get_profile_details(profile_name):
+    """Get details about a specific profile"""
+    return get_profile_inventory().get(profile_name)
 
-def get_service_status():
-    """Get the status of ORS service"""
+@cache_data(ttl=300)
+def get_configured_profiles(profile_name):
+    """Get the routing profiles enabled in a profile's ors-config.yml"""
     try:
-        result = session.sql("""
-            SHOW SERVICES LIKE 'ORS_SERVICE' IN SCHEMA OPENROUTESERVICE_NATIVE_APP.CORE
-        """).collect()
-        
-        if result:
-            return result[0]['status']
-        return 'UNKNOWN'
+        return read_configured_profiles(session, profile_name)
     except Exception as e:
-        st.error(f"Error fetching service status: {e}")
-        return 'ERROR'
+        st.warning(f"Could not read ors-config.yml for {profile_name}: {e}")
+        return []
+
+SNAPSHOT_TTL_SECONDS = 10
 
-def get_ors_initialization_status():
-    """Check if ORS is fully initialized by examining logs"""
+def get_readiness_tracker(active_profile, ors_service):
+    """Get the readiness tracker of the live ORS service, starting a new one when it changes"""
+    tracker = st.session_state.get('ors_readiness_tracker')
+    tracker_key = (active_profile, ors_service)
+    if tracker is None or st.session_state.get('ors_readiness_key') != tracker_key:
+        tracker = ReadinessTracker(get_configured_profiles(active_profile))
+        st.session_state['ors_readiness_tracker'] = tracker
+        st.session_state['ors_readiness_key'] = tracker_key
+    return tracker
+
+def get_services_snapshot():
+    """Get services, live service, active profile and readiness, refreshed at most every few seconds"""
+    snapshot = st.session_state.get('services_snapshot')
+    if snapshot and time.time() - snapshot['fetched_at'] < SNAPSHOT_TTL_SECONDS:
+        return snapshot
+    
+    hint = (snapshot['active_profile'], snapshot['live_service']) if snapshot else None
     try:
-        result = session.sql("""
-            CALL SYSTEM$GET_SERVICE_LOGS('OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE', 0, 'ors', 1000)
-        """).collect()
-        
-        if result and result[0]:
-            logs = str(result[0][0])
-            
-            status = {
-                'is_ready': False,
-                'stage': 'Unknown',
-                'details': '',
-                'profiles_loaded': 0,
-                'total_profiles': 3
-            }
-            
-            if 'Started Application' in logs or 'Tomcat started' in logs:
-                status['is_ready'] = True
-                status['stage'] = 'Ready'
-                status['details'] = 'All profiles loaded, service is ready'
-                status['profiles_loaded'] = 3
-                return status
-            
-            if 'Initializing' in logs and 'profiles' in logs:
-                status['stage'] = 'Loading'
-                
-                # Check if profiles finished loading
-                if 'driving-car' in logs and 'Finished at:' in logs:
-                    status['profiles_loaded'] += 1
-                if 'driving-hgv' in logs and 'Finished at:' in logs:
-                    status['profiles_loaded'] += 1
-                if 'cycling-road' in logs and 'Finished at:' in logs:
-                    status['profiles_loaded'] += 1
-                
-                # Check for graph loading indicators (means using existing graphs)
-                if 'Total time:' in logs and status['profiles_loaded'] > 0:
-                    status['details'] = f"Loading existing graphs: {status['profiles_loaded']}/3 profiles complete"
-                elif status['profiles_loaded'] > 0:
-                    status['details'] = f"Loading graphs: {status['profiles_loaded']}/3 profiles complete"
-                else:
-                    status['details'] = 'Initializing profiles...'
-                return status
-            
-            if 'Container file system preparation' in logs:
-                status['stage'] = 'Preparing'
-                status['details'] = 'Initializing container...'
-                return status
-            
-            if 'Container ENV' in logs or 'Container sanity checks' in logs:
-                status['stage'] = 'Starting'
-                status['details'] = 'Container starting up...'
-                return status
-            
-            return status
-            
+        snapshot = collect_snapshot(session, get_readiness_tracker, hint)
     except Exception as e:
+        st.error(f"Error fetching services: {e}")
         return {
-            'is_ready': False,
-            'stage': 'Error',
-            'details': str(e),
-            'profiles_loaded': 0,
-            'total_profiles': 3
+            'services': {},
+            'specs': {},
+            'live_service': ORS_SERVICE,
+            'active_profile': UNKNOWN_PROFILE,
+            'readiness': {
+                'is_ready': False,
+                'stage': 'Error',
+                'details': str(e),
+                'profiles_loaded': 0,
+                'total_profiles': 0,
+                'profile_loads': {}
+            },
+            'fetched_at': time.time()
         }
+    st.session_state['services_snapshot'] = snapshot
+    return snapshot
+
+def invalidate_services_snapshot():
+    """Drop the memoized snapshot so the next render reads fresh service state"""
+    st.session_state.pop('services_snapshot', None)
 
-def get_all_services_status():
-    """Get the status of all routing services"""
+@st.cache_resource
+def prepare_graph_builds_table():
+    """Create the graph builds table once per app process, so renders only read it"""
     try:
-        result = session.sql("""
-            SHOW SERVICES IN SCHEMA OPENROUTESERVICE_NATIVE_APP.CORE
-        """).collect()
-        
-        services = {}
-        for row in result:
-            services[row['name']] = {
-                'status': row['status'],
-                'instances': f"{row['current_instances']}/{row['target_instances']}"
-            }
-        return services
+        ensure_builds_table(session)
     except Exception as e:
-        st.error(f"Error fetching services: {e}")
-        return {}
+        st.warning(f"Could not create the graph builds table: {e}")
 
-def get_active_profile_from_logs():
-    """Determine active profile from actual service specification (ground truth)"""
+@cache_data(ttl=30)
+def get_graph_builds():
+    """Get the latest graph prebuild job of every profile with live progress of active ones"""
     try:
-        result = session.sql("""
-            DESC SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE
-        """).collect()
-        
-        if result and len(result) > 0:
-            spec = str(result[0]['spec'])
-            
-            if '@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SPCS_STAGE/USA' in spec or '@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_GRAPHS_SPCS_STAGE/USA' in spec:
-                return 'USA'
-            elif '@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SPCS_STAGE/germany' in spec or '@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_GRAPHS_SPCS_STAGE/germany' in spec:
-                return 'germany'
-            elif '@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SPCS_STAGE/SanFrancisco' in spec or '@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_GRAPHS_SPCS_STAGE/SanFrancisco' in spec:
-                return 'SanFrancisco'
-        
-        return 'Unknown'
+        return {build['PROFILE']: build for build in current_builds(session)}
     except Exception as e:
-        st.warning(f"Could not determine active profile from service spec: {e}")
-        return 'Unknown'
+        st.warning(f"Could not read graph builds: {e}")
+        return {}
+
+prepare_graph_builds_table()
+
+def start_graph_prebuilds(profile_names):
+    """Start a background graph build job for each profile"""
+    for profile_name in profile_names:
+        try:
+            start_build(session, profile_name, get_profile_details(profile_name))
+        except Exception as e:
+            st.error(f"Could not start graph build for {profile_name}: {e}")
+    get_graph_builds.clear()
+    get_profile_inventory.clear()
+    st.experimental_rerun()
 
 def check_graphs_exist(profile_name):
     """Check if pre-built graphs exist for a profile in the graphs stage"""
-    try:
-        result = session.sql(f"""
-            LIST @OPENROUTESERVICE_NATIVE_APP.CORE.ORS_GRAPHS_SPCS_STAGE/{profile_name}/
-        """).collect()
-        # Check if there are any graph files (multiple directories like driving-car, etc)
-        return len(result) > 0
-    except:
-        return False
+    details = get_profile_details(profile_name)
+    return bool(details and details['graphs_exist'])
+
+def start_profile_switch(target_profile, blue_green):
+    """Start switching to a different profile using existing graphs if available"""
+    get_profile_inventory.clear()
+    details = get_profile_details(target_profile)
+    routing_profiles = get_configured_profiles(target_profile)
+    sizing = plan_sizing(
+        details['map_size'] if details else 0,
+        len(routing_profiles) or DEFAULT_ROUTING_PROFILES
+    )
+    invalidate_services_snapshot()
+    st.session_state.pop('profile_switch_settled', None)
+    switch_class = BlueGreenSwitch if blue_green else ProfileSwitch
+    st.session_state['profile_switch'] = switch_class(
+        SnowflakeServices(session),
+        target_profile,
+        graphs_exist=check_graphs_exist(target_profile),
+        routing_profiles=routing_profiles,
+        sizing=sizing
+    )
+    st.experimental_rerun()
+
+def render_profile_switch(switch):
+    """Show the progress of a profile switch and advance it by one step
 
-def switch_profile(target_profile):
-    """Switch to a different profile using existing graphs if available"""
+    Never waits: the rest of the page renders below it, and
+    schedule_switch_refresh() at the end of the page re-runs it.
+    """
+    switch.advance()
     
-    with st.spinner(f"🔄 Switching to **{target_profile}** profile..."):
-        try:
-            graphs_exist = check_graphs_exist(target_profile)
-            
-            if graphs_exist:
-                st.info(f"✅ Found existing graphs for {target_profile} - will use pre-built graphs")
-                rebuild_needed = False
-            else:
-                st.warning(f"⚠️ No existing graphs found for {target_profile} - graphs will need to be built (5-10 min)")
-                rebuild_needed = True
-            
-            st.info("⏸️ Suspending services...")
-            session.sql("""
-                ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE SUSPEND
-            """).collect()
-            
-            session.sql("""
-                ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ROUTING_GATEWAY_SERVICE SUSPEND
-            """).collect()
-            
-            time.sleep(3)
-            
-            # Update ORS service specification to point to new profile
-            st.info(f"🔄 Updating service to use {target_profile} profile...")
-            
-            new_spec = f"""spec:
-  containers:
-  - name: ors
-    image: /openrouteservice_setup/public/image_repository/openrouteservice:v9.0.0
-    volumeMounts:
-      - name: files
-        mountPath: /home/ors/files
-      - name: graphs
-        mountPath: /home/ors/graphs
-      - name: elevation-cache
-        mountPath: /home/ors/elevation_cache
-    env:
-      REBUILD_GRAPHS: "false"
-      ORS_CONFIG_LOCATION: /home/ors/files/ors-config.yml
-      XMS: 3G 
-      XMX: 200G
-  endpoints:
-    - name: ors
-      port: 8082
-      public: false
-  volumes:
-    - name: files
-      source: "@CORE.ORS_SPCS_STAGE/{target_profile}"
-    - name: graphs
-      source: "@CORE.ORS_GRAPHS_SPCS_STAGE/{target_profile}"
-    - name: elevation-cache
-      source: "@CORE.ORS_ELEVATION_CACHE_SPCS_STAGE/{target_profile}"
-"""
-            
-            session.sql(f"""
-                ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE
-                FROM SPECIFICATION $$
-{new_spec}
-$$
-            """).collect()
-            
-            st.info("▶️ Resuming services with new profile...")
-            session.sql("""
-                ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ROUTING_GATEWAY_SERVICE RESUME
-            """).collect()
-            
-            session.sql("""
-                ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE RESUME
-            """).collect()
-            
-            if rebuild_needed:
-                st.info("📥 Triggering graph build...")
-                time.sleep(5)
-                try:
-                    session.sql("""
-                        CALL OPENROUTESERVICE_NATIVE_APP.CORE.START_DOWNLOADER()
-                    """).collect()
-                except:
-                    st.warning("Note: Graphs may need to be built on first access")
-            
-            st.info("⏳ Waiting for services to initialize...")
-            time.sleep(10)
-            
-            if graphs_exist:
-                st.success(f"✅ Successfully switched to **{target_profile}** profile using existing graphs!")
-                st.info("Services should be ready in ~1 minute")
-            else:
-                st.success(f"✅ Successfully initiated switch to **{target_profile}** profile!")
-                st.info("New graphs are being built. This may take 5-10 minutes.")
-            
-            st.balloons()
-            
-            get_available_profiles.clear()
-            get_profile_details.clear()
-            
-            time.sleep(2)
+    st.subheader(f"🔄 Switching to {switch.target_profile}")
+    
+    if isinstance(switch, BlueGreenSwitch):
+        st.caption("Zero-downtime mode: the current profile keeps serving until the new one is ready")
+    
+    if switch.graphs_exist:
+        st.info(f"✅ Found existing graphs for {switch.target_profile} - using pre-built graphs")
+    else:
+        st.warning(f"⚠️ No existing graphs found for {switch.target_profile} - graphs will need to be built (5-10 min)")
+    
+    sizing = switch.sizing
+    st.caption(
+        f"Sizing: **{sizing['tier']}** · heap {sizing['xms']}-{sizing['xmx']} · "
+        f"{sizing['min_instances']}-{sizing['max_instances']} instances · "
+        f"{sizing['compute_pool']} ({sizing['instance_family']})"
+    )
+    
+    for warning in switch.warnings:
+        st.warning(warning)
+    
+    for step, seconds in switch.timings:
+        st.write(f"{STEP_LABELS[step]} - {seconds:.1f}s")
+    
+    if switch.warmup and switch.warmup['p50_ms'] is not None:
+        warmup = switch.warmup
+        st.caption(
+            f"🔥 Warm-up: {warmup['requests']} routes · p50 {warmup['p50_ms']:.0f} ms · "
+            f"p95 {warmup['p95_ms']:.0f} ms" + (f" · {warmup['errors']} errors" if warmup['errors'] else "")
+        )
+    
+    if switch.state == 'DONE':
+        st.success(f"✅ Switched to **{switch.target_profile}** in {switch.elapsed_seconds:.0f}s - routing is ready")
+    elif switch.state == 'FAILED':
+        st.error(f"❌ Error switching profile: {switch.message}")
+        st.info("Services were resumed; check the service logs before retrying.")
+    else:
+        details = f" - {switch.message}" if switch.message else ""
+        st.info(f"{STEP_LABELS[switch.state]}{details} ({switch.elapsed_seconds:.0f}s elapsed)")
+    
+    if switch.finished:
+        if not st.session_state.get('profile_switch_settled'):
+            # The switch changed specs and services; don't show the pre-switch snapshot
+            invalidate_services_snapshot()
+            st.session_state['profile_switch_settled'] = True
+        if st.button("Dismiss", use_container_width=True):
+            del st.session_state['profile_switch']
+            st.session_state.pop('profile_switch_settled', None)
+            invalidate_services_snapshot()
+            get_profile_inventory.clear()
             st.experimental_rerun()
-            
-        except Exception as e:
-            st.error(f"❌ Error switching profile: {e}")
-            st.info("Resuming services...")
-            try:
-                session.sql("""
-                    ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE RESUME
-                """).collect()
-                session.sql("""
-                    ALTER SERVICE OPENROUTESERVICE_NATIVE_APP.CORE.ROUTING_GATEWAY_SERVICE RESUME
-                """).collect()
-            except:
-                pass
+    st.divider()
+
+def schedule_switch_refresh():
+    """Re-run the page shortly while a switch is in progress; call after everything is drawn"""
+    switch = st.session_state.get('profile_switch')
+    if switch is None or switch.finished:
+        return
+    # The switch only polls again when its backoff is due; a click waits at most this long
+    time.sleep(min(switch.wait_seconds(), 2))
+    st.experimental_rerun()
+
+if 'profile_switch' in st.session_state:
+    render_profile_switch(st.session_state['profile_switch'])
+
+switch_in_progress = (
+    'profile_switch' in st.session_state
+    and not st.session_state['profile_switch'].finished
+)
 
 col1, col2 = st.columns([2, 1])
 
 with col2:
     st.subheader("⚙️ Services Status")
     
-    all_services = get_all_services_status()
-    ors_init_status = get_ors_initialization_status()
+    snapshot = get_services_snapshot()
+    all_services = snapshot['services']
+    live_service = snapshot['live_service']
+    active_profile = snapshot['active_profile']
+    ors_init_status = snapshot['readiness']
     
     status_emoji = {
         'RUNNING': '🟢',
@@ -330,7 +284,7 @@ with col2:
     else:
         stage = ors_init_status['stage']
         if stage == 'Loading':
-            progress = ors_init_status['profiles_loaded'] / ors_init_status['total_profiles']
+            progress = ors_init_status['profiles_loaded'] / max(1, ors_init_status['total_profiles'])
             st.warning(f"🔄 {stage} - {ors_init_status['details']}")
             st.progress(progress)
         elif stage == 'Preparing' or stage == 'Starting':
@@ -338,11 +292,22 @@ with col2:
         else:
             st.warning(f"⚠️ {stage} - {ors_init_status['details']}")
     
+    if ors_init_status['profile_loads']:
+        with st.expander("⏱️ Graph Load Timings"):
+            for routing_profile, load in ors_init_status['profile_loads'].items():
+                if load['finished']:
+                    seconds = f"{load['seconds']:.1f}s" if load['seconds'] is not None else "done"
+                    st.write(f"✅ **{routing_profile}** - {seconds}")
+                elif load['started']:
+                    st.write(f"🔄 **{routing_profile}** - loading")
+                else:
+                    st.write(f"⏳ **{routing_profile}** - waiting")
+    
     st.markdown("---")
     st.markdown("**Service Containers**")
     
     if all_services:
-        for service_name in ['ORS_SERVICE', 'ROUTING_GATEWAY_SERVICE', 'VROOM_SERVICE', 'DOWNLOADER']:
+        for service_name in ['ORS_SERVICE', 'ORS_SERVICE_GREEN', 'ROUTING_GATEWAY_SERVICE', 'VROOM_SERVICE', 'DOWNLOADER']:
             if service_name in all_services:
                 service = all_services[service_name]
                 status = service['status']
@@ -351,24 +316,17 @@ with col2:
                 col_name, col_status = st.columns([2, 1])
                 with col_name:
                     st.write(f"**{service_name.replace('_', ' ').title()}**")
-                    st.caption(f"Instances: {instances}")
+                    st.caption(f"Instances: {instances}" + (" · serving" if service_name == live_service else ""))
                 with col_status:
                     st.write(f"{status_emoji.get(status, '⚪')} {status}")
                 
                 if service_name != 'DOWNLOADER':
                     st.markdown("")
     else:
-        service_status = get_service_status()
-        st.metric(
-            label="ORS Service",
-            value=service_status,
-            delta=status_emoji.get(service_status, '⚪')
-        )
+        st.info("Service status is unavailable; the service snapshot could not be read. Use Refresh Status to retry.")
     
     st.markdown("---")
     
-    active_profile = get_active_profile_from_logs()
-    
     if active_profile:
         st.subheader("📊 Active Profile")
         st.markdown("---")
@@ -386,9 +344,43 @@ with col2:
     
     st.markdown("---")
     
+    st.subheader("🏗️ Graph Prebuild")
+    graph_builds = get_graph_builds()
+    missing_profiles = [
+        profile for profile in missing_graph_profiles(get_profile_inventory())
+        if graph_builds.get(profile, {}).get('STATUS') not in ACTIVE_STATUSES
+    ]
+    
+    for profile, build in graph_builds.items():
+        if build['STATUS'] in ACTIVE_STATUSES:
+            total = build['TOTAL_PROFILES'] or 0
+            st.write(f"🔄 **{profile}** - {build['DETAILS']}")
+            if total:
+                st.progress(min(1.0, (build['PROFILES_BUILT'] or 0) / total))
+        elif build['STATUS'] == 'DONE':
+            seconds = f" in {build['BUILD_SECONDS']}s" if build['BUILD_SECONDS'] is not None else ""
+            st.write(f"✅ **{profile}** - built{seconds}")
+        else:
+            st.write(f"❌ **{profile}** - {build['DETAILS']}")
+    
+    if missing_profiles:
+        st.caption(f"Without graphs: {', '.join(missing_profiles)}")
+        if st.button("🏗️ Prebuild missing graphs", use_container_width=True):
+            start_graph_prebuilds(missing_profiles)
+    elif not graph_builds:
+        st.caption("All profiles have pre-built graphs")
+    
+    st.markdown("---")
+    
     if st.button("🔄 Refresh Status", use_container_width=True):
-        get_available_profiles.clear()
-        get_profile_details.clear()
+        try:
+            # Record finished builds in the builds table; renders only read it
+            refresh_builds(session)
+        except Exception as e:
+            st.warning(f"Could not update graph builds: {e}")
+        invalidate_services_snapshot()
+        get_profile_inventory.clear()
+        get_graph_builds.clear()
         st.experimental_rerun()
     
     with st.expander("ℹ️ About"):
@@ -398,16 +390,61 @@ with col2:
         2. Click "Activate" button
         3. Wait for service to restart
         
+        **Zero-downtime mode:** the current profile keeps serving
+        `DIRECTIONS` until the new profile's graphs are loaded on the
+        standby ORS service; the gateway is then repointed.
+        
+        **Warm-up:** once graphs are loaded, sample routes from recorded
+        trips in the region are sent through `DIRECTIONS` so the first
+        dashboard requests don't pay the cold-start cost.
+        
         **Graph loading time:**
         - Small (SF): 1-2 minutes
         - Large (Germany): 5-10 minutes
+        
+        **Graph prebuild:** profiles without graphs are built by a
+        separate job service, so routing keeps running; once done,
+        switching to them only loads the pre-built graphs.
         """)
+    
+    # Hidden unless the app is opened with ?perf
+    if 'perf' in st.experimental_get_query_params():
+        with st.expander("⏱️ Query Performance", expanded=True):
+            query_records = [r for r in recent_queries() if r['page'] == "Profile Manager"]
+            if query_records:
+                panels = {}
+                for record in query_records:
+                    panels.setdefault(record['panel'], []).append(record['seconds'])
+                st.dataframe(
+                    sorted(
+                        [
+                            {'panel': panel, 'runs': len(seconds), 'max_seconds': max(seconds), 'total_seconds': round(sum(seconds), 3)}
+                            for panel, seconds in panels.items()
+                        ],
+                        key=lambda row: row['max_seconds'],
+                        reverse=True
+                    ),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.caption("No queries recorded yet")
+            
+            for (page, panel), counts in cache_stats().items():
+                if page == "Profile Manager" and counts['calls']:
+                    st.caption(f"`{panel}` cache hit rate: {1 - counts['misses'] / counts['calls']:.0%} ({counts['calls']} calls)")
 
 with col1:
     st.subheader("📍 Available Profiles")
     
+    blue_green = st.checkbox(
+        "Zero-downtime switch (blue/green)",
+        value=True,
+        help="Start the new profile on a standby ORS service and repoint the gateway once its graphs are loaded, instead of suspending routing during the switch"
+    )
+    
     profiles = get_available_profiles()
-    active_profile = get_active_profile_from_logs()
+    active_profile = get_services_snapshot()['active_profile']
     
     if profiles:
         for profile in profiles:
@@ -441,14 +478,23 @@ with col1:
             with profile_col3:
                 st.write("")
                 st.write("")
-                if not is_active:
+                building = graph_builds.get(profile, {}).get('STATUS') in ACTIVE_STATUSES
+                if building:
+                    st.button(
+                        "Building...",
+                        key=f"building_{profile}",
+                        disabled=True,
+                        use_container_width=True
+                    )
+                elif not is_active:
                     if st.button(
                         "Activate", 
                         key=f"activate_{profile}", 
                         type="primary",
+                        disabled=switch_in_progress,
                         use_container_width=True
                     ):
-                        switch_profile(profile)
+                        start_profile_switch(profile, blue_green)
                 else:
                     st.button(
                         "Active",
@@ -461,3 +507,5 @@ with col1:
 
 st.markdown("---")
 st.caption("🗺️ Profile Manager for OpenRouteService Native App")
+
+schedule_switch_refresh()
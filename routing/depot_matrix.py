@@ -0,0 +1,329 @@
+"""Build a depot-to-store travel matrix (HGV parkings to their nearest stores) with ORS matrix calls
+
+Candidates come from an H3 index in SQL: every depot (HGV parking
+centroid) looks up stores in the cells of an H3_GRID_DISK around its own
+cell and keeps the N nearest by straight-line distance, so no all-pairs
+join is made. Depots are then packed, in H3 tile order, into ORS matrix
+requests of at most --max-locations locations (nearby depots share most
+of their stores), run with bounded parallelism. Each request asks ORS for
+the depot rows and store columns only (`sources`/`destinations`), not
+the all-pairs matrix.
+
+Like matrix_builder.py, progress is checkpointed, results are bulk loaded
+into a staging table, and the target table is replaced in one statement
+once every request is done.
+
+Usage:
+    python routing/depot_matrix.py --countries DE --nearest 10
+    python routing/depot_matrix.py --countries DE --nearest 25 --search-rings 3 --workers 16
+"""
+import argparse
+import sys
+import time
+
+from ors_client import SnowflakeOrsClient
+from job_utils import (
+    Checkpoint,
+    bulk_insert,
+    call_with_retries,
+    create_session,
+    run_parallel,
+)
+from matrix_builder import region_exists
+from service_snapshot import active_region
+
+DEPOTS_TABLE = "FLEET_DEMOS.ROUTING.HGV_PARKINGS"
+STORES_TABLE = "FLEET_DEMOS.ROUTING.RETAIL_STORES"
+TARGET_TABLE = "FLEET_DEMOS.ROUTING.DEPOT_STORE_MATRIX"
+
+# Profile Manager region serving each country
+COUNTRY_REGIONS = {
+    'DE': 'germany',
+}
+
+MATRIX_COLUMNS = [
+    'DEPOT_ID', 'STORE_ID', 'STORE_RANK', 'STRAIGHT_LINE_KM', 'DISTANCE_KM', 'DURATION_MINUTES'
+]
+
+
+def load_candidates(session, countries, nearest, search_resolution, search_rings, tile_resolution):
+    """Get the N nearest stores of every depot from the H3 index, grouped by depot
+
+    Returns a list of (depot, stores) in tile order, where depot is
+    (depot_id, lon, lat) and stores is a list of (store_id, lon, lat, rank, km).
+    """
+    country_list = ", ".join(f"'{code}'" for code in countries)
+    result = session.sql(f"""
+        WITH depots AS (
+            SELECT
+                id AS depot_id,
+                ST_X(ST_CENTROID(geometry)) AS lon,
+                ST_Y(ST_CENTROID(geometry)) AS lat,
+                H3_POINT_TO_CELL(ST_CENTROID(geometry), {search_resolution}) AS cell
+            FROM {DEPOTS_TABLE}
+            WHERE iso_code IN ({country_list})
+        ),
+        stores AS (
+            SELECT
+                id AS store_id,
+                ST_X(geometry) AS lon,
+                ST_Y(geometry) AS lat,
+                H3_POINT_TO_CELL(geometry, {search_resolution}) AS cell
+            FROM {STORES_TABLE}
+            WHERE iso_code IN ({country_list})
+        ),
+        search_cells AS (
+            SELECT d.*, n.VALUE::INTEGER AS search_cell
+            FROM depots d,
+                LATERAL FLATTEN(input => H3_GRID_DISK(d.cell, {search_rings})) n
+        )
+        SELECT
+            sc.depot_id,
+            sc.lon AS depot_lon,
+            sc.lat AS depot_lat,
+            H3_CELL_TO_PARENT(sc.cell, {tile_resolution}) AS tile,
+            s.store_id,
+            s.lon AS store_lon,
+            s.lat AS store_lat,
+            HAVERSINE(sc.lat, sc.lon, s.lat, s.lon) AS straight_line_km,
+            ROW_NUMBER() OVER (
+                PARTITION BY sc.depot_id
+                ORDER BY HAVERSINE(sc.lat, sc.lon, s.lat, s.lon), s.store_id
+            ) AS store_rank
+        FROM search_cells sc
+        INNER JOIN stores s
+            ON s.cell = sc.search_cell
+        QUALIFY store_rank <= {nearest}
+        ORDER BY tile, sc.depot_id, store_rank
+    """).collect()
+
+    depots = {}
+    for row in result:
+        depot = (row['DEPOT_ID'], float(row['DEPOT_LON']), float(row['DEPOT_LAT']))
+        depots.setdefault(depot, []).append((
+            row['STORE_ID'],
+            float(row['STORE_LON']),
+            float(row['STORE_LAT']),
+            row['STORE_RANK'],
+            round(float(row['STRAIGHT_LINE_KM']), 3)
+        ))
+    return list(depots.items())
+
+
+def build_tasks(candidates, max_locations):
+    """Pack consecutive depots and their stores into requests of at most max_locations locations
+
+    A depot whose own candidates exceed the limit gets a request of its own
+    with its stores split into chunks.
+    """
+    tasks = []
+    depots, stores = [], {}
+
+    def flush():
+        if depots:
+            tasks.append({
+                'task_id': f"{depots[0][0][0]}:{len(depots)}",
+                'depots': list(depots),
+                'stores': list(stores.values()),
+            })
+        depots.clear()
+        stores.clear()
+
+    for depot, depot_stores in candidates:
+        if 1 + len(depot_stores) > max_locations:
+            flush()
+            size = max(1, max_locations - 1)
+            for i in range(0, len(depot_stores), size):
+                part = depot_stores[i:i + size]
+                tasks.append({
+                    'task_id': f"{depot[0]}:{i}",
+                    'depots': [(depot, part)],
+                    'stores': [(s[0], s[1], s[2]) for s in part],
+                })
+            continue
+        new_stores = [s for s in depot_stores if s[0] not in stores]
+        if len(depots) + len(stores) + 1 + len(new_stores) > max_locations:
+            flush()
+            new_stores = depot_stores
+        depots.append((depot, depot_stores))
+        for store_id, lon, lat, _, _ in new_stores:
+            stores[store_id] = (store_id, lon, lat)
+    flush()
+    return tasks
+
+
+def request_locations(task):
+    """Depot locations first, then the stores, as [lon, lat]"""
+    return (
+        [[lon, lat] for (_, lon, lat), _ in task['depots']]
+        + [[lon, lat] for _, lon, lat in task['stores']]
+    )
+
+
+def request_options(task):
+    """ORS matrix parameters restricting a request to depot -> store pairs"""
+    depot_count = len(task['depots'])
+    return {
+        'sources': list(range(depot_count)),
+        'destinations': list(range(depot_count, depot_count + len(task['stores']))),
+    }
+
+
+def matrix_rows(task, response):
+    """Turn an ORS depot x store matrix response into depot -> candidate store rows"""
+    durations = response.get('durations') or []
+    distances = response.get('distances')
+    store_index = {store_id: i for i, (store_id, _, _) in enumerate(task['stores'])}
+
+    rows = []
+    for i, ((depot_id, _, _), depot_stores) in enumerate(task['depots']):
+        for store_id, _, _, rank, straight_line_km in depot_stores:
+            j = store_index[store_id]
+            duration = durations[i][j]
+            if duration is None:
+                continue
+            distance = distances[i][j] if distances else None
+            rows.append((
+                depot_id,
+                store_id,
+                rank,
+                straight_line_km,
+                round(distance / 1000, 3) if distance is not None else None,
+                round(duration / 60, 2)
+            ))
+    return rows
+
+
+def finalize(session, staging_table, target_table):
+    """Replace the target matrix with the deduplicated staging results"""
+    session.sql(f"""
+        CREATE OR REPLACE TABLE {target_table}
+        CLUSTER BY (DEPOT_ID) AS
+        SELECT {', '.join(MATRIX_COLUMNS)}
+        FROM {staging_table}
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY DEPOT_ID, STORE_ID ORDER BY DURATION_MINUTES
+        ) = 1
+        ORDER BY DEPOT_ID, STORE_RANK
+    """).collect()
+    session.sql(f"DROP TABLE IF EXISTS {staging_table}").collect()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build an HGV depot-to-store matrix with ORS matrix calls")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--countries', nargs='+', default=['DE'], help="ISO codes of depots and stores")
+    parser.add_argument('--region', help="Profile Manager region (default: from the first country)")
+    parser.add_argument('--ors-profile', default='driving-hgv', help="ORS routing profile")
+    parser.add_argument('--target-table', default=TARGET_TABLE, help="Matrix table to build")
+    parser.add_argument('--nearest', type=int, default=10, help="Stores routed from each depot")
+    parser.add_argument('--search-resolution', type=int, default=6,
+                        help="H3 resolution of the nearest-store index (6: ~3.7 km cells)")
+    parser.add_argument('--search-rings', type=int, default=3,
+                        help="H3 rings searched around each depot")
+    parser.add_argument('--tile-resolution', type=int, default=4,
+                        help="H3 resolution used to order depots into requests")
+    parser.add_argument('--max-locations', type=int, default=50, help="Locations per ORS matrix request")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent ORS matrix requests")
+    parser.add_argument('--flush-every', type=int, default=50, help="Tasks per bulk insert/checkpoint")
+    parser.add_argument('--restart', action='store_true', help="Discard checkpointed progress")
+    parser.add_argument('--skip-profile-check', action='store_true',
+                        help="Do not require the region to be the active ORS profile")
+    args = parser.parse_args(argv)
+
+    args.countries = [code.upper() for code in args.countries]
+    args.region = args.region or COUNTRY_REGIONS.get(args.countries[0])
+    if not args.region:
+        parser.error(f"--region is required for country {args.countries[0]}")
+    if args.max_locations < 2:
+        parser.error("--max-locations must be at least 2")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    session = create_session(args.connection)
+    client = SnowflakeOrsClient(session)
+
+    if not region_exists(session, args.region):
+        print(f"❌ Region {args.region} not found in ORS_SPCS_STAGE")
+        return 1
+
+    if not args.skip_profile_check:
+        serving = active_region(session)
+        if serving != args.region:
+            print(f"❌ ORS is serving {serving}, not {args.region}. "
+                  f"Switch profiles in the Profile Manager first.")
+            return 1
+
+    staging_table = f"{args.target_table}_BUILD"
+    checkpoint = Checkpoint(session, f"{args.target_table}_BUILD_PROGRESS")
+
+    if args.restart:
+        session.sql(f"DROP TABLE IF EXISTS {staging_table}").collect()
+        checkpoint.drop()
+
+    session.sql(f"""
+        CREATE TABLE IF NOT EXISTS {staging_table} (
+            DEPOT_ID VARCHAR,
+            STORE_ID VARCHAR,
+            STORE_RANK NUMBER,
+            STRAIGHT_LINE_KM FLOAT,
+            DISTANCE_KM FLOAT,
+            DURATION_MINUTES FLOAT
+        )
+    """).collect()
+    checkpoint.create()
+
+    candidates = load_candidates(
+        session, args.countries, args.nearest,
+        args.search_resolution, args.search_rings, args.tile_resolution
+    )
+    tasks = build_tasks(candidates, args.max_locations)
+    done = checkpoint.completed()
+    pending = [task for task in tasks if task['task_id'] not in done]
+
+    pair_count = sum(len(stores) for _, stores in candidates)
+    print(f"🚚 {len(candidates):,} depots with {pair_count:,} candidate stores, "
+          f"{len(tasks):,} matrix requests ({len(done):,} already done)")
+
+    def request(task):
+        response = call_with_retries(
+            client.matrix, args.ors_profile, request_locations(task), request_options(task)
+        )
+        return matrix_rows(task, response)
+
+    start = time.perf_counter()
+    buffer, finished, failed, written = [], [], [], 0
+    for task, rows, error, seconds in run_parallel(request, pending, args.workers):
+        if error is not None:
+            failed.append(task['task_id'])
+            print(f"⚠️ {task['task_id']} failed: {error}")
+            continue
+        buffer.extend(rows)
+        finished.append((task['task_id'], len(rows), round(seconds, 3)))
+        if len(finished) >= args.flush_every:
+            written += bulk_insert(session, buffer, staging_table, MATRIX_COLUMNS)
+            checkpoint.mark(finished)
+            done_count = len(done) + len(finished)
+            print(f"⏳ {written:,} pairs written, {done_count:,}/{len(tasks):,} requests done "
+                  f"({time.perf_counter() - start:.0f}s)")
+            done.update(task_id for task_id, _, _ in finished)
+            buffer, finished = [], []
+
+    written += bulk_insert(session, buffer, staging_table, MATRIX_COLUMNS)
+    checkpoint.mark(finished)
+
+    if failed:
+        print(f"❌ {len(failed):,} requests failed; re-run the same command to resume")
+        return 1
+
+    finalize(session, staging_table, args.target_table)
+    checkpoint.drop()
+    print(f"✅ {args.target_table} rebuilt in {time.perf_counter() - start:.0f}s "
+          f"({written:,} pairs written this run)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""Pre-build ORS graphs for every staged profile that has none
+
+Each missing profile is built by its own job service (EXECUTE JOB SERVICE
+... ASYNC) running ORS in preparation mode, separate from the serving ORS
+service, so routing is never suspended for a build. Progress and build
+duration are published to FLEET_DEMOS.ROUTING.ORS_GRAPH_BUILDS, which the
+Profile Manager reads.
+
+Usage:
+    python routing/graph_builder.py                  # start builds for all missing profiles
+    python routing/graph_builder.py --wait           # ...and poll until they finish
+    python routing/graph_builder.py --profile germany --wait
+"""
+import argparse
+import re
+import sys
+import time
+
+from job_utils import create_session
+from ors_inventory import ORS_APP, missing_graph_profiles, profile_inventory
+from ors_status import ReadinessTracker, fetch_log_tail, read_configured_profiles
+from service_spec import DEFAULT_ROUTING_PROFILES, ors_service_spec, plan_sizing
+
+BUILDS_TABLE = "FLEET_DEMOS.ROUTING.ORS_GRAPH_BUILDS"
+ACTIVE_STATUSES = ['PENDING', 'RUNNING']
+
+
+def job_name(profile_name):
+    """Get the job service name building a profile's graphs"""
+    return "ORS_GRAPH_BUILD_" + re.sub(r'[^A-Za-z0-9]', '_', profile_name).upper()
+
+
+def ensure_builds_table(session):
+    session.sql(f"""
+        CREATE TABLE IF NOT EXISTS {BUILDS_TABLE} (
+            PROFILE VARCHAR,
+            JOB_SERVICE VARCHAR,
+            STATUS VARCHAR,
+            COMPUTE_POOL VARCHAR,
+            PROFILES_BUILT NUMBER,
+            TOTAL_PROFILES NUMBER,
+            STARTED_AT TIMESTAMP_NTZ,
+            FINISHED_AT TIMESTAMP_NTZ,
+            BUILD_SECONDS NUMBER,
+            DETAILS VARCHAR,
+            UPDATED_AT TIMESTAMP_NTZ
+        )
+    """).collect()
+
+
+def get_builds(session, active_only=False):
+    """Get the latest build of every profile"""
+    where = f"WHERE STATUS IN ({', '.join(repr(s) for s in ACTIVE_STATUSES)})" if active_only else ""
+    result = session.sql(f"""
+        SELECT *
+        FROM {BUILDS_TABLE}
+        {where}
+        ORDER BY STARTED_AT DESC
+    """).collect()
+    return [row.as_dict() for row in result]
+
+
+def _update_build(session, profile_name, **fields):
+    assignments = ", ".join(
+        f"{column.upper()} = {_sql_value(value)}" for column, value in fields.items()
+    )
+    session.sql(f"""
+        UPDATE {BUILDS_TABLE}
+        SET {assignments}, UPDATED_AT = CURRENT_TIMESTAMP()
+        WHERE PROFILE = '{profile_name}'
+    """).collect()
+
+
+def _sql_value(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if value == 'CURRENT_TIMESTAMP()':
+        return value
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _pick_compute_pool(session, sizing):
+    """Use the sizing tier's pool when it exists, otherwise the ORS service's pool"""
+    result = session.sql(f"SHOW COMPUTE POOLS LIKE '{sizing['compute_pool']}'").collect()
+    if result:
+        return sizing['compute_pool']
+    result = session.sql(f"SHOW SERVICES LIKE 'ORS_SERVICE' IN SCHEMA {ORS_APP}").collect()
+    return result[0]['compute_pool']
+
+
+def start_build(session, profile_name, details, compute_pool=None):
+    """Start an asynchronous graph build job for one profile"""
+    routing_profiles = read_configured_profiles(session, profile_name)
+    sizing = plan_sizing(details['map_size'], len(routing_profiles) or DEFAULT_ROUTING_PROFILES)
+    compute_pool = compute_pool or _pick_compute_pool(session, sizing)
+    job = job_name(profile_name)
+
+    ensure_builds_table(session)
+
+    # Finished job services keep their name until dropped
+    session.sql(f"DROP SERVICE IF EXISTS {ORS_APP}.{job}").collect()
+    session.sql(f"""
+        EXECUTE JOB SERVICE
+        IN COMPUTE POOL {compute_pool}
+        NAME = {ORS_APP}.{job}
+        ASYNC = TRUE
+        FROM SPECIFICATION $$
+{ors_service_spec(profile_name, sizing, build_graphs=True)}
+$$
+    """).collect()
+
+    session.sql(f"DELETE FROM {BUILDS_TABLE} WHERE PROFILE = '{profile_name}'").collect()
+    session.sql(f"""
+        INSERT INTO {BUILDS_TABLE}
+            (PROFILE, JOB_SERVICE, STATUS, COMPUTE_POOL, PROFILES_BUILT, TOTAL_PROFILES,
+             STARTED_AT, DETAILS, UPDATED_AT)
+        SELECT
+            '{profile_name}', '{job}', 'PENDING', '{compute_pool}', 0, {len(routing_profiles)},
+            CURRENT_TIMESTAMP(), 'Job submitted', CURRENT_TIMESTAMP()
+    """).collect()
+    return job
+
+
+def job_status(session, job):
+    result = session.sql(f"SHOW JOB SERVICES LIKE '{job}' IN SCHEMA {ORS_APP}").collect()
+    return result[0]['status'] if result else 'UNKNOWN'
+
+
+def build_progress(session, build):
+    """Get the current status, profiles built and details of an active build from its job"""
+    status = job_status(session, build['JOB_SERVICE'])
+    if status == 'DONE':
+        return {'status': 'DONE', 'profiles_built': build['TOTAL_PROFILES'], 'details': 'Graphs built'}
+    if status in ['FAILED', 'INTERNAL_ERROR', 'UNKNOWN']:
+        return {'status': 'FAILED', 'profiles_built': build['PROFILES_BUILT'], 'details': f"Job status {status}"}
+    tracker = ReadinessTracker([])
+    tracker.consume(fetch_log_tail(session, 1000, f"{ORS_APP}.{build['JOB_SERVICE']}"))
+    progress = tracker.status()
+    return {
+        'status': 'RUNNING' if status == 'RUNNING' else 'PENDING',
+        'profiles_built': progress['profiles_loaded'],
+        'details': progress['details'] or status,
+    }
+
+
+def refresh_builds(session):
+    """Update progress of active builds from their job status and logs, then return all builds"""
+    for build in get_builds(session, active_only=True):
+        profile_name = build['PROFILE']
+        progress = build_progress(session, build)
+        if progress['status'] in ACTIVE_STATUSES:
+            _update_build(session, profile_name, **progress)
+            continue
+        _update_build(session, profile_name, finished_at='CURRENT_TIMESTAMP()', **progress)
+        if progress['status'] == 'DONE':
+            session.sql(f"""
+                UPDATE {BUILDS_TABLE}
+                SET BUILD_SECONDS = DATEDIFF(SECOND, STARTED_AT, FINISHED_AT)
+                WHERE PROFILE = '{profile_name}'
+            """).collect()
+    return get_builds(session)
+
+
+def current_builds(session):
+    """Get the latest build of every profile with live progress, without writing
+
+    Active builds show their job's progress; the table itself is only
+    updated by refresh_builds (graph_builder.py --wait).
+    """
+    builds = get_builds(session)
+    for build in builds:
+        if build['STATUS'] in ACTIVE_STATUSES:
+            build.update({column.upper(): value for column, value in build_progress(session, build).items()})
+    return builds
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-build ORS graphs for staged profiles")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--profile', action='append', help="Profile to build (default: all missing)")
+    parser.add_argument('--compute-pool', help="Compute pool for the build jobs")
+    parser.add_argument('--wait', action='store_true', help="Poll until all builds finish")
+    parser.add_argument('--poll-seconds', type=int, default=30)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    session = create_session(args.connection)
+    ensure_builds_table(session)
+
+    inventory = profile_inventory(session)
+    targets = args.profile or missing_graph_profiles(inventory)
+    active = {build['PROFILE'] for build in refresh_builds(session) if build['STATUS'] in ACTIVE_STATUSES}
+
+    for profile_name in targets:
+        if profile_name not in inventory:
+            print(f"⚠️ {profile_name} not found in the profile stage")
+        elif profile_name in active:
+            print(f"⏳ {profile_name} is already building")
+        else:
+            job = start_build(session, profile_name, inventory[profile_name], args.compute_pool)
+            print(f"🏗️ Started {job} for {profile_name}")
+
+    if not targets:
+        print("✅ All staged profiles already have graphs")
+
+    if not args.wait:
+        return 0
+
+    while True:
+        builds = [b for b in refresh_builds(session) if b['PROFILE'] in targets]
+        for build in builds:
+            print(f"{build['PROFILE']}: {build['STATUS']} - {build['DETAILS']}")
+        if not any(build['STATUS'] in ACTIVE_STATUSES for build in builds):
+            break
+        time.sleep(args.poll_seconds)
+
+    for build in builds:
+        if build['STATUS'] == 'DONE':
+            print(f"✅ {build['PROFILE']} built in {build['BUILD_SECONDS']}s")
+    return 1 if any(build['STATUS'] == 'FAILED' for build in builds) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
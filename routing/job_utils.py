@@ -0,0 +1,121 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from snowflake.snowpark import Session
+
+
+def create_session(connection_name=None):
+    """Create a Snowpark session from connections.toml (default connection if no name)"""
+    builder = Session.builder
+    if connection_name:
+        builder = builder.config("connection_name", connection_name)
+    return builder.getOrCreate()
+
+
+def split_table_name(table_name):
+    """Split DB.SCHEMA.TABLE into its parts"""
+    parts = table_name.split('.')
+    if len(parts) != 3:
+        raise ValueError(f"Expected a fully qualified table name, got {table_name}")
+    return parts
+
+
+def bulk_insert(session, rows, table_name, columns):
+    """Append rows (list of tuples) to an existing table with a single bulk load"""
+    if not rows:
+        return 0
+    database, schema, table = split_table_name(table_name)
+    df = pd.DataFrame(rows, columns=columns)
+    session.write_pandas(
+        df,
+        table,
+        database=database,
+        schema=schema,
+        quote_identifiers=False
+    )
+    return len(df)
+
+
+class Checkpoint:
+    """Progress table recording which task ids of a batch job have completed
+
+    Results are written before their task ids, so a crash between the two
+    writes can only cause a task to be re-run (duplicates), never skipped.
+    """
+
+    def __init__(self, session, table_name):
+        self.session = session
+        self.table_name = table_name
+
+    def create(self):
+        self.session.sql(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                TASK_ID VARCHAR,
+                ROW_COUNT NUMBER,
+                ELAPSED_SECONDS FLOAT,
+                ERROR VARCHAR,
+                COMPLETED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+            )
+        """).collect()
+        # Progress tables of runs started before ERROR existed
+        self.session.sql(f"ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS ERROR VARCHAR").collect()
+
+    def completed(self):
+        """Get the set of completed task ids"""
+        result = self.session.sql(f"SELECT DISTINCT TASK_ID FROM {self.table_name}").collect()
+        return {row['TASK_ID'] for row in result}
+
+    def mark(self, entries):
+        """Record completed tasks as (task_id, row_count, elapsed_seconds[, error]) tuples
+
+        A task that can never succeed is completed with its error, so
+        resumed runs skip it.
+        """
+        return bulk_insert(
+            self.session,
+            [tuple(entry) + (None,) * (4 - len(entry)) for entry in entries],
+            self.table_name,
+            ['TASK_ID', 'ROW_COUNT', 'ELAPSED_SECONDS', 'ERROR']
+        )
+
+    def drop(self):
+        self.session.sql(f"DROP TABLE IF EXISTS {self.table_name}").collect()
+
+
+def call_with_retries(func, *args, attempts=3, backoff_seconds=2.0, retryable=None):
+    """Call func, retrying with exponential backoff on any exception
+
+    retryable(exception), when given, decides whether an exception is worth
+    another attempt; the others are raised at once.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == attempts or (retryable and not retryable(e)):
+                raise
+            time.sleep(backoff_seconds * 2 ** (attempt - 1))
+
+
+def run_parallel(func, tasks, workers):
+    """Run func(task) with bounded parallelism, yielding (task, result, error, seconds)
+
+    Results are yielded as they complete; a failing task yields its
+    exception instead of stopping the whole batch.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for task in tasks:
+            futures[executor.submit(_timed, func, task)] = task
+        for future in as_completed(futures):
+            result, error, seconds = future.result()
+            yield futures[future], result, error, seconds
+
+
+def _timed(func, task):
+    start = time.perf_counter()
+    try:
+        return func(task), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
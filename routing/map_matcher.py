@@ -0,0 +1,418 @@
+"""Match GeoLife trips to the ORS road network and store the matched geometry and length per trip
+
+ORS has no map-matching endpoint, so a trip is matched by routing through
+its own GPS track: points are thinned in SQL to one waypoint every
+--spacing-m meters of recorded path (plus the last point), and the route
+through them with the trip mode's profile follows the roads the trip
+used. Waypoints are split into chained chunks of at most --max-waypoints
+(the ORS limit per request); chunks of all trips run with bounded
+parallelism and are stitched back together per trip.
+
+Only trips that start and end inside the region ORS is serving are
+matched. Like matrix_builder.py, finished trips are checkpointed and bulk
+loaded into a staging table; at the end they replace their rows in
+GEOLIFE_MATCHED, so runs for other regions or modes are kept.
+
+A trip ORS cannot route (no road near a waypoint, no connecting route) is
+checkpointed with no rows and its error, and is not matched (its earlier
+GEOLIFE_MATCHED row, if any, is removed at the end); only
+transient failures (timeouts, server errors) stop the run before the
+matched trips are written, to be resumed by running it again.
+
+By default requests go through the native app's DIRECTIONS function. With
+--local they go to an ORS REST API instead, e.g. ors_http_standin.py; add
+--synthetic-trips to run without Snowflake (results are then only printed
+or written to --output).
+
+Usage:
+    python routing/map_matcher.py --modes driving_urban driving_highway --workers 8
+    python routing/ors_http_standin.py --workers 4 &
+    python routing/map_matcher.py --local http://localhost:8082/ors --synthetic-trips 200 \\
+        --region germany --output matched.json
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from job_utils import Checkpoint, bulk_insert, call_with_retries, create_session, run_parallel
+from ors_client import HttpOrsClient, OrsError, SnowflakeOrsClient
+from service_snapshot import active_region
+from warmup import REGION_BOUNDS
+
+TRIPS_TABLE = "FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS"
+POINTS_TABLE = "FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN"
+TARGET_TABLE = "FLEET_DEMOS.ROUTING.GEOLIFE_MATCHED"
+
+# Routing profile per classified mode; other modes have no road network to match
+MODE_PROFILES = {
+    'walking': 'foot-walking',
+    'running': 'foot-walking',
+    'cycling': 'cycling-electric',
+    'driving_urban': 'driving-car',
+    'driving_highway': 'driving-car',
+}
+
+MATCH_COLUMNS = [
+    'UID', 'TID', 'TRIP_ID', 'ROUTING_PROFILE', 'WAYPOINT_COUNT', 'GPS_LENGTH_KM',
+    'MATCHED_LENGTH_KM', 'MATCHED_DURATION_MINUTES', 'MATCHED_GEOJSON'
+]
+
+
+def load_trips(session, bounds, modes, spacing_m, limit=None):
+    """Get the thinned waypoints of the trips inside bounds
+
+    Returns a list of dicts with uid, tid, trip_id, mode, gps_km and
+    waypoints ([lon, lat] in time order).
+    """
+    min_lon, min_lat, max_lon, max_lat = bounds
+    mode_list = ", ".join(f"'{mode}'" for mode in modes)
+    result = session.sql(f"""
+        WITH trips AS (
+            SELECT UID, TID, trip_id, transportation_mode
+            FROM {TRIPS_TABLE}
+            WHERE transportation_mode IN ({mode_list})
+                AND start_lng BETWEEN {min_lon} AND {max_lon}
+                AND start_lat BETWEEN {min_lat} AND {max_lat}
+                AND end_lng BETWEEN {min_lon} AND {max_lon}
+                AND end_lat BETWEEN {min_lat} AND {max_lat}
+            ORDER BY trip_id
+            {f'LIMIT {limit}' if limit else ''}
+        ),
+        points AS (
+            SELECT
+                g.UID,
+                g.TID,
+                g.EVENT_TIMESTAMP,
+                g.LNG,
+                g.LAT,
+                SUM(IFF(g.SPEED >= 0, g.SPEED * g.TIME_LAG / 3600, 0)) OVER (
+                    PARTITION BY g.UID, g.TID ORDER BY g.EVENT_TIMESTAMP
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) AS gps_km,
+                ROW_NUMBER() OVER (
+                    PARTITION BY g.UID, g.TID ORDER BY g.EVENT_TIMESTAMP DESC
+                ) = 1 AS is_last
+            FROM {POINTS_TABLE} g
+            INNER JOIN trips t
+                ON t.UID = g.UID
+                AND t.TID = g.TID
+        ),
+        waypoints AS (
+            SELECT *
+            FROM points
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY UID, TID, FLOOR(gps_km * 1000 / {spacing_m})
+                ORDER BY EVENT_TIMESTAMP
+            ) = 1
+                OR is_last
+        )
+        SELECT
+            t.UID,
+            t.TID,
+            t.trip_id,
+            t.transportation_mode,
+            ROUND(MAX(w.gps_km), 3) AS gps_km,
+            ARRAY_AGG(ARRAY_CONSTRUCT(w.LNG, w.LAT))
+                WITHIN GROUP (ORDER BY w.EVENT_TIMESTAMP) AS waypoints
+        FROM waypoints w
+        INNER JOIN trips t
+            ON t.UID = w.UID
+            AND t.TID = w.TID
+        GROUP BY t.UID, t.TID, t.trip_id, t.transportation_mode
+        HAVING COUNT(*) > 1
+    """).collect()
+    return [
+        {
+            'uid': row['UID'],
+            'tid': row['TID'],
+            'trip_id': row['TRIP_ID'],
+            'mode': row['TRANSPORTATION_MODE'],
+            'gps_km': float(row['GPS_KM']),
+            'waypoints': json.loads(row['WAYPOINTS']) if isinstance(row['WAYPOINTS'], str) else row['WAYPOINTS'],
+        }
+        for row in result
+    ]
+
+
+def synthetic_trips(bounds, count, spacing_m, seed=0):
+    """Generate random-walk trips inside bounds for runs without Snowflake"""
+    rng = random.Random(seed)
+    min_lon, min_lat, max_lon, max_lat = bounds
+    modes = sorted(MODE_PROFILES)
+    trips = []
+    for i in range(count):
+        lon, lat = rng.uniform(min_lon, max_lon), rng.uniform(min_lat, max_lat)
+        heading = rng.uniform(0, 2 * math.pi)
+        step = spacing_m / 111320
+        waypoints = [[round(lon, 6), round(lat, 6)]]
+        for _ in range(rng.randint(10, 300)):
+            heading += rng.gauss(0, 0.3)
+            lon += step * math.cos(heading) / math.cos(math.radians(lat))
+            lat += step * math.sin(heading)
+            waypoints.append([round(lon, 6), round(lat, 6)])
+        trips.append({
+            'uid': f"{i % 182:03d}",
+            'tid': f"synthetic-{i}",
+            'trip_id': f"{i % 182:03d}-synthetic-{i}",
+            'mode': modes[i % len(modes)],
+            'gps_km': round((len(waypoints) - 1) * spacing_m / 1000, 3),
+            'waypoints': waypoints,
+        })
+    return trips
+
+
+def chunk_waypoints(waypoints, max_waypoints):
+    """Split waypoints into chained chunks; each chunk starts at the last point of the previous one"""
+    step = max_waypoints - 1
+    return [
+        waypoints[i:i + max_waypoints]
+        for i in range(0, max(1, len(waypoints) - 1), step)
+    ]
+
+
+def build_tasks(trips, max_waypoints, profile=None):
+    """One routing request per waypoint chunk of every trip"""
+    tasks = []
+    for trip in trips:
+        chunks = chunk_waypoints(trip['waypoints'], max_waypoints)
+        for chunk_no, coordinates in enumerate(chunks):
+            tasks.append({
+                'trip_id': trip['trip_id'],
+                'chunk_no': chunk_no,
+                'chunks': len(chunks),
+                'profile': profile or MODE_PROFILES[trip['mode']],
+                'coordinates': coordinates,
+            })
+    return tasks
+
+
+def route_part(response):
+    """Get (coordinates, meters, seconds) of an ORS GeoJSON directions response"""
+    feature = response['features'][0]
+    summary = feature['properties'].get('summary', {})
+    return (
+        feature['geometry']['coordinates'],
+        summary.get('distance', 0),
+        summary.get('duration', 0),
+    )
+
+
+def match_row(trip, profile, parts):
+    """Stitch the routed chunks of a trip (in chunk order) into one target row"""
+    coordinates = []
+    for part_coordinates, _, _ in parts:
+        if coordinates and part_coordinates and coordinates[-1] == part_coordinates[0]:
+            part_coordinates = part_coordinates[1:]
+        coordinates.extend(part_coordinates)
+    return (
+        trip['uid'],
+        trip['tid'],
+        trip['trip_id'],
+        profile,
+        len(trip['waypoints']),
+        trip['gps_km'],
+        round(sum(meters for _, meters, _ in parts) / 1000, 3),
+        round(sum(seconds for _, _, seconds in parts) / 60, 2),
+        json.dumps({'type': 'LineString', 'coordinates': coordinates}),
+    )
+
+
+def finalize(session, staging_table, target_table, progress_table):
+    """Replace the target rows of the matched trips with the staging results
+
+    Trips checkpointed as unroutable in progress_table lose their target
+    rows, which an earlier run may have matched with other data.
+    """
+    session.sql(f"""
+        DELETE FROM {target_table}
+        WHERE TRIP_ID IN (SELECT TRIP_ID FROM {staging_table})
+            OR TRIP_ID IN (SELECT TASK_ID FROM {progress_table} WHERE ERROR IS NOT NULL)
+    """).collect()
+    session.sql(f"""
+        INSERT INTO {target_table}
+            (UID, TID, TRIP_ID, ROUTING_PROFILE, WAYPOINT_COUNT, GPS_LENGTH_KM,
+             MATCHED_LENGTH_KM, MATCHED_DURATION_MINUTES, MATCHED_GEOMETRY)
+        SELECT
+            UID,
+            TID,
+            TRIP_ID,
+            ROUTING_PROFILE,
+            WAYPOINT_COUNT,
+            GPS_LENGTH_KM,
+            MATCHED_LENGTH_KM,
+            MATCHED_DURATION_MINUTES,
+            TO_GEOGRAPHY(MATCHED_GEOJSON, TRUE)
+        FROM {staging_table}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY TRIP_ID ORDER BY MATCHED_LENGTH_KM) = 1
+        ORDER BY UID, TID
+    """).collect()
+    session.sql(f"DROP TABLE IF EXISTS {staging_table}").collect()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match GeoLife trips to the ORS road network")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--region', help="Region whose trips are matched (default: the one ORS is serving)")
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODE_PROFILES), default=sorted(MODE_PROFILES),
+                        help="Trip modes to match")
+    parser.add_argument('--ors-profile', help="Route every trip with this profile instead of its mode's")
+    parser.add_argument('--target-table', default=TARGET_TABLE, help="Matched trips table")
+    parser.add_argument('--limit', type=int, help="Match at most this many trips")
+    parser.add_argument('--spacing-m', type=float, default=200, help="Recorded path between waypoints")
+    parser.add_argument('--max-waypoints', type=int, default=50, help="Waypoints per ORS request")
+    parser.add_argument('--snap-radius-m', type=float, default=350,
+                        help="How far a waypoint may be from a road (-1: unlimited)")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent ORS requests")
+    parser.add_argument('--flush-every', type=int, default=200, help="Trips per bulk insert/checkpoint")
+    parser.add_argument('--restart', action='store_true', help="Discard checkpointed progress")
+    parser.add_argument('--local', metavar='URL',
+                        help="ORS API to call instead of the native app, e.g. http://localhost:8082/ors")
+    parser.add_argument('--synthetic-trips', type=int, metavar='N',
+                        help="With --local: N random-walk trips in --region, no Snowflake")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the matched trips to a JSON file")
+    args = parser.parse_args(argv)
+
+    if args.synthetic_trips and not args.local:
+        parser.error("--synthetic-trips requires --local")
+    if args.synthetic_trips and not args.region:
+        parser.error("--synthetic-trips requires --region")
+    if args.max_waypoints < 2:
+        parser.error("--max-waypoints must be at least 2")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    offline = bool(args.synthetic_trips)
+    session = None if offline else create_session(args.connection)
+
+    serving = active_region(session) if session and not args.local else None
+    region = args.region or serving
+    if region not in REGION_BOUNDS:
+        print(f"❌ No bounds for region {region}; known regions: {', '.join(REGION_BOUNDS)}")
+        return 1
+    if serving and serving != region:
+        print(f"❌ ORS is serving {serving}, not {region}. "
+              f"Switch profiles in the Profile Manager first.")
+        return 1
+    bounds = REGION_BOUNDS[region]
+
+    staging_table = f"{args.target_table}_BUILD"
+    checkpoint = Checkpoint(session, f"{args.target_table}_BUILD_PROGRESS") if session else None
+    done = set()
+    if session:
+        if args.restart:
+            session.sql(f"DROP TABLE IF EXISTS {staging_table}").collect()
+            checkpoint.drop()
+        session.sql(f"""
+            CREATE TABLE IF NOT EXISTS {staging_table} (
+                UID VARCHAR,
+                TID VARCHAR,
+                TRIP_ID VARCHAR,
+                ROUTING_PROFILE VARCHAR,
+                WAYPOINT_COUNT NUMBER,
+                GPS_LENGTH_KM FLOAT,
+                MATCHED_LENGTH_KM FLOAT,
+                MATCHED_DURATION_MINUTES FLOAT,
+                MATCHED_GEOJSON VARCHAR
+            )
+        """).collect()
+        checkpoint.create()
+        done = checkpoint.completed()
+
+    if offline:
+        trips = synthetic_trips(bounds, args.synthetic_trips, args.spacing_m, args.seed)
+    else:
+        trips = load_trips(session, bounds, args.modes, args.spacing_m, args.limit)
+    trips = {trip['trip_id']: trip for trip in trips if trip['trip_id'] not in done}
+    tasks = build_tasks(trips.values(), args.max_waypoints, args.ors_profile)
+    print(f"🛣️ {region}: {len(trips):,} trips to match in {len(tasks):,} requests "
+          f"({len(done):,} already done)")
+
+    client = HttpOrsClient(args.local) if args.local else SnowflakeOrsClient(session)
+
+    def request(task):
+        options = {
+            'instructions': False,
+            'radiuses': [args.snap_radius_m] * len(task['coordinates']),
+        }
+        response = call_with_retries(
+            client.route, task['profile'], task['coordinates'], options,
+            retryable=lambda e: not (isinstance(e, OrsError) and e.unroutable)
+        )
+        return route_part(response)
+
+    start = time.perf_counter()
+    parts, seconds_per_trip, failed, unroutable = {}, {}, set(), {}
+    buffer, finished, matched = [], [], []
+    for task, part, error, seconds in run_parallel(request, tasks, args.workers):
+        trip_id = task['trip_id']
+        if trip_id in failed or trip_id in unroutable:
+            continue
+        seconds_per_trip[trip_id] = seconds_per_trip.get(trip_id, 0) + seconds
+        if isinstance(error, OrsError) and error.unroutable:
+            print(f"🚫 {trip_id} chunk {task['chunk_no']} cannot be routed: {error}")
+            unroutable[trip_id] = str(error)
+            parts.pop(trip_id, None)
+            finished.append((trip_id, 0, round(seconds_per_trip.pop(trip_id), 3), str(error)[:1000]))
+            continue
+        if error is not None:
+            print(f"⚠️ {trip_id} chunk {task['chunk_no']} failed: {error}")
+            failed.add(trip_id)
+            parts.pop(trip_id, None)
+            continue
+        parts.setdefault(trip_id, {})[task['chunk_no']] = part
+        if len(parts[trip_id]) < task['chunks']:
+            continue
+
+        trip_parts = parts.pop(trip_id)
+        trip_parts = [trip_parts[i] for i in range(task['chunks'])]
+        buffer.append(match_row(trips[trip_id], task['profile'], trip_parts))
+        finished.append((trip_id, 1, round(seconds_per_trip.pop(trip_id), 3)))
+        if len(finished) >= args.flush_every:
+            if session:
+                bulk_insert(session, buffer, staging_table, MATCH_COLUMNS)
+                checkpoint.mark(finished)
+            matched.extend(buffer)
+            print(f"⏳ {len(matched):,}/{len(trips):,} trips matched ({time.perf_counter() - start:.0f}s)")
+            buffer, finished = [], []
+
+    if session:
+        bulk_insert(session, buffer, staging_table, MATCH_COLUMNS)
+        checkpoint.mark(finished)
+    matched.extend(buffer)
+    wall_seconds = time.perf_counter() - start
+
+    gps_km = sum(row[5] for row in matched)
+    matched_km = sum(row[6] for row in matched)
+    print(f"⏱️ {len(matched):,} trips matched in {wall_seconds:.1f}s: "
+          f"{gps_km:,.1f} km recorded, {matched_km:,.1f} km on the road network")
+    if unroutable:
+        print(f"🚫 {len(unroutable):,} trips cannot be routed and are left out")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'region': region,
+                'wall_seconds': round(wall_seconds, 3),
+                'trips': [dict(zip(MATCH_COLUMNS, row)) for row in matched],
+                'unroutable': unroutable,
+            }, f)
+        print(f"✅ Wrote matched trips to {args.output}")
+
+    if failed:
+        print(f"❌ {len(failed):,} trips failed on transient errors; re-run the same command to resume")
+        return 1
+    if session:
+        finalize(session, staging_table, args.target_table, checkpoint.table_name)
+        checkpoint.drop()
+        print(f"✅ {args.target_table} updated")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""Build or refresh an H3 travel-time matrix (e.g. SF_TRAVEL_TIME_MATRIX) with ORS matrix calls
+
+Origins and destinations are tiled by their H3 parent cell. Every pair of
+neighboring tiles becomes one (or a few) ORS matrix requests, run with
+bounded parallelism. Progress is checkpointed so a failed build resumes
+where it stopped, results are bulk loaded into a staging table, and the
+target table is replaced in one statement once every tile is done.
+
+Tiles are paired out to the reach the matrix consumers read: the Travel
+Time Analysis page (up to 50 hexagon rings) and the 15-minute counts in
+SF_ACCESSIBILITY. --tile-rings defaults to the ring count covering that
+reach; a smaller value is refused unless --allow-partial-coverage is set.
+
+Usage:
+    python routing/matrix_builder.py --region SanFrancisco --ors-profile cycling-electric
+    python routing/matrix_builder.py --region germany --ors-profile driving-car \\
+        --hex-table FLEET_DEMOS.ROUTING.BERLIN_HEXAGONS \\
+        --target-table FLEET_DEMOS.ROUTING.BERLIN_TRAVEL_TIME_MATRIX
+"""
+import argparse
+import math
+import sys
+import time
+
+from ors_client import ORS_APP, SnowflakeOrsClient
+from job_utils import (
+    Checkpoint,
+    bulk_insert,
+    call_with_retries,
+    create_session,
+    run_parallel,
+)
+from service_snapshot import active_region
+
+# Hexagon and matrix tables per Profile Manager region
+CITY_TABLES = {
+    'SanFrancisco': (
+        'FLEET_DEMOS.ROUTING.SF_HEXAGONS',
+        'FLEET_DEMOS.ROUTING.SF_TRAVEL_TIME_MATRIX'
+    ),
+}
+
+MATRIX_COLUMNS = ['ORIGIN_HEX', 'DEST_HEX', 'DISTANCE_KM', 'DURATION_MINUTES']
+
+# Average H3 hexagon edge length (km) per resolution
+H3_EDGE_KM = {5: 8.544, 6: 3.229, 7: 1.220, 8: 0.461, 9: 0.174, 10: 0.066}
+
+# Largest reach read from the matrix: the Travel Time Analysis ring slider
+# maximum and the longest SF_ACCESSIBILITY reach (REACHABLE_15_MIN)
+TRAVEL_TIME_MAX_RINGS = 50
+ACCESSIBILITY_MAX_MINUTES = 15
+
+# Top straight-line speed (km/h) per ORS profile, for the accessibility reach
+PROFILE_REACH_KMH = {
+    'cycling-electric': 25,
+    'cycling-regular': 20,
+    'cycling-road': 25,
+    'cycling-mountain': 18,
+    'foot-walking': 6,
+    'foot-hiking': 6,
+    'wheelchair': 5,
+    'driving-car': 60,
+    'driving-hgv': 50,
+}
+
+
+def region_exists(session, region):
+    """Check that the region has an ORS config in the profile stage"""
+    result = session.sql(f"""
+        LIST @{ORS_APP}.ORS_SPCS_STAGE/{region}/ PATTERN = '.*ors-config.yml'
+    """).collect()
+    return len(result) > 0
+
+
+def hex_resolution(session, hex_table):
+    """H3 resolution of the hexagons in the table"""
+    row = session.sql(f"""
+        SELECT H3_GET_RESOLUTION(HEX_ID) AS RES FROM {hex_table} LIMIT 1
+    """).collect()
+    return int(row[0]['RES']) if row else None
+
+
+def required_reach_km(hex_res, profile):
+    """Longest origin-destination distance (km) any matrix consumer reads"""
+    ring_reach = TRAVEL_TIME_MAX_RINGS * math.sqrt(3) * H3_EDGE_KM[hex_res]
+    speed = PROFILE_REACH_KMH.get(profile, max(PROFILE_REACH_KMH.values()))
+    return max(ring_reach, speed * ACCESSIBILITY_MAX_MINUTES / 60)
+
+
+def coverage_km(tile_resolution, tile_rings):
+    """Distance every hexagon pair within tile_rings tiles is guaranteed to cover
+
+    Tile centers k rings apart are at least 1.5 * edge * k apart, and each
+    hexagon may sit up to one edge away from its tile center.
+    """
+    edge = H3_EDGE_KM[tile_resolution]
+    return max(0.0, 1.5 * edge * tile_rings - 2 * edge)
+
+
+def rings_for_reach(tile_resolution, reach_km):
+    """Smallest tile ring count whose coverage reaches reach_km"""
+    edge = H3_EDGE_KM[tile_resolution]
+    return max(1, math.ceil((reach_km + 2 * edge) / (1.5 * edge)))
+
+
+def load_tiles(session, hex_table, tile_resolution, tile_rings):
+    """Group hexagons by H3 parent tile and list neighboring tile pairs (a <= b)"""
+    hexes = session.sql(f"""
+        SELECT
+            HEX_ID,
+            LONGITUDE,
+            LATITUDE,
+            H3_CELL_TO_PARENT(HEX_ID, {tile_resolution}) AS TILE
+        FROM {hex_table}
+        ORDER BY TILE, HEX_ID
+    """).collect()
+
+    tiles = {}
+    for row in hexes:
+        tiles.setdefault(row['TILE'], []).append(
+            (row['HEX_ID'], float(row['LONGITUDE']), float(row['LATITUDE']))
+        )
+
+    pairs = session.sql(f"""
+        WITH tiles AS (
+            SELECT DISTINCT H3_CELL_TO_PARENT(HEX_ID, {tile_resolution}) AS TILE
+            FROM {hex_table}
+        )
+        SELECT DISTINCT t.TILE AS TILE_A, n.VALUE::STRING AS TILE_B
+        FROM tiles t,
+            LATERAL FLATTEN(input => H3_GRID_DISK(t.TILE, {tile_rings})) n
+        WHERE n.VALUE::STRING IN (SELECT TILE FROM tiles)
+            AND t.TILE <= n.VALUE::STRING
+        ORDER BY TILE_A, TILE_B
+    """).collect()
+
+    return tiles, [(row['TILE_A'], row['TILE_B']) for row in pairs]
+
+
+def chunk(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_tasks(tiles, tile_pairs, max_locations):
+    """Split tile pairs into ORS requests of at most max_locations locations
+
+    A request over the locations A + B returns A->B and B->A in one call,
+    so each unordered pair of chunks is requested once.
+    """
+    half = max(1, max_locations // 2)
+    tasks = []
+    for tile_a, tile_b in tile_pairs:
+        if tile_a == tile_b:
+            chunks = chunk(tiles[tile_a], half)
+            for i in range(len(chunks)):
+                for j in range(i, len(chunks)):
+                    tasks.append({
+                        'task_id': f"{tile_a}:{tile_b}:{i}:{j}",
+                        'group_a': chunks[i],
+                        'group_b': chunks[j] if j != i else None,
+                    })
+        else:
+            for i, chunk_a in enumerate(chunk(tiles[tile_a], half)):
+                for j, chunk_b in enumerate(chunk(tiles[tile_b], half)):
+                    tasks.append({
+                        'task_id': f"{tile_a}:{tile_b}:{i}:{j}",
+                        'group_a': chunk_a,
+                        'group_b': chunk_b,
+                    })
+    return tasks
+
+
+def matrix_rows(task, response):
+    """Turn an ORS matrix response into (origin, dest, km, minutes) rows"""
+    locations = task['group_a'] + (task['group_b'] or [])
+    durations = response.get('durations') or []
+    distances = response.get('distances')
+
+    if task['group_b'] is None:
+        pairs = [(i, j) for i in range(len(locations)) for j in range(len(locations))]
+    else:
+        n_a = len(task['group_a'])
+        pairs = [
+            (i, j)
+            for i in range(len(locations))
+            for j in range(len(locations))
+            if (i < n_a) != (j < n_a)
+        ]
+
+    rows = []
+    for i, j in pairs:
+        if i == j:
+            continue
+        duration = durations[i][j]
+        if duration is None:
+            continue
+        distance = distances[i][j] if distances else None
+        rows.append((
+            locations[i][0],
+            locations[j][0],
+            round(distance / 1000, 3) if distance is not None else None,
+            round(duration / 60, 2)
+        ))
+    return rows
+
+
+def finalize(session, staging_table, target_table):
+    """Replace the target matrix with the deduplicated staging results"""
+    session.sql(f"""
+        CREATE OR REPLACE TABLE {target_table}
+        CLUSTER BY (ORIGIN_HEX) AS
+        SELECT ORIGIN_HEX, DEST_HEX, DISTANCE_KM, DURATION_MINUTES
+        FROM {staging_table}
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY ORIGIN_HEX, DEST_HEX ORDER BY DURATION_MINUTES
+        ) = 1
+        ORDER BY ORIGIN_HEX, DEST_HEX
+    """).collect()
+    # Single-origin lookups from the Travel Time Analysis page
+    session.sql(f"ALTER TABLE {target_table} ADD SEARCH OPTIMIZATION ON EQUALITY(ORIGIN_HEX)").collect()
+    session.sql(f"DROP TABLE IF EXISTS {staging_table}").collect()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build an H3 travel-time matrix with ORS matrix calls")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--region', required=True, help="Profile Manager region, e.g. SanFrancisco")
+    parser.add_argument('--ors-profile', default='cycling-electric', help="ORS routing profile")
+    parser.add_argument('--hex-table', help="Table with HEX_ID, LATITUDE, LONGITUDE")
+    parser.add_argument('--target-table', help="Matrix table to build")
+    parser.add_argument('--tile-resolution', type=int, default=7, help="H3 resolution of the request tiles")
+    parser.add_argument('--tile-rings', type=int,
+                        help="Neighboring tiles routed from each tile (default: enough to cover the consumers' reach)")
+    parser.add_argument('--allow-partial-coverage', action='store_true',
+                        help="Build with a --tile-rings that covers less than the consumers' reach")
+    parser.add_argument('--max-locations', type=int, default=50, help="Locations per ORS matrix request")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent ORS matrix requests")
+    parser.add_argument('--flush-every', type=int, default=50, help="Tasks per bulk insert/checkpoint")
+    parser.add_argument('--restart', action='store_true', help="Discard checkpointed progress")
+    parser.add_argument('--skip-profile-check', action='store_true',
+                        help="Do not require the region to be the active ORS profile")
+    args = parser.parse_args(argv)
+
+    hex_table, target_table = CITY_TABLES.get(args.region, (None, None))
+    args.hex_table = args.hex_table or hex_table
+    args.target_table = args.target_table or target_table
+    if not args.hex_table or not args.target_table:
+        parser.error(f"--hex-table and --target-table are required for region {args.region}")
+    if args.tile_resolution not in H3_EDGE_KM:
+        parser.error(f"--tile-resolution must be one of {sorted(H3_EDGE_KM)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    session = create_session(args.connection)
+    client = SnowflakeOrsClient(session)
+
+    if not region_exists(session, args.region):
+        print(f"❌ Region {args.region} not found in ORS_SPCS_STAGE")
+        return 1
+
+    if not args.skip_profile_check:
+        serving = active_region(session)
+        if serving != args.region:
+            print(f"❌ ORS is serving {serving}, not {args.region}. "
+                  f"Switch profiles in the Profile Manager first.")
+            return 1
+
+    hex_res = hex_resolution(session, args.hex_table)
+    if hex_res not in H3_EDGE_KM:
+        print(f"❌ {args.hex_table} has no hexagons of a supported resolution ({hex_res})")
+        return 1
+    reach_km = required_reach_km(hex_res, args.ors_profile)
+    needed_rings = rings_for_reach(args.tile_resolution, reach_km)
+    if args.tile_rings is None:
+        args.tile_rings = needed_rings
+    elif args.tile_rings < needed_rings:
+        covered = coverage_km(args.tile_resolution, args.tile_rings)
+        message = (f"--tile-rings {args.tile_rings} covers {covered:.1f} km, but the Travel Time "
+                   f"page and SF_ACCESSIBILITY read up to {reach_km:.1f} km "
+                   f"(--tile-rings {needed_rings} at resolution {args.tile_resolution})")
+        if not args.allow_partial_coverage:
+            print(f"❌ {message}. Pass --allow-partial-coverage to build anyway.")
+            return 1
+        print(f"⚠️ {message}; longer pairs will be missing")
+    print(f"📏 Covering {coverage_km(args.tile_resolution, args.tile_rings):.1f} km "
+          f"with {args.tile_rings} tile rings at resolution {args.tile_resolution}")
+
+    staging_table = f"{args.target_table}_BUILD"
+    checkpoint = Checkpoint(session, f"{args.target_table}_BUILD_PROGRESS")
+
+    if args.restart:
+        session.sql(f"DROP TABLE IF EXISTS {staging_table}").collect()
+        checkpoint.drop()
+
+    session.sql(f"""
+        CREATE TABLE IF NOT EXISTS {staging_table} (
+            ORIGIN_HEX VARCHAR,
+            DEST_HEX VARCHAR,
+            DISTANCE_KM FLOAT,
+            DURATION_MINUTES FLOAT
+        )
+    """).collect()
+    checkpoint.create()
+
+    tiles, tile_pairs = load_tiles(session, args.hex_table, args.tile_resolution, args.tile_rings)
+    tasks = build_tasks(tiles, tile_pairs, args.max_locations)
+    done = checkpoint.completed()
+    pending = [task for task in tasks if task['task_id'] not in done]
+
+    print(f"🗺️ {sum(len(h) for h in tiles.values()):,} hexagons in {len(tiles):,} tiles, "
+          f"{len(tasks):,} matrix requests ({len(done):,} already done)")
+
+    def request(task):
+        locations = [[lon, lat] for _, lon, lat in task['group_a'] + (task['group_b'] or [])]
+        response = call_with_retries(client.matrix, args.ors_profile, locations)
+        return matrix_rows(task, response)
+
+    start = time.perf_counter()
+    buffer, finished, failed, written = [], [], [], 0
+    for task, rows, error, seconds in run_parallel(request, pending, args.workers):
+        if error is not None:
+            failed.append(task['task_id'])
+            print(f"⚠️ {task['task_id']} failed: {error}")
+            continue
+        buffer.extend(rows)
+        finished.append((task['task_id'], len(rows), round(seconds, 3)))
+        if len(finished) >= args.flush_every:
+            written += bulk_insert(session, buffer, staging_table, MATRIX_COLUMNS)
+            checkpoint.mark(finished)
+            done_count = len(done) + len(finished)
+            print(f"⏳ {written:,} pairs written, {done_count:,}/{len(tasks):,} requests done "
+                  f"({time.perf_counter() - start:.0f}s)")
+            done.update(task_id for task_id, _, _ in finished)
+            buffer, finished = [], []
+
+    written += bulk_insert(session, buffer, staging_table, MATRIX_COLUMNS)
+    checkpoint.mark(finished)
+
+    if failed:
+        print(f"❌ {len(failed):,} requests failed; re-run the same command to resume")
+        return 1
+
+    finalize(session, staging_table, args.target_table)
+    checkpoint.drop()
+    print(f"✅ {args.target_table} rebuilt in {time.perf_counter() - start:.0f}s "
+          f"({written:,} pairs written this run)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Benchmark ORS DIRECTIONS latency and throughput per routing profile
+
+Origin/destination pairs are sampled from recorded GEOLIFE_CLEAN trips and
+from pairs of nearby GERMANY_RETAIL_STORES inside the region's bounds, then
+routed at each concurrency level. Reports p50/p95/p99 latency, throughput
+and error rate per region, routing profile, pair source and concurrency,
+together with the region's map size, to size ORS instances from data.
+
+By default requests go through the native app's DIRECTIONS function (the
+region must be the one ORS is serving). With --local they go to an ORS
+REST API instead, e.g. ors_http_standin.py; add --synthetic-pairs to run
+without Snowflake at all.
+
+Usage:
+    python routing/ors_benchmark.py --region germany --routing-profile driving-car driving-hgv \\
+        --concurrency 1 4 16 --output germany.csv
+    python routing/ors_http_standin.py --workers 4 &
+    python routing/ors_benchmark.py --local http://localhost:8082/ors --synthetic-pairs \\
+        --region germany --concurrency 1 4 16
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+
+from job_utils import create_session, run_parallel
+from ors_client import HttpOrsClient, SnowflakeOrsClient
+from ors_inventory import profile_inventory
+from ors_status import read_configured_profiles
+from service_snapshot import active_region
+from warmup import REGION_BOUNDS, percentile, sample_trip_routes
+
+STORES_TABLE = "FLEET_DEMOS.ROUTING.GERMANY_RETAIL_STORES"
+DEFAULT_ROUTING_PROFILE = 'driving-car'
+
+RESULT_COLUMNS = [
+    'region', 'map_size_mb', 'source', 'routing_profile', 'concurrency', 'requests', 'errors',
+    'error_rate', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'wall_seconds',
+]
+
+
+def sample_store_routes(session, bounds, limit, max_km=50):
+    """Sample pairs of stores inside bounds that are at most max_km apart
+
+    Returns a list of ([lon, lat], [lon, lat]) pairs.
+    """
+    min_lon, min_lat, max_lon, max_lat = bounds
+    result = session.sql(f"""
+        WITH stores AS (
+            SELECT id, ST_X(geometry) AS lon, ST_Y(geometry) AS lat
+            FROM {STORES_TABLE}
+            WHERE ST_X(geometry) BETWEEN {min_lon} AND {max_lon}
+              AND ST_Y(geometry) BETWEEN {min_lat} AND {max_lat}
+        ),
+        origins AS (
+            SELECT * FROM stores ORDER BY RANDOM() LIMIT {limit}
+        )
+        SELECT o.lon AS start_lon, o.lat AS start_lat, d.lon AS end_lon, d.lat AS end_lat
+        FROM origins o
+        JOIN stores d
+            ON d.id <> o.id
+            AND HAVERSINE(o.lat, o.lon, d.lat, d.lon) <= {max_km}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY o.id ORDER BY RANDOM()) = 1
+    """).collect()
+    return [
+        ([row['START_LON'], row['START_LAT']], [row['END_LON'], row['END_LAT']])
+        for row in result
+    ]
+
+
+def synthetic_routes(bounds, limit, seed=0):
+    """Generate random pairs inside bounds for runs without Snowflake"""
+    rng = random.Random(seed)
+    min_lon, min_lat, max_lon, max_lat = bounds
+
+    def point():
+        return [round(rng.uniform(min_lon, max_lon), 6), round(rng.uniform(min_lat, max_lat), 6)]
+
+    return [(point(), point()) for _ in range(limit)]
+
+
+def run_level(client, routing_profile, pairs, concurrency, requests):
+    """Route `requests` pairs (cycling through pairs) with `concurrency` workers"""
+    tasks = [pairs[i % len(pairs)] for i in range(requests)]
+    latencies = []
+    errors = 0
+
+    started = time.perf_counter()
+    for _, _, error, seconds in run_parallel(
+        lambda pair: client.directions(routing_profile, pair[0], pair[1]), tasks, concurrency
+    ):
+        if error is None:
+            latencies.append(seconds)
+        else:
+            errors += 1
+    wall_seconds = time.perf_counter() - started
+
+    def ms(q):
+        value = percentile(latencies, q)
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'error_rate': round(errors / requests, 4) if requests else 0.0,
+        'p50_ms': ms(50),
+        'p95_ms': ms(95),
+        'p99_ms': ms(99),
+        'throughput_rps': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        'wall_seconds': round(wall_seconds, 2),
+    }
+
+
+def write_results(results, path):
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def print_results(results):
+    print(f"{'source':<10} {'profile':<18} {'conc':>5} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'req/s':>8} {'errors':>7}")
+    for row in results:
+        print(f"{row['source']:<10} {row['routing_profile']:<18} {row['concurrency']:>5} "
+              f"{row['p50_ms'] or '-':>9} {row['p95_ms'] or '-':>9} {row['p99_ms'] or '-':>9} "
+              f"{row['throughput_rps']:>8} {row['error_rate']:>7.1%}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ORS DIRECTIONS latency and throughput")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--region', help="Profile Manager region (default: the one ORS is serving)")
+    parser.add_argument('--routing-profile', nargs='+',
+                        help="Routing profiles to benchmark (default: enabled in the region's ors-config.yml)")
+    parser.add_argument('--source', nargs='+', choices=['trips', 'stores'], default=['trips', 'stores'])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=200, help="Requests per profile, source and concurrency")
+    parser.add_argument('--pairs', type=int, default=100, help="Distinct pairs sampled per source")
+    parser.add_argument('--max-store-km', type=float, default=50)
+    parser.add_argument('--warmup', type=int, default=10, help="Untimed requests per profile before measuring")
+    parser.add_argument('--local', metavar='ORS_URL', help="Route through an ORS REST API instead of DIRECTIONS")
+    parser.add_argument('--synthetic-pairs', action='store_true',
+                        help="Random pairs inside the region bounds instead of sampling tables")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results to a .csv or .json file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    offline = args.local and args.synthetic_pairs
+    session = None if offline else create_session(args.connection)
+
+    region = args.region or (active_region(session) if session else None)
+    if region not in REGION_BOUNDS:
+        print(f"❌ No bounds for region {region}; known regions: {', '.join(REGION_BOUNDS)}")
+        return 1
+    bounds = REGION_BOUNDS[region]
+
+    if not args.local and args.region:
+        serving = active_region(session)
+        if serving != region:
+            print(f"❌ ORS is serving {serving}, not {region}. Switch profiles in the Profile Manager first.")
+            return 1
+
+    routing_profiles = args.routing_profile
+    if not routing_profiles:
+        routing_profiles = (read_configured_profiles(session, region) if session else []) or [DEFAULT_ROUTING_PROFILE]
+
+    map_size_mb = None
+    if session:
+        details = profile_inventory(session).get(region)
+        if details:
+            map_size_mb = round(details['map_size'] / (1024 * 1024), 1)
+
+    client = HttpOrsClient(args.local) if args.local else SnowflakeOrsClient(session)
+
+    pair_sets = {}
+    if args.synthetic_pairs:
+        pair_sets['synthetic'] = synthetic_routes(bounds, args.pairs, args.seed)
+    else:
+        if 'trips' in args.source:
+            pair_sets['trips'] = sample_trip_routes(session, bounds, args.pairs)
+        if 'stores' in args.source:
+            pair_sets['stores'] = sample_store_routes(session, bounds, args.pairs, args.max_store_km)
+    for source, pairs in list(pair_sets.items()):
+        if not pairs:
+            print(f"⚠️ No {source} pairs in {region}; skipped")
+            del pair_sets[source]
+    if not pair_sets:
+        return 1
+
+    print(f"🗺️ {region} ({map_size_mb or '?'} MB map), profiles {', '.join(routing_profiles)}, "
+          f"pairs {', '.join(f'{s}={len(p)}' for s, p in pair_sets.items())}")
+
+    results = []
+    for routing_profile in routing_profiles:
+        warmup_pairs = next(iter(pair_sets.values()))
+        for start, end in warmup_pairs[:args.warmup]:
+            try:
+                client.directions(routing_profile, start, end)
+            except Exception:
+                pass
+
+        for source, pairs in pair_sets.items():
+            for concurrency in args.concurrency:
+                level = run_level(client, routing_profile, pairs, concurrency, args.requests)
+                results.append(dict(
+                    region=region,
+                    map_size_mb=map_size_mb,
+                    source=source,
+                    routing_profile=routing_profile,
+                    **level
+                ))
+
+    print_results(results)
+    if args.output:
+        write_results(results, args.output)
+        print(f"✅ Wrote {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import json
+import urllib.error
+import urllib.request
+
+ORS_APP = "OPENROUTESERVICE_NATIVE_APP.CORE"
+
+# ORS error codes no retry can fix: the request exceeds the server's limits
+# (2004), no route connects the points (2009) or a point is too far from
+# any road (2010)
+UNROUTABLE_CODES = {2004, 2009, 2010}
+
+
+class OrsError(RuntimeError):
+    """An error response from ORS, with its ORS error code and HTTP status when known"""
+
+    def __init__(self, message, code=None, status=None):
+        super().__init__(f"ORS error {code}: {message}" if code is not None else message)
+        self.code = code
+        self.status = status
+
+    @property
+    def unroutable(self):
+        """The request itself cannot be routed; retrying it gives the same error"""
+        return self.code in UNROUTABLE_CODES
+
+
+def _raise_for_error(response, status=None):
+    """Raise OrsError for an ORS error body ({"error": {"code": ..., "message": ...}})"""
+    error = response.get('error') if isinstance(response, dict) else None
+    if error is None:
+        return
+    if isinstance(error, dict):
+        raise OrsError(error.get('message'), error.get('code'), status)
+    raise OrsError(str(error), status=status)
+
+
+class SnowflakeOrsClient:
+    """Call OpenRouteService through the native app's SQL functions"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def matrix(self, profile, locations, options=None):
+        """Get the ORS matrix for a list of [lon, lat] locations
+
+        Without options the matrix is all-pairs; options are extra ORS
+        matrix request parameters, e.g. `sources` and `destinations` (index
+        lists into `locations`). Returns the parsed ORS response;
+        `durations` are seconds and `distances` (when the app returns them)
+        are meters, indexed as [source][destination] in the order of the
+        sources and destinations.
+        """
+        body = {'locations': locations, **options} if options else locations
+        query = f"""
+            SELECT {ORS_APP}.MATRIX(
+                '{profile}',
+                PARSE_JSON('{json.dumps(body)}')
+            ) AS response
+        """
+        result = self.session.sql(query).collect()
+        response = result[0]['RESPONSE'] if result else None
+        if response is None:
+            raise RuntimeError(f"Empty matrix response for profile {profile}")
+        response = json.loads(response) if isinstance(response, str) else response
+        _raise_for_error(response)
+        return response
+
+    def optimization(self, jobs, vehicles):
+        """Solve a vehicle routing problem with the app's VROOM service
+
+        jobs and vehicles are VROOM objects (integer ids, [lon, lat]
+        locations); returns the parsed VROOM solution.
+        """
+        query = f"""
+            SELECT {ORS_APP}.OPTIMIZATION(
+                PARSE_JSON('{json.dumps(jobs).replace("'", "''")}'),
+                PARSE_JSON('{json.dumps(vehicles).replace("'", "''")}')
+            ) AS response
+        """
+        result = self.session.sql(query).collect()
+        response = result[0]['RESPONSE'] if result else None
+        if response is None:
+            raise RuntimeError("Empty optimization response")
+        response = json.loads(response) if isinstance(response, str) else response
+        _raise_for_error(response)
+        return response
+
+    def directions(self, profile, start, end):
+        """Get the ORS route between two [lon, lat] points as parsed GeoJSON"""
+        query = f"""
+            SELECT {ORS_APP}.DIRECTIONS(
+                '{profile}',
+                ARRAY_CONSTRUCT({start[0]}, {start[1]}),
+                ARRAY_CONSTRUCT({end[0]}, {end[1]})
+            ) AS response
+        """
+        result = self.session.sql(query).collect()
+        response = result[0]['RESPONSE'] if result else None
+        if response is None:
+            raise RuntimeError(f"Empty directions response for profile {profile}")
+        response = json.loads(response) if isinstance(response, str) else response
+        _raise_for_error(response)
+        return response
+
+    def route(self, profile, coordinates, options=None):
+        """Get the ORS route through a list of [lon, lat] waypoints as parsed GeoJSON
+
+        options are extra ORS directions request parameters, e.g. radiuses.
+        """
+        body = {'coordinates': coordinates, **(options or {})}
+        query = f"""
+            SELECT {ORS_APP}.DIRECTIONS(
+                '{profile}',
+                PARSE_JSON('{json.dumps(body)}')
+            ) AS response
+        """
+        result = self.session.sql(query).collect()
+        response = result[0]['RESPONSE'] if result else None
+        if response is None:
+            raise RuntimeError(f"Empty directions response for profile {profile}")
+        response = json.loads(response) if isinstance(response, str) else response
+        _raise_for_error(response)
+        return response
+
+
+class HttpOrsClient:
+    """Call an ORS REST API directly (e.g. ors_http_standin.py or a local ORS container)"""
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def directions(self, profile, start, end):
+        """Get the ORS route between two [lon, lat] points as parsed GeoJSON"""
+        return self.route(profile, [start, end])
+
+    def route(self, profile, coordinates, options=None):
+        """Get the ORS route through a list of [lon, lat] waypoints as parsed GeoJSON
+
+        options are extra ORS directions request parameters, e.g. radiuses.
+        """
+        request = urllib.request.Request(
+            f"{self.base_url}/v2/directions/{profile}/geojson",
+            data=json.dumps({'coordinates': coordinates, **(options or {})}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read().decode('utf-8'))
+            except ValueError:
+                raise e
+            _raise_for_error(body, e.code)
+            raise
+
+
+class HttpVroomClient:
+    """Call a VROOM HTTP endpoint directly (e.g. vroom_standin.py or a vroom-express container)"""
+
+    def __init__(self, base_url, timeout=600):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def optimization(self, jobs, vehicles):
+        """Solve a vehicle routing problem; returns the parsed VROOM solution"""
+        request = urllib.request.Request(
+            self.base_url + '/',
+            data=json.dumps({'jobs': jobs, 'vehicles': vehicles}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
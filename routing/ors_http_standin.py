@@ -0,0 +1,156 @@
+"""Local HTTP stand-in for the ORS directions API
+
+Answers POST /ors/v2/directions/<profile>/geojson with a straight-line
+route after a simulated routing delay, so ors_benchmark.py (or anything
+using HttpOrsClient) runs without Snowflake. `--workers` caps concurrent
+routing like the CPU cores of one ORS instance, so throughput saturates
+and latency queues up under load the way a real instance does.
+`--unroutable-rate` answers a fixed share of routes (by their first point,
+so retries get the same answer) with ORS error 2010, like a waypoint too
+far from any road.
+
+Usage:
+    python routing/ors_http_standin.py --port 8082 --workers 4
+    python routing/ors_benchmark.py --local http://localhost:8082/ors --region germany
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIRECTIONS_PATH = re.compile(r"^/ors/v2/directions/([\w-]+)(?:/geojson)?$")
+
+# Average speed (km/h) and network detour over the straight line per routing profile
+PROFILE_SPEEDS = {
+    'driving-car': 50,
+    'driving-hgv': 40,
+    'cycling-regular': 16,
+    'cycling-electric': 22,
+    'foot-walking': 5,
+}
+DETOUR_FACTOR = 1.3
+
+# Simulated routing cost: fixed overhead plus time per routed km (seconds)
+BASE_LATENCY = 0.02
+LATENCY_PER_KM = 0.0015
+
+
+def haversine_km(start, end):
+    lon1, lat1, lon2, lat2 = map(math.radians, [start[0], start[1], end[0], end[1]])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+def route_response(profile, coordinates):
+    """Build an ORS-shaped GeoJSON route along the straight line between the coordinates"""
+    distance_km = sum(
+        haversine_km(a, b) for a, b in zip(coordinates, coordinates[1:])
+    ) * DETOUR_FACTOR
+    duration = distance_km / PROFILE_SPEEDS[profile] * 3600
+    return {
+        'type': 'FeatureCollection',
+        'features': [{
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': coordinates},
+            'properties': {
+                'summary': {'distance': distance_km * 1000, 'duration': duration},
+            },
+        }],
+    }
+
+
+class OrsStandinHandler(BaseHTTPRequestHandler):
+    server_version = "ORSStandin/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/ors/v2/health':
+            self._send_json(200, {'status': 'ready'})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        match = DIRECTIONS_PATH.match(self.path)
+        if not match:
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        profile = match.group(1)
+        if profile not in PROFILE_SPEEDS:
+            self._send_json(400, {'error': {'code': 2003, 'message': f"Unknown profile {profile}"}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        coordinates = json.loads(self.rfile.read(length) or b'{}').get('coordinates') or []
+        if len(coordinates) < 2:
+            self._send_json(400, {'error': {'code': 2001, 'message': "At least two coordinates required"}})
+            return
+
+        response = route_response(profile, coordinates)
+        distance_km = response['features'][0]['properties']['summary']['distance'] / 1000
+
+        with self.server.routing_slots:
+            time.sleep(BASE_LATENCY + LATENCY_PER_KM * distance_km)
+            failed = random.random() < self.server.error_rate
+
+        if random.Random(json.dumps(coordinates[0])).random() < self.server.unroutable_rate:
+            self._send_json(404, {'error': {
+                'code': 2010, 'message': f"Could not find routable point near coordinate {coordinates[0]}"
+            }})
+        elif failed:
+            self._send_json(500, {'error': {'code': 2099, 'message': "Simulated routing failure"}})
+        else:
+            self._send_json(200, response)
+
+
+def make_server(host='localhost', port=8082, workers=4, error_rate=0.0, unroutable_rate=0.0):
+    """Create the stand-in server; call serve_forever() (optionally in a thread) to run it"""
+    server = ThreadingHTTPServer((host, port), OrsStandinHandler)
+    server.daemon_threads = True
+    server.routing_slots = threading.Semaphore(workers)
+    server.error_rate = error_rate
+    server.unroutable_rate = unroutable_rate
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP stand-in for the ORS directions API")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Requests routed at once, like the cores of one ORS instance")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--unroutable-rate', type=float, default=0.0,
+                        help="Fraction of routes answered with ORS error 2010 (unroutable point)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = make_server(args.host, args.port, args.workers, args.error_rate, args.unroutable_rate)
+    print(f"🗺️ ORS stand-in on http://{args.host}:{args.port}/ors ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
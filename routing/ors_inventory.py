@@ -0,0 +1,55 @@
+ORS_APP = "OPENROUTESERVICE_NATIVE_APP.CORE"
+PROFILE_STAGE = f"{ORS_APP}.ORS_SPCS_STAGE"
+GRAPHS_STAGE = f"{ORS_APP}.ORS_GRAPHS_SPCS_STAGE"
+
+# Stage folders that are not routing profiles
+IGNORED_FOLDERS = ['Notebook']
+
+
+def index_profile_files(rows):
+    """Build the per-profile index from a LIST of the profile stage"""
+    inventory = {}
+    for row in rows:
+        parts = row['name'].split('/')
+        if len(parts) < 2:
+            continue
+        profile_name = parts[1]
+        if not profile_name or profile_name in IGNORED_FOLDERS:
+            continue
+
+        details = inventory.setdefault(profile_name, {
+            'map_file': None,
+            'map_size': 0,
+            'config_exists': False,
+            'graphs_exist': False
+        })
+        name = row['name']
+        if name.endswith('.osm.pbf') and 'example' not in name.lower():
+            details['map_file'] = parts[-1]
+            details['map_size'] = row['size']
+        elif name.endswith('ors-config.yml'):
+            details['config_exists'] = True
+    return inventory
+
+
+def index_graph_files(inventory, rows):
+    """Mark profiles that have files under their folder in a LIST of the graphs stage"""
+    for row in rows:
+        parts = row['name'].split('/')
+        if len(parts) > 2 and parts[1] in inventory:
+            inventory[parts[1]]['graphs_exist'] = True
+    return inventory
+
+
+def profile_inventory(session):
+    """Index all profiles with one LIST of the profile stage and one of the graphs stage"""
+    inventory = index_profile_files(session.sql(f"LIST @{PROFILE_STAGE}").collect())
+    return index_graph_files(inventory, session.sql(f"LIST @{GRAPHS_STAGE}").collect())
+
+
+def missing_graph_profiles(inventory):
+    """Get profiles with a map and config but no pre-built graphs"""
+    return sorted(
+        name for name, details in inventory.items()
+        if details['map_file'] and details['config_exists'] and not details['graphs_exist']
+    )
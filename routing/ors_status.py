@@ -0,0 +1,204 @@
+import re
+
+import yaml
+
+ORS_SERVICE = "OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SERVICE"
+
+# Log markers for each startup stage
+READY_MARKERS = ['Started Application', 'Tomcat started']
+LOADING_MARKERS = ['Initializing']
+PREPARING_MARKERS = ['Container file system preparation']
+STARTING_MARKERS = ['Container ENV', 'Container sanity checks']
+
+# "[1] Profile: 'driving-car', encoder: ..." / "[1] Total time: 12.3s." / "[1] Finished at: ..."
+PROFILE_START = re.compile(r"\[(\d+)\]\s+Profile:\s*'([^']+)'")
+PROFILE_TOTAL_TIME = re.compile(r"\[(\d+)\]\s+Total time:\s*([\d.]+)\s*s")
+PROFILE_FINISHED = re.compile(r"\[(\d+)\]\s+Finished at:")
+
+# Lines kept as the cursor between polls
+CURSOR_LINES = 3
+
+
+def configured_profiles(config_text):
+    """Get the enabled routing profiles from an ors-config.yml document"""
+    config = yaml.safe_load(config_text) or {}
+    engine = (config.get('ors') or {}).get('engine') or {}
+    default_enabled = (engine.get('profile_default') or {}).get('enabled', False)
+
+    profiles = []
+    for key, settings in (engine.get('profiles') or {}).items():
+        settings = settings or {}
+        if settings.get('enabled', default_enabled):
+            profiles.append(settings.get('encoder_name') or key)
+    return profiles
+
+
+def read_configured_profiles(session, profile_name):
+    """Get the routing profiles enabled in a region's ors-config.yml on the profile stage"""
+    stream = session.file.get_stream(
+        f"@OPENROUTESERVICE_NATIVE_APP.CORE.ORS_SPCS_STAGE/{profile_name}/ors-config.yml"
+    )
+    return configured_profiles(stream.read().decode('utf-8'))
+
+
+class ReadinessTracker:
+    """Incrementally parse ORS service logs into per-profile graph load events
+
+    Keep one tracker per active region (e.g. in st.session_state). Each
+    poll hands it the latest log tail; only lines after the previous
+    cursor are parsed.
+    """
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+        self.reset()
+
+    def reset(self):
+        self.stage = 'Unknown'
+        self.events = []
+        self.cursor = []
+        self.lines_seen = 0
+        self._reset_loads()
+
+    def _reset_loads(self):
+        self.load_index = {}
+        self.profile_loads = {
+            profile: {'started': False, 'finished': False, 'seconds': None}
+            for profile in self.profiles
+        }
+
+    def new_lines(self, tail):
+        """Get the lines of a log tail that come after the cursor, or None if the cursor is not in it"""
+        if not self.cursor:
+            return tail
+        n = len(self.cursor)
+        for end in range(len(tail), n - 1, -1):
+            if tail[end - n:end] == self.cursor:
+                return tail[end:]
+        return None
+
+    def consume(self, lines):
+        """Parse new log lines into events and update stage and profile state"""
+        for line in lines:
+            self._parse_line(line)
+        if lines:
+            self.cursor = (self.cursor + lines)[-CURSOR_LINES:]
+            self.lines_seen += len(lines)
+
+    def _record(self, kind, **fields):
+        self.events.append(dict(kind=kind, **fields))
+
+    def _profile_load(self, name):
+        return self.profile_loads.setdefault(
+            name, {'started': False, 'finished': False, 'seconds': None}
+        )
+
+    def _parse_line(self, line):
+        if any(marker in line for marker in STARTING_MARKERS):
+            if self.stage in ['Loading', 'Ready']:
+                # Container restarted: previous loads no longer count
+                self._record('restart')
+                self._reset_loads()
+            if self.stage != 'Starting':
+                self._record('stage', stage='Starting')
+            self.stage = 'Starting'
+            return
+
+        if any(marker in line for marker in PREPARING_MARKERS):
+            if self.stage != 'Preparing':
+                self._record('stage', stage='Preparing')
+            self.stage = 'Preparing'
+            return
+
+        match = PROFILE_START.search(line)
+        if match:
+            index, name = match.group(1), match.group(2)
+            self.load_index[index] = name
+            self._profile_load(name)['started'] = True
+            self._record('profile_start', profile=name)
+            self.stage = 'Loading'
+            return
+
+        match = PROFILE_TOTAL_TIME.search(line)
+        if match and match.group(1) in self.load_index:
+            name = self.load_index[match.group(1)]
+            self._profile_load(name)['seconds'] = float(match.group(2))
+            return
+
+        match = PROFILE_FINISHED.search(line)
+        if match and match.group(1) in self.load_index:
+            name = self.load_index[match.group(1)]
+            load = self._profile_load(name)
+            load['finished'] = True
+            self._record('profile_finish', profile=name, seconds=load['seconds'])
+            return
+
+        if any(marker in line for marker in READY_MARKERS):
+            if self.stage != 'Ready':
+                self._record('stage', stage='Ready')
+            self.stage = 'Ready'
+            return
+
+        if any(marker in line for marker in LOADING_MARKERS) and self.stage in ['Unknown', 'Starting', 'Preparing']:
+            self._record('stage', stage='Loading')
+            self.stage = 'Loading'
+
+    def status(self):
+        """Get the readiness summary shown by the Profile Manager"""
+        total = len(self.profile_loads)
+        loaded = sum(1 for load in self.profile_loads.values() if load['finished'])
+        status = {
+            'is_ready': self.stage == 'Ready',
+            'stage': self.stage,
+            'details': '',
+            'profiles_loaded': loaded,
+            'total_profiles': total,
+            'profile_loads': dict(self.profile_loads),
+        }
+
+        if self.stage == 'Ready':
+            status['profiles_loaded'] = total
+            status['details'] = 'All profiles loaded, service is ready'
+        elif self.stage == 'Loading':
+            if loaded > 0:
+                status['details'] = f"Loading graphs: {loaded}/{total} profiles complete"
+            else:
+                status['details'] = 'Initializing profiles...'
+        elif self.stage == 'Preparing':
+            status['details'] = 'Initializing container...'
+        elif self.stage == 'Starting':
+            status['details'] = 'Container starting up...'
+        return status
+
+
+def fetch_log_tail(session, num_lines, service=ORS_SERVICE):
+    """Get the last num_lines lines of an ORS service's container log"""
+    result = session.sql(f"""
+        CALL SYSTEM$GET_SERVICE_LOGS('{service}', 0, 'ors', {num_lines})
+    """).collect()
+    if not result or result[0][0] is None:
+        return []
+    return str(result[0][0]).splitlines()
+
+
+def poll_readiness(session, tracker, min_lines=100, max_lines=1000, service=ORS_SERVICE):
+    """Feed the tracker only the log lines written since its last poll
+
+    The tail grows from min_lines until it overlaps the cursor. If even
+    max_lines does not reach it (restart or burst of output) the tracker
+    starts over from that tail.
+    """
+    num_lines = max_lines if not tracker.cursor else min_lines
+    while True:
+        tail = fetch_log_tail(session, num_lines, service)
+        lines = tracker.new_lines(tail)
+        if lines is not None:
+            break
+        if num_lines >= max_lines:
+            tracker.reset()
+            lines = tail
+            break
+        num_lines = min(num_lines * 4, max_lines)
+
+    tracker.consume(lines)
+    return tracker.status()
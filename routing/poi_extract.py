@@ -0,0 +1,315 @@
+"""Extract points of interest from Overture Maps into per-country clustered tables
+
+Supported kinds:
+    stores    retail stores of the brands in a brand table (ISO_CODE,
+              CANONICAL_NAME, MATCH_TOKEN) and categories in a category table
+    parkings  HGV-designated parking areas
+
+Each run scans an Overture source once: the cheap filters (category and
+brand tokens, or class/subtype/hgv tag) are applied first and only places
+in H3 cells of the requested countries are kept, in a transient candidates
+table. Countries are then attributed in parallel into a transient staged
+table, with the exact ST_INTERSECTS test only for candidates in border
+cells (COUNTRY_H3_CELLS.IS_INTERIOR = FALSE). The countries that succeeded
+replace their rows in the target table in one transaction, so readers
+never see a country half refreshed.
+
+Onboarding a market is a data change (brand rows for its ISO code) plus a
+run for that country; other countries' rows are left untouched.
+
+Usage:
+    python routing/poi_extract.py --countries DE
+    python routing/poi_extract.py --countries DE AT NL --kinds stores --workers 4
+    python routing/poi_extract.py --all-countries --kinds parkings
+"""
+import argparse
+import re
+import sys
+import time
+
+from job_utils import create_session, run_parallel
+
+COUNTRIES_TABLE = "FLEET_DEMOS.ROUTING.COUNTRIES"
+COUNTRY_CELLS_TABLE = "FLEET_DEMOS.ROUTING.COUNTRY_H3_CELLS"
+BRANDS_TABLE = "FLEET_DEMOS.ROUTING.RETAIL_BRANDS"
+CATEGORIES_TABLE = "FLEET_DEMOS.ROUTING.RETAIL_CATEGORIES"
+
+# Resolution of COUNTRY_H3_CELLS
+COUNTRY_CELL_RESOLUTION = 4
+
+TARGET_TABLES = {
+    'stores': "FLEET_DEMOS.ROUTING.RETAIL_STORES",
+    'parkings': "FLEET_DEMOS.ROUTING.HGV_PARKINGS",
+}
+
+ISO_CODE_PATTERN = re.compile(r'^[A-Z]{2}$')
+
+# Brand tokens are literal text: regex metacharacters are escaped before
+# they are joined into one alternation
+ESCAPED_TOKEN = r"REGEXP_REPLACE(match_token, '([.^$|()\\[\\]{}*+?\\\\])', '\\\\\\1')"
+
+
+def sql_list(values):
+    """Format values as a SQL string list"""
+    return ", ".join("'" + value.replace("'", "''") + "'" for value in values)
+
+
+def candidates_table(kind):
+    return f"{TARGET_TABLES[kind]}_CANDIDATES"
+
+
+def staged_table(kind):
+    return f"{TARGET_TABLES[kind]}_STAGED"
+
+
+def brand_pattern_sql(brands_table, iso_filter):
+    """One-row CTE body with the regex alternation of the brand tokens, longest first"""
+    return f"""
+            SELECT LISTAGG({ESCAPED_TOKEN}, '|') WITHIN GROUP (ORDER BY LENGTH(match_token) DESC) as pattern
+            FROM (
+                SELECT DISTINCT match_token
+                FROM {brands_table}
+                WHERE iso_code {iso_filter}
+            )"""
+
+
+def stores_candidates_sql(countries, brands_table, categories=None):
+    """Places in the countries' cells whose category and name pass the filters"""
+    if categories:
+        category_filter = f"IN ({sql_list(categories)})"
+    else:
+        category_filter = f"IN (SELECT category FROM {CATEGORIES_TABLE})"
+    return f"""
+        CREATE OR REPLACE TRANSIENT TABLE {candidates_table('stores')} AS
+        WITH cells AS (
+            SELECT DISTINCT h3_cell
+            FROM {COUNTRY_CELLS_TABLE}
+            WHERE iso_code IN ({sql_list(countries)})
+        ),
+        brand_pattern AS ({brand_pattern_sql(brands_table, f"IN ({sql_list(countries)})")}
+        ),
+        places AS (
+            SELECT
+                p.id,
+                p.names:primary::string as store_name,
+                p.categories:primary::string as category,
+                p.geometry,
+                p.addresses,
+                H3_POINT_TO_CELL(p.geometry, {COUNTRY_CELL_RESOLUTION}) as h3_cell
+            FROM OVERTURE_MAPS__PLACES.CARTO.PLACE p
+            CROSS JOIN brand_pattern bp
+            WHERE p.categories:primary::string {category_filter}
+                AND REGEXP_INSTR(UPPER(p.names:primary::string), bp.pattern) > 0
+        )
+        SELECT pl.*
+        FROM places pl
+        INNER JOIN cells c
+            ON c.h3_cell = pl.h3_cell
+    """
+
+
+def stores_country_sql(iso_code, brands_table):
+    """Stage the stores of one country, matching names against its own brand tokens"""
+    return f"""
+        INSERT INTO {staged_table('stores')}
+            (iso_code, id, store_name, category, geometry, addresses, canonical_name)
+        WITH brand_pattern AS ({brand_pattern_sql(brands_table, f"= '{iso_code}'")}
+        ),
+        matched AS (
+            SELECT
+                s.*,
+                REGEXP_SUBSTR(UPPER(s.store_name), bp.pattern) as brand_token
+            FROM {candidates_table('stores')} s
+            CROSS JOIN brand_pattern bp
+        )
+        SELECT
+            h.iso_code,
+            s.id,
+            s.store_name,
+            s.category,
+            s.geometry,
+            s.addresses,
+            b.canonical_name
+        FROM matched s
+        INNER JOIN {COUNTRY_CELLS_TABLE} h
+            ON h.h3_cell = s.h3_cell
+            AND h.iso_code = '{iso_code}'
+        INNER JOIN {brands_table} b
+            ON b.iso_code = h.iso_code
+            AND b.match_token = s.brand_token
+        LEFT JOIN {COUNTRIES_TABLE} c
+            ON c.id = h.country_id
+            AND NOT h.is_interior
+        WHERE h.is_interior
+            OR ST_INTERSECTS(c.geometry, s.geometry)
+    """
+
+
+def parkings_candidates_sql(countries):
+    """Transit parking areas tagged hgv=yes/designated in the countries' cells"""
+    return f"""
+        CREATE OR REPLACE TRANSIENT TABLE {candidates_table('parkings')} AS
+        WITH cells AS (
+            SELECT DISTINCT h3_cell
+            FROM {COUNTRY_CELLS_TABLE}
+            WHERE iso_code IN ({sql_list(countries)})
+        ),
+        parkings AS (
+            SELECT
+                l.id,
+                l.geometry,
+                H3_POINT_TO_CELL(ST_CENTROID(l.geometry), {COUNTRY_CELL_RESOLUTION}) as h3_cell
+            FROM OVERTURE_MAPS__BASE.CARTO.INFRASTRUCTURE l
+            , LATERAL FLATTEN(input => l.source_tags:key_value) hgv_tag
+            WHERE l.class ILIKE 'parking%'
+                AND l.subtype ILIKE 'transit'
+                AND ST_DIMENSION(l.geometry) = 2
+                AND hgv_tag.value:key::string = 'hgv'
+                AND hgv_tag.value:value::string IN ('yes', 'designated')
+        )
+        SELECT p.*
+        FROM parkings p
+        INNER JOIN cells c
+            ON c.h3_cell = p.h3_cell
+    """
+
+
+def parkings_country_sql(iso_code):
+    """Stage the parkings of one country"""
+    return f"""
+        INSERT INTO {staged_table('parkings')}
+            (iso_code, id, english_name, geometry)
+        SELECT
+            h.iso_code,
+            p.id,
+            h.english_name,
+            p.geometry
+        FROM {candidates_table('parkings')} p
+        INNER JOIN {COUNTRY_CELLS_TABLE} h
+            ON h.h3_cell = p.h3_cell
+            AND h.iso_code = '{iso_code}'
+        LEFT JOIN {COUNTRIES_TABLE} c
+            ON c.id = h.country_id
+            AND NOT h.is_interior
+        WHERE h.is_interior
+            OR ST_INTERSECTS(c.geometry, p.geometry)
+    """
+
+
+def all_countries(session, kind, brands_table):
+    """Countries with brands (stores) or all indexed countries (parkings)"""
+    table = brands_table if kind == 'stores' else COUNTRY_CELLS_TABLE
+    result = session.sql(f"""
+        SELECT DISTINCT iso_code
+        FROM {table}
+        WHERE iso_code IS NOT NULL
+        ORDER BY iso_code
+    """).collect()
+    return [row['ISO_CODE'] for row in result]
+
+
+def extract(session, kind, countries, brands_table, categories, workers):
+    """Refresh the target rows of the countries; returns the countries that failed"""
+    target = TARGET_TABLES[kind]
+    start = time.perf_counter()
+    if kind == 'stores':
+        session.sql(stores_candidates_sql(countries, brands_table, categories)).collect()
+    else:
+        session.sql(parkings_candidates_sql(countries)).collect()
+    print(f"🔎 {kind}: candidates for {len(countries)} countries staged "
+          f"({time.perf_counter() - start:.0f}s)")
+    session.sql(f"CREATE OR REPLACE TRANSIENT TABLE {staged_table(kind)} LIKE {target}").collect()
+
+    def attribute_country(iso_code):
+        if kind == 'stores':
+            result = session.sql(stores_country_sql(iso_code, brands_table)).collect()
+        else:
+            result = session.sql(parkings_country_sql(iso_code)).collect()
+        return result[0][0] if result else 0
+
+    failed, done = [], []
+    for iso_code, rows, error, seconds in run_parallel(attribute_country, countries, workers):
+        if error is not None:
+            failed.append(iso_code)
+            print(f"⚠️ {kind} {iso_code} failed: {error}")
+            continue
+        done.append(iso_code)
+        print(f"✅ {kind} {iso_code}: {rows:,} rows ({seconds:.1f}s)")
+
+    if done:
+        try:
+            publish(session, kind, done)
+        except Exception as e:
+            print(f"⚠️ {kind}: replacing the rows of {len(done)} countries failed: {e}")
+            failed += done
+
+    session.sql(f"DROP TABLE IF EXISTS {candidates_table(kind)}").collect()
+    session.sql(f"DROP TABLE IF EXISTS {staged_table(kind)}").collect()
+    print(f"📦 {target} refreshed in {time.perf_counter() - start:.0f}s")
+    return failed
+
+
+def publish(session, kind, countries):
+    """Replace the target rows of the countries with their staged rows in one transaction"""
+    target = TARGET_TABLES[kind]
+    session.sql("BEGIN TRANSACTION").collect()
+    try:
+        session.sql(f"DELETE FROM {target} WHERE iso_code IN ({sql_list(countries)})").collect()
+        session.sql(f"""
+            INSERT INTO {target}
+            SELECT *
+            FROM {staged_table(kind)}
+            WHERE iso_code IN ({sql_list(countries)})
+        """).collect()
+    except Exception:
+        session.sql("ROLLBACK").collect()
+        raise
+    session.sql("COMMIT").collect()
+
+
+def iso_code(value):
+    value = value.upper()
+    if not ISO_CODE_PATTERN.match(value):
+        raise argparse.ArgumentTypeError(f"not an ISO 3166-1 alpha-2 code: {value}")
+    return value
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract retail stores and HGV parkings per country")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    countries = parser.add_mutually_exclusive_group(required=True)
+    countries.add_argument('--countries', nargs='+', type=iso_code, help="ISO codes, e.g. DE AT NL")
+    countries.add_argument('--all-countries', action='store_true',
+                           help="Countries with brands (stores) / all countries (parkings)")
+    parser.add_argument('--kinds', nargs='+', choices=sorted(TARGET_TABLES), default=sorted(TARGET_TABLES))
+    parser.add_argument('--brands-table', default=BRANDS_TABLE,
+                        help="Table with ISO_CODE, CANONICAL_NAME, MATCH_TOKEN")
+    parser.add_argument('--categories', nargs='+',
+                        help=f"Overture place categories (default: all in {CATEGORIES_TABLE})")
+    parser.add_argument('--workers', type=int, default=8, help="Countries refreshed concurrently")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    session = create_session(args.connection)
+
+    failed = []
+    for kind in args.kinds:
+        countries = args.countries or all_countries(session, kind, args.brands_table)
+        if not countries:
+            print(f"⚠️ {kind}: no countries to extract")
+            continue
+        failed += [
+            f"{kind} {iso}"
+            for iso in extract(session, kind, countries, args.brands_table, args.categories, args.workers)
+        ]
+
+    if failed:
+        print(f"❌ {len(failed)} countries failed: {', '.join(failed)}; re-run them with --countries")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
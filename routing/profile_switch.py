@@ -0,0 +1,509 @@
+import re
+import time
+
+from ors_client import SnowflakeOrsClient
+from ors_status import ReadinessTracker, poll_readiness
+from service_spec import ors_service_spec, plan_sizing
+from warmup import REGION_BOUNDS, WARMUP_ROUTES, latency_summary, sample_trip_routes
+
+ORS_APP = "OPENROUTESERVICE_NATIVE_APP.CORE"
+ORS_SERVICE = "ORS_SERVICE"
+GATEWAY_SERVICE = "ROUTING_GATEWAY_SERVICE"
+
+# Blue/green slots: the gateway routes to one, the other is the standby
+STANDBY_SERVICES = {
+    'ORS_SERVICE': 'ORS_SERVICE_GREEN',
+    'ORS_SERVICE_GREEN': 'ORS_SERVICE',
+}
+
+# Service DNS names as referenced from the gateway spec (ors-service, ors-service-green)
+ORS_HOST_PATTERN = re.compile(r"ors-service(?:-green)?(?![\w-])")
+
+# Profile folder a service spec mounts from the profile or graphs stage
+PROFILE_SOURCE_PATTERN = re.compile(r"ORS_(?:GRAPHS_)?SPCS_STAGE/([^\"'/\s]+)")
+
+# Polling backoff between status checks (seconds)
+INITIAL_POLL_INTERVAL = 2.0
+MAX_POLL_INTERVAL = 15.0
+POLL_BACKOFF = 1.5
+
+# Maximum time spent waiting in each step before the switch fails (seconds)
+STEP_TIMEOUTS = {
+    'WAIT_SUSPENDED': 180,
+    'WAIT_RUNNING': 300,
+    'WAIT_READY': 600,
+    'WAIT_READY_REBUILD': 1800,
+    'WAIT_GATEWAY_SCALED': 180,
+    'WAIT_GATEWAY': 180,
+    'WARM_UP': 120,
+}
+
+# Gateway instances kept during a repoint so one container routes while the other rolls
+GATEWAY_ROLL_INSTANCES = 2
+
+# Warm-up requests sent per step; warm-up is best effort and never fails a switch
+WARMUP_BATCH = 5
+DEFAULT_WARMUP_PROFILE = 'driving-car'
+
+STEP_LABELS = {
+    'PREPARE_STANDBY': '🟩 Starting standby ORS service',
+    'SCALE_GATEWAY': '↕️ Scaling gateway for the repoint',
+    'WAIT_GATEWAY_SCALED': '⏳ Waiting for gateway instances',
+    'REPOINT_GATEWAY': '🔀 Repointing gateway to standby',
+    'WAIT_GATEWAY': '⏳ Waiting for gateway to roll over',
+    'RETIRE_OLD': '🧹 Suspending previous ORS service',
+    'SUSPEND': '⏸️ Suspending services',
+    'WAIT_SUSPENDED': '⏸️ Waiting for services to suspend',
+    'UPDATE_SPEC': '🔄 Updating service specification and scaling',
+    'RESUME': '▶️ Resuming services',
+    'WAIT_RUNNING': '⏳ Waiting for containers to run',
+    'BUILD_GRAPHS': '📥 Triggering graph build',
+    'WAIT_READY': '⏳ Waiting for graphs to load',
+    'WARM_UP': '🔥 Warming up with sample routes',
+    'DONE': '✅ Done',
+    'FAILED': '❌ Failed',
+}
+
+
+def service_host(service):
+    """Get the DNS name of a service inside its schema"""
+    return service.lower().replace('_', '-')
+
+
+def live_ors_service(gateway_spec):
+    """Get the ORS service the gateway currently routes to"""
+    match = ORS_HOST_PATTERN.search(gateway_spec or '')
+    if match and match.group(0) == service_host('ORS_SERVICE_GREEN'):
+        return 'ORS_SERVICE_GREEN'
+    return ORS_SERVICE
+
+
+def profile_from_spec(spec):
+    """Get the profile an ORS service spec mounts, or None"""
+    match = PROFILE_SOURCE_PATTERN.search(spec or '')
+    return match.group(1) if match else None
+
+
+class SnowflakeServices:
+    """Service operations used by a profile switch, run through SQL"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def _show(self, service):
+        result = self.session.sql(f"""
+            SHOW SERVICES LIKE '{service}' IN SCHEMA {ORS_APP}
+        """).collect()
+        return result[0] if result else None
+
+    def exists(self, service):
+        return self._show(service) is not None
+
+    def status(self, service):
+        row = self._show(service)
+        return row['status'] if row else 'UNKNOWN'
+
+    def compute_pool(self, service):
+        return self._show(service)['compute_pool']
+
+    def compute_pool_exists(self, compute_pool):
+        result = self.session.sql(f"SHOW COMPUTE POOLS LIKE '{compute_pool}'").collect()
+        return len(result) > 0
+
+    def instances(self, service):
+        """Get (min_instances, max_instances) of a service"""
+        row = self._show(service)
+        return int(row['min_instances']), int(row['max_instances'])
+
+    def set_instances(self, service, min_instances, max_instances):
+        self.session.sql(f"""
+            ALTER SERVICE {ORS_APP}.{service}
+            SET MIN_INSTANCES = {min_instances} MAX_INSTANCES = {max_instances}
+        """).collect()
+
+    def drop(self, service):
+        self.session.sql(f"DROP SERVICE IF EXISTS {ORS_APP}.{service}").collect()
+
+    def get_spec(self, service):
+        result = self.session.sql(f"DESC SERVICE {ORS_APP}.{service}").collect()
+        return str(result[0]['spec']) if result else ''
+
+    def containers(self, service):
+        """Get (instance_id, status, start_time) of every container of a service"""
+        result = self.session.sql(f"SHOW SERVICE CONTAINERS IN SERVICE {ORS_APP}.{service}").collect()
+        return [(row['instance_id'], row['status'], str(row['start_time'])) for row in result]
+
+    def create(self, service, compute_pool, spec, min_instances=1, max_instances=1):
+        self.session.sql(f"""
+            CREATE SERVICE IF NOT EXISTS {ORS_APP}.{service}
+            IN COMPUTE POOL {compute_pool}
+            FROM SPECIFICATION $$
+{spec}
+$$
+            MIN_INSTANCES = {min_instances}
+            MAX_INSTANCES = {max_instances}
+        """).collect()
+
+    def suspend(self, service):
+        self.session.sql(f"ALTER SERVICE {ORS_APP}.{service} SUSPEND").collect()
+
+    def resume(self, service):
+        self.session.sql(f"ALTER SERVICE {ORS_APP}.{service} RESUME").collect()
+
+    def update_spec(self, service, spec):
+        self.session.sql(f"""
+            ALTER SERVICE {ORS_APP}.{service}
+            FROM SPECIFICATION $$
+{spec}
+$$
+        """).collect()
+
+    def start_graph_build(self):
+        self.session.sql(f"CALL {ORS_APP}.START_DOWNLOADER()").collect()
+
+    def readiness(self, tracker, service=ORS_SERVICE):
+        return poll_readiness(self.session, tracker, service=f"{ORS_APP}.{service}")
+
+    def warmup_routes(self, profile_name, limit=WARMUP_ROUTES):
+        bounds = REGION_BOUNDS.get(profile_name)
+        if bounds is None:
+            return []
+        return sample_trip_routes(self.session, bounds, limit)
+
+    def directions(self, routing_profile, start, end):
+        return SnowflakeOrsClient(self.session).directions(routing_profile, start, end)
+
+
+class ProfileSwitch:
+    """Profile switch as a resumable state machine
+
+    Each call to advance() runs at most one short step (an ALTER SERVICE
+    or one status poll), so the caller can re-render between steps.
+    Waiting steps poll with backoff and fail once their timeout passes.
+    The service spec and instance counts come from `sizing` (see
+    service_spec.plan_sizing). Once graphs are loaded, sampled trips are
+    routed through DIRECTIONS so the JVM and graph pages are warm before
+    the switch is reported done; their latencies end up in `warmup`.
+    The in-place switch restarts the ORS service the gateway routes to,
+    which is ORS_SERVICE_GREEN after a blue/green switch.
+    """
+
+    def __init__(self, services, target_profile, graphs_exist, routing_profiles, sizing=None,
+                 clock=time.monotonic):
+        self.services = services
+        self.target_profile = target_profile
+        self.graphs_exist = graphs_exist
+        self.sizing = sizing or plan_sizing(0, len(routing_profiles))
+        self.clock = clock
+        self.routing_profiles = list(routing_profiles) or [DEFAULT_WARMUP_PROFILE]
+        self.tracker = ReadinessTracker(routing_profiles)
+        self.warmup = None
+        self._warmup_routes = None
+        self._warmup_latencies = []
+        self._warmup_errors = 0
+
+        self.state = 'SUSPEND'
+        self.message = ''
+        self.warnings = []
+        self.timings = []
+        self.started_at = clock()
+        self.step_started_at = self.started_at
+        self.next_poll_at = self.started_at
+        self.poll_interval = INITIAL_POLL_INTERVAL
+        self.suspended = False
+
+        # Service whose graphs must load, services that must be running, and the steps after loading
+        self.ors_service = None
+        self.running_services = [GATEWAY_SERVICE]
+        # Whether the ORS service builds its own graphs instead of the shared downloader
+        self.rebuild_on_start = False
+        self.after_ready_state = 'WARM_UP'
+        self.after_warmup_state = 'DONE'
+
+    @property
+    def finished(self):
+        return self.state in ['DONE', 'FAILED']
+
+    @property
+    def elapsed_seconds(self):
+        return self.clock() - self.started_at
+
+    def wait_seconds(self):
+        """Seconds until the next step should run"""
+        return max(0.0, self.next_poll_at - self.clock())
+
+    def advance(self):
+        """Run the current step if it is due"""
+        if self.finished or self.clock() < self.next_poll_at:
+            return
+        try:
+            getattr(self, f"_step_{self.state.lower()}")()
+        except Exception as e:
+            self._fail(f"{STEP_LABELS.get(self.state, self.state)} failed: {e}")
+
+    def _transition(self, state):
+        now = self.clock()
+        self.timings.append((self.state, now - self.step_started_at))
+        self.state = state
+        self.message = ''
+        self.step_started_at = now
+        self.next_poll_at = now
+        self.poll_interval = INITIAL_POLL_INTERVAL
+
+    def _wait(self, timeout_key):
+        """Schedule the next poll with backoff, failing once the step timed out"""
+        waited = self.clock() - self.step_started_at
+        if waited > STEP_TIMEOUTS[timeout_key]:
+            raise TimeoutError(f"no progress after {waited:.0f}s")
+        self.next_poll_at = self.clock() + self.poll_interval
+        self.poll_interval = min(self.poll_interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
+
+    def _fail(self, message):
+        self._transition('FAILED')
+        self.message = message
+        if self.suspended:
+            # Never leave routing suspended after a failed switch
+            for service in [GATEWAY_SERVICE, self.ors_service]:
+                try:
+                    self.services.resume(service)
+                except Exception:
+                    pass
+
+    def _step_suspend(self):
+        self.ors_service = live_ors_service(self.services.get_spec(GATEWAY_SERVICE))
+        self.running_services = [self.ors_service, GATEWAY_SERVICE]
+        # The downloader builds graphs for ORS_SERVICE only
+        self.rebuild_on_start = not self.graphs_exist and self.ors_service != ORS_SERVICE
+        self.suspended = True
+        self.services.suspend(self.ors_service)
+        self.services.suspend(GATEWAY_SERVICE)
+        self._transition('WAIT_SUSPENDED')
+
+    def _step_wait_suspended(self):
+        if self.services.status(self.ors_service) == 'SUSPENDED':
+            self._transition('UPDATE_SPEC')
+        else:
+            self._wait('WAIT_SUSPENDED')
+
+    def _step_update_spec(self):
+        spec = ors_service_spec(self.target_profile, self.sizing, rebuild_graphs=self.rebuild_on_start)
+        self.services.update_spec(self.ors_service, spec)
+        self.services.set_instances(
+            self.ors_service, self.sizing['min_instances'], self.sizing['max_instances']
+        )
+        if self.services.compute_pool(self.ors_service) != self.sizing['compute_pool']:
+            self.warnings.append(
+                f"In-place switches keep the current compute pool; "
+                f"{self.sizing['compute_pool']} is only used by zero-downtime switches"
+            )
+        self._transition('RESUME')
+
+    def _step_resume(self):
+        self.services.resume(GATEWAY_SERVICE)
+        self.services.resume(self.ors_service)
+        self.suspended = False
+        self._transition('WAIT_RUNNING')
+
+    def _step_wait_running(self):
+        statuses = [self.services.status(service) for service in self.running_services]
+        if any(status in ['FAILED', 'INTERNAL_ERROR'] for status in statuses):
+            raise RuntimeError(f"service status {statuses}")
+        if all(status in ['RUNNING', 'READY'] for status in statuses):
+            self._transition('WAIT_READY' if self.graphs_exist or self.rebuild_on_start else 'BUILD_GRAPHS')
+        else:
+            self._wait('WAIT_RUNNING')
+
+    def _step_build_graphs(self):
+        try:
+            self.services.start_graph_build()
+        except Exception as e:
+            self.warnings.append(f"Graph build could not be triggered ({e}); graphs may be built on first access")
+        self._transition('WAIT_READY')
+
+    def _step_wait_ready(self):
+        status = self.services.readiness(self.tracker, self.ors_service)
+        if status['is_ready']:
+            self._transition(self.after_ready_state)
+        else:
+            self.message = status['details']
+            self._wait('WAIT_READY' if self.graphs_exist else 'WAIT_READY_REBUILD')
+
+    def _step_warm_up(self):
+        if self._warmup_routes is None:
+            try:
+                self._warmup_routes = self.services.warmup_routes(self.target_profile)
+            except Exception as e:
+                self._warmup_routes = []
+                self.warnings.append(f"Could not sample warm-up routes: {e}")
+            if not self._warmup_routes:
+                self.warnings.append(f"No recorded trips in {self.target_profile}; skipped warm-up")
+                self._transition(self.after_warmup_state)
+                return
+
+        done = len(self._warmup_latencies) + self._warmup_errors
+        for index in range(done, min(done + WARMUP_BATCH, len(self._warmup_routes))):
+            start, end = self._warmup_routes[index]
+            # Alternate routing profiles so every loaded graph is paged in
+            routing_profile = self.routing_profiles[index % len(self.routing_profiles)]
+            requested_at = self.clock()
+            try:
+                self.services.directions(routing_profile, start, end)
+                self._warmup_latencies.append(self.clock() - requested_at)
+            except Exception:
+                self._warmup_errors += 1
+
+        self.warmup = latency_summary(self._warmup_latencies, self._warmup_errors)
+        done = self.warmup['requests']
+        timed_out = self.clock() - self.step_started_at > STEP_TIMEOUTS['WARM_UP']
+        if done >= len(self._warmup_routes) or timed_out:
+            if timed_out:
+                self.warnings.append(f"Warm-up stopped after {done}/{len(self._warmup_routes)} routes")
+            self._transition(self.after_warmup_state)
+        else:
+            self.message = f"{done}/{len(self._warmup_routes)} routes"
+
+
+class BlueGreenSwitch(ProfileSwitch):
+    """Zero-downtime profile switch
+
+    Starts the target profile on the standby ORS service while the live
+    one keeps serving, waits until its graphs are loaded, repoints the
+    gateway spec to the standby's host, warms it up and then suspends the
+    old service. Without pre-built graphs the standby builds its own on
+    startup. Repointing rolls the gateway containers, so a single-instance
+    gateway is first scaled to two instances, which keeps one container
+    routing during the roll; the original instance counts are restored
+    with the old service's retirement. A failure before the repoint only
+    stops the standby; a failure after it restores the previous gateway spec.
+    """
+
+    def __init__(self, services, target_profile, graphs_exist, routing_profiles, sizing=None,
+                 clock=time.monotonic):
+        super().__init__(services, target_profile, graphs_exist, routing_profiles, sizing, clock)
+        self.state = 'PREPARE_STANDBY'
+        self.live_service = None
+        self.standby_service = None
+        self.gateway_spec = None
+        self.standby_started = False
+        self.repointed = False
+        self.gateway_starts = set()
+        # Gateway (min, max) instances before the switch scaled it for the repoint
+        self.gateway_instances = None
+        # DIRECTIONS reaches ORS through the gateway, so warm up once it points at the standby
+        self.after_ready_state = 'SCALE_GATEWAY'
+        self.after_warmup_state = 'RETIRE_OLD'
+
+    def _fail(self, message):
+        if self.repointed and self.gateway_spec:
+            try:
+                self.services.update_spec(GATEWAY_SERVICE, self.gateway_spec)
+            except Exception:
+                pass
+            if self.gateway_instances:
+                # Scaling down now would cut the roll back to the old spec short
+                self.warnings.append(
+                    f"Gateway left at {GATEWAY_ROLL_INSTANCES} instances; restore "
+                    f"MIN_INSTANCES = {self.gateway_instances[0]} once it has rolled back"
+                )
+        elif self.standby_started:
+            try:
+                self.services.suspend(self.standby_service)
+            except Exception:
+                pass
+            self._restore_gateway_instances()
+        super()._fail(message)
+
+    def _restore_gateway_instances(self):
+        if self.gateway_instances:
+            try:
+                self.services.set_instances(GATEWAY_SERVICE, *self.gateway_instances)
+            except Exception:
+                pass
+            self.gateway_instances = None
+
+    def _step_prepare_standby(self):
+        self.gateway_spec = self.services.get_spec(GATEWAY_SERVICE)
+        if not ORS_HOST_PATTERN.search(self.gateway_spec):
+            raise RuntimeError("gateway spec does not reference an ORS service host")
+
+        self.live_service = live_ors_service(self.gateway_spec)
+        self.standby_service = STANDBY_SERVICES[self.live_service]
+        self.ors_service = self.standby_service
+        self.running_services = [self.standby_service]
+        self.rebuild_on_start = not self.graphs_exist
+
+        compute_pool = self.sizing['compute_pool']
+        if not self.services.compute_pool_exists(compute_pool):
+            compute_pool = self.services.compute_pool(self.live_service)
+            self.warnings.append(
+                f"Compute pool {self.sizing['compute_pool']} not found; using {compute_pool}"
+            )
+
+        spec = ors_service_spec(self.target_profile, self.sizing, rebuild_graphs=self.rebuild_on_start)
+        min_instances, max_instances = self.sizing['min_instances'], self.sizing['max_instances']
+        if self.services.exists(self.standby_service):
+            if self.services.compute_pool(self.standby_service) != compute_pool:
+                # A service cannot move between pools; the standby is not serving, so recreate it
+                self.services.drop(self.standby_service)
+
+        if self.services.exists(self.standby_service):
+            self.services.update_spec(self.standby_service, spec)
+            self.services.set_instances(self.standby_service, min_instances, max_instances)
+            self.services.resume(self.standby_service)
+        else:
+            self.services.create(self.standby_service, compute_pool, spec, min_instances, max_instances)
+        self.standby_started = True
+        self._transition('WAIT_RUNNING')
+
+    def _step_scale_gateway(self):
+        min_instances, max_instances = self.services.instances(GATEWAY_SERVICE)
+        if min_instances >= GATEWAY_ROLL_INSTANCES:
+            self._transition('REPOINT_GATEWAY')
+            return
+        self.gateway_instances = (min_instances, max_instances)
+        self.services.set_instances(
+            GATEWAY_SERVICE, GATEWAY_ROLL_INSTANCES, max(max_instances, GATEWAY_ROLL_INSTANCES)
+        )
+        self._transition('WAIT_GATEWAY_SCALED')
+
+    def _step_wait_gateway_scaled(self):
+        containers = self.services.containers(GATEWAY_SERVICE)
+        statuses = [status for _, status, _ in containers]
+        if any(status in ['FAILED', 'INTERNAL_ERROR'] for status in statuses):
+            raise RuntimeError(f"gateway container status {statuses}")
+        ready = statuses.count('READY')
+        if ready >= GATEWAY_ROLL_INSTANCES:
+            self._transition('REPOINT_GATEWAY')
+        else:
+            self.message = f"{ready}/{GATEWAY_ROLL_INSTANCES} gateway instances ready"
+            self._wait('WAIT_GATEWAY_SCALED')
+
+    def _step_repoint_gateway(self):
+        # The service status stays RUNNING while containers roll; track them by start time instead
+        self.gateway_starts = {start for _, _, start in self.services.containers(GATEWAY_SERVICE)}
+        new_spec = ORS_HOST_PATTERN.sub(service_host(self.standby_service), self.gateway_spec)
+        self.services.update_spec(GATEWAY_SERVICE, new_spec)
+        self.repointed = True
+        self._transition('WAIT_GATEWAY')
+
+    def _step_wait_gateway(self):
+        containers = self.services.containers(GATEWAY_SERVICE)
+        statuses = [status for _, status, _ in containers]
+        if any(status in ['FAILED', 'INTERNAL_ERROR'] for status in statuses):
+            raise RuntimeError(f"gateway container status {statuses}")
+        rolled = [
+            instance for instance, status, start in containers
+            if status == 'READY' and start not in self.gateway_starts
+        ]
+        if containers and len(rolled) == len(containers):
+            self._transition('WARM_UP')
+        else:
+            self.message = f"{len(rolled)}/{len(containers)} gateway instances restarted"
+            self._wait('WAIT_GATEWAY')
+
+    def _step_retire_old(self):
+        self.services.suspend(self.live_service)
+        self.live_service, self.standby_service = self.standby_service, self.live_service
+        self.repointed = False
+        self._restore_gateway_instances()
+        self._transition('DONE')
@@ -0,0 +1,175 @@
+"""Per-query instrumentation for the Streamlit apps
+
+    session = instrument(get_active_session(), page="Profile Manager")
+    df = session.sql(query, panel="Services").to_pandas()
+
+    @cache_data(ttl=30)
+    def get_graph_builds(): ...
+
+Every executed query is timed and tagged with its page and panel (the
+calling function when no panel is given). Records go to the in-process
+log read by the Performance page, and to the `fleet_demos.queries` logger
+as JSON: Streamlit in Snowflake forwards it to the account event table,
+and setting QUERY_LOG_PATH also writes it to a local file.
+
+Used by the Profile Manager and the dashboard; snowflake.yml maps this
+file into the dashboard's bundle.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+LOGGER_NAME = "fleet_demos.queries"
+EVENT_TABLE = "SNOWFLAKE.TELEMETRY.EVENTS"
+PERFORMANCE_PAGE = "Performance"
+MAX_RECORDS = 5000
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.setLevel(logging.INFO)
+
+if os.environ.get('QUERY_LOG_PATH') and not logger.handlers:
+    _handler = logging.FileHandler(os.environ['QUERY_LOG_PATH'])
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+
+# Shared by all sessions of this server process
+_lock = threading.Lock()
+_records = deque(maxlen=MAX_RECORDS)
+_cache_stats = {}
+_context = threading.local()
+
+
+def _record(entry):
+    with _lock:
+        _records.append(entry)
+    logger.info(json.dumps(entry, default=str))
+
+
+def recent_queries():
+    """Get the query records of this server process, oldest first"""
+    with _lock:
+        return list(_records)
+
+
+def cache_stats():
+    """Get {(page, panel): {'calls': n, 'misses': n}} for functions wrapped with cache_data"""
+    with _lock:
+        return {key: dict(value) for key, value in _cache_stats.items()}
+
+
+def _count_cache(panel, miss):
+    key = (getattr(_context, 'page', None), panel)
+    with _lock:
+        stats = _cache_stats.setdefault(key, {'calls': 0, 'misses': 0})
+        if miss:
+            stats['misses'] += 1
+        else:
+            stats['calls'] += 1
+
+
+def _result_bytes(result):
+    if hasattr(result, 'memory_usage'):
+        return int(result.memory_usage(deep=True).sum())
+    return sum(len(str(value)) for row in result for value in row)
+
+
+class InstrumentedDataFrame:
+    """Times to_pandas() and collect(); everything else is passed to the Snowpark DataFrame"""
+
+    def __init__(self, df, query, page, panel):
+        self._df = df
+        self._query = query
+        self._page = page
+        self._panel = panel
+
+    def __getattr__(self, name):
+        return getattr(self._df, name)
+
+    def _run(self, method, *args, **kwargs):
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = getattr(self._df, method)(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            _record({
+                'ts': time.time(),
+                'page': self._page,
+                'panel': self._panel,
+                'seconds': round(time.perf_counter() - started, 4),
+                'rows': len(result) if result is not None else 0,
+                'bytes': _result_bytes(result) if result is not None else 0,
+                'query': ' '.join(self._query.split())[:300],
+                'error': error,
+            })
+
+    def to_pandas(self, *args, **kwargs):
+        return self._run('to_pandas', *args, **kwargs)
+
+    def collect(self, *args, **kwargs):
+        return self._run('collect', *args, **kwargs)
+
+
+class InstrumentedSession:
+    """Snowpark session wrapper that tags each query with its page and panel"""
+
+    def __init__(self, session, page):
+        self._session = session
+        self.page = page
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def sql(self, query, *args, panel=None, **kwargs):
+        if panel is None:
+            panel = sys._getframe(1).f_code.co_name
+        return InstrumentedDataFrame(self._session.sql(query, *args, **kwargs), query, self.page, panel)
+
+
+def hide_performance_page():
+    """Keep the Performance page out of the sidebar; it stays reachable by URL"""
+    st.markdown(
+        f"<style>[data-testid='stSidebarNav'] a[href$='/{PERFORMANCE_PAGE}'] {{display: none;}}</style>",
+        unsafe_allow_html=True
+    )
+
+
+def instrument(session, page):
+    """Wrap the active session for a page; call after st.set_page_config"""
+    _context.page = page
+    hide_performance_page()
+    return InstrumentedSession(session, page)
+
+
+def cache_data(func=None, **cache_kwargs):
+    """st.cache_data that also counts calls and misses per panel for hit rates"""
+    def decorate(func):
+        panel = func.__name__
+
+        @functools.wraps(func)
+        def load(*args, **kwargs):
+            _count_cache(panel, miss=True)
+            return func(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(load)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _count_cache(panel, miss=False)
+            return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
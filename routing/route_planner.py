@@ -0,0 +1,402 @@
+"""Plan HGV delivery routes from depots (HGV parkings) to retail stores with VROOM
+
+A whole region is too large for one VROOM problem, so stores (jobs) are
+split into geographic clusters of at most --max-jobs: the cluster is cut at
+the median of its longer side (longitude or latitude) until it is small
+enough. Each cluster gets vehicles at its nearest depots, enough for its
+stores given both the vehicle capacity and the stores a shift can fit
+(driving out from the depot, between stores and unloading), and is solved
+as its own problem, with bounded parallelism. Stores farther than half a
+shift from every one of those depots are left out and counted as
+unassigned. Routes and the per-cluster solve times are written to
+VRP_PLAN_ROUTES and VRP_PLAN_CLUSTERS under one plan id.
+
+By default problems go through the native app's OPTIMIZATION function
+(VROOM_SERVICE). With --local they go to a VROOM HTTP endpoint instead,
+e.g. vroom_standin.py; add --synthetic-stores to run without Snowflake
+(results are then only printed or written to --output).
+
+Usage:
+    python routing/route_planner.py --country DE --brands REWE --max-jobs 150
+    python routing/vroom_standin.py --workers 4 &
+    python routing/route_planner.py --local http://localhost:3000 --synthetic-stores 2000 \\
+        --region germany --max-jobs 100 --output plan.json
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime
+
+from job_utils import bulk_insert, call_with_retries, create_session, run_parallel
+from ors_client import HttpVroomClient, SnowflakeOrsClient
+from warmup import REGION_BOUNDS
+
+STORES_TABLE = "FLEET_DEMOS.ROUTING.RETAIL_STORES"
+DEPOTS_TABLE = "FLEET_DEMOS.ROUTING.HGV_PARKINGS"
+CLUSTERS_TABLE = "FLEET_DEMOS.ROUTING.VRP_PLAN_CLUSTERS"
+ROUTES_TABLE = "FLEET_DEMOS.ROUTING.VRP_PLAN_ROUTES"
+
+# Road distance per straight-line distance, like ors_http_standin.py
+ROAD_FACTOR = 1.3
+# Beardwood-Halton-Hammersley constant: a tour through n random points in
+# area A is about 0.7124 * sqrt(n * A) long
+TOUR_CONSTANT = 0.7124
+
+CLUSTER_COLUMNS = [
+    'PLAN_ID', 'CLUSTER_ID', 'JOB_COUNT', 'VEHICLE_COUNT', 'DEPOT_IDS', 'ROUTE_COUNT',
+    'UNASSIGNED_COUNT', 'DURATION_SECONDS', 'DISTANCE_M', 'SOLVE_SECONDS', 'ERROR',
+]
+ROUTE_COLUMNS = [
+    'PLAN_ID', 'CLUSTER_ID', 'VEHICLE_ID', 'DEPOT_ID', 'STEP_INDEX', 'STEP_TYPE', 'STORE_ID',
+    'LONGITUDE', 'LATITUDE', 'ARRIVAL_SECONDS', 'DISTANCE_M',
+]
+
+
+def ensure_tables(session):
+    session.sql(f"""
+        CREATE TABLE IF NOT EXISTS {CLUSTERS_TABLE} (
+            PLAN_ID VARCHAR,
+            CLUSTER_ID NUMBER,
+            JOB_COUNT NUMBER,
+            VEHICLE_COUNT NUMBER,
+            DEPOT_IDS VARCHAR,
+            ROUTE_COUNT NUMBER,
+            UNASSIGNED_COUNT NUMBER,
+            DURATION_SECONDS NUMBER,
+            DISTANCE_M NUMBER,
+            SOLVE_SECONDS FLOAT,
+            ERROR VARCHAR,
+            CREATED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+        )
+    """).collect()
+    session.sql(f"""
+        CREATE TABLE IF NOT EXISTS {ROUTES_TABLE} (
+            PLAN_ID VARCHAR,
+            CLUSTER_ID NUMBER,
+            VEHICLE_ID VARCHAR,
+            DEPOT_ID VARCHAR,
+            STEP_INDEX NUMBER,
+            STEP_TYPE VARCHAR,
+            STORE_ID VARCHAR,
+            LONGITUDE FLOAT,
+            LATITUDE FLOAT,
+            ARRIVAL_SECONDS NUMBER,
+            DISTANCE_M NUMBER
+        )
+        CLUSTER BY (PLAN_ID, CLUSTER_ID)
+    """).collect()
+
+
+def load_stores(session, country, brands=None):
+    """Get the stores of a country as (store_id, lon, lat)"""
+    brand_filter = ""
+    if brands:
+        brand_filter = "AND canonical_name IN (" + ", ".join(f"'{b}'" for b in brands) + ")"
+    result = session.sql(f"""
+        SELECT id, ST_X(geometry) AS lon, ST_Y(geometry) AS lat
+        FROM {STORES_TABLE}
+        WHERE iso_code = '{country}' {brand_filter}
+        ORDER BY id
+    """).collect()
+    return [(row['ID'], float(row['LON']), float(row['LAT'])) for row in result]
+
+
+def load_depots(session, country):
+    """Get the HGV parkings of a country as (depot_id, lon, lat) of their centroids"""
+    result = session.sql(f"""
+        SELECT
+            id,
+            ST_X(ST_CENTROID(geometry)) AS lon,
+            ST_Y(ST_CENTROID(geometry)) AS lat
+        FROM {DEPOTS_TABLE}
+        WHERE iso_code = '{country}'
+        ORDER BY id
+    """).collect()
+    return [(row['ID'], float(row['LON']), float(row['LAT'])) for row in result]
+
+
+def synthetic_points(bounds, count, prefix, seed=0):
+    """Generate random (id, lon, lat) points inside bounds for runs without Snowflake"""
+    rng = random.Random(f"{prefix}{seed}")
+    min_lon, min_lat, max_lon, max_lat = bounds
+    return [
+        (f"{prefix}{i}", round(rng.uniform(min_lon, max_lon), 6), round(rng.uniform(min_lat, max_lat), 6))
+        for i in range(count)
+    ]
+
+
+def split_clusters(points, max_jobs):
+    """Split points into geographic clusters of at most max_jobs
+
+    Cuts at the median of the longer side (longitude scaled by latitude)
+    until every cluster is small enough; returns clusters in a stable
+    spatial order.
+    """
+    if len(points) <= max_jobs:
+        return [points] if points else []
+    lons = [p[1] for p in points]
+    lats = [p[2] for p in points]
+    lon_span = (max(lons) - min(lons)) * math.cos(math.radians(sum(lats) / len(lats)))
+    lat_span = max(lats) - min(lats)
+    axis = 1 if lon_span >= lat_span else 2
+    ordered = sorted(points, key=lambda p: (p[axis], p[0]))
+    middle = len(ordered) // 2
+    return split_clusters(ordered[:middle], max_jobs) + split_clusters(ordered[middle:], max_jobs)
+
+
+def distance_km(a, b):
+    lon1, lat1, lon2, lat2 = map(math.radians, [a[0], a[1], b[0], b[1]])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(h))
+
+
+def stores_per_vehicle(stores, center, depot_km, args):
+    """Stores one vehicle can serve in a shift
+
+    The capacity, or fewer when the drive out to its stores and back
+    (depot_km each way), the drives between stores (estimated from the
+    cluster's area) and the unloading fill the shift first.
+    """
+    lons = [s[1] for s in stores]
+    lats = [s[2] for s in stores]
+    width_km = distance_km((min(lons), center[1]), (max(lons), center[1]))
+    height_km = distance_km((center[0], min(lats)), (center[0], max(lats)))
+    hop_km = TOUR_CONSTANT * math.sqrt(width_km * height_km / len(stores))
+    drive_minutes = lambda km: km * ROAD_FACTOR / args.average_speed_kmh * 60
+    shift_minutes = args.shift_hours * 60 - drive_minutes(2 * depot_km)
+    stop_minutes = args.service_minutes + drive_minutes(hop_km)
+    return max(1, min(args.capacity, math.floor(shift_minutes / stop_minutes)))
+
+
+def build_problem(cluster_id, stores, depots, args):
+    """Build the VROOM jobs and vehicles of one cluster
+
+    Vehicles start and end at the depots nearest to the cluster center,
+    assigned round-robin; there are enough of them to serve every store
+    within their capacity and shift, and never more than the stores.
+    Stores no vehicle can reach and return from within a shift get no job.
+    """
+    center = (sum(s[1] for s in stores) / len(stores), sum(s[2] for s in stores) / len(stores))
+    nearest = sorted(depots, key=lambda d: distance_km(center, (d[1], d[2])))[:args.depots_per_cluster]
+    # A route runs out to the stores around one depot: the typical drive is from a store to its nearest depot
+    store_depot_km = [min(distance_km((s[1], s[2]), (d[1], d[2])) for d in nearest) for s in stores]
+    reach_km = (args.shift_hours * 60 - args.service_minutes) / 60 * args.average_speed_kmh / ROAD_FACTOR / 2
+    reachable = [(s, km) for s, km in zip(stores, store_depot_km) if km <= reach_km]
+    out_of_reach = len(stores) - len(reachable)
+    stores = [s for s, _ in reachable]
+
+    vehicle_count = 0
+    if stores:
+        per_vehicle = stores_per_vehicle(stores, center, sum(km for _, km in reachable) / len(stores), args)
+        vehicle_count = min(len(stores), math.ceil(len(stores) / per_vehicle) + args.spare_vehicles)
+
+    jobs = [
+        {
+            'id': i + 1,
+            'location': [lon, lat],
+            'service': args.service_minutes * 60,
+            'delivery': [1],
+        }
+        for i, (_, lon, lat) in enumerate(stores)
+    ]
+    vehicles = []
+    vehicle_depots = {}
+    for v in range(vehicle_count):
+        depot_id, lon, lat = nearest[v % len(nearest)]
+        vehicles.append({
+            'id': v + 1,
+            'profile': args.ors_profile,
+            'start': [lon, lat],
+            'end': [lon, lat],
+            'capacity': [args.capacity],
+            'time_window': [0, int(args.shift_hours * 3600)],
+        })
+        vehicle_depots[v + 1] = depot_id
+
+    return {
+        'cluster_id': cluster_id,
+        'stores': stores,
+        'depot_ids': [d[0] for d in nearest],
+        'vehicle_depots': vehicle_depots,
+        'jobs': jobs,
+        'vehicles': vehicles,
+        'out_of_reach': out_of_reach,
+    }
+
+
+def route_rows(plan_id, problem, solution):
+    """Turn a VROOM solution into one row per route step"""
+    rows = []
+    for route in solution.get('routes') or []:
+        vehicle = route['vehicle']
+        for index, step in enumerate(route.get('steps') or []):
+            store_id = None
+            if step.get('type') == 'job':
+                store_id = problem['stores'][step['job'] - 1][0]
+            lon, lat = step.get('location') or (None, None)
+            rows.append((
+                plan_id,
+                problem['cluster_id'],
+                f"{problem['cluster_id']}-{vehicle}",
+                problem['vehicle_depots'].get(vehicle),
+                index,
+                step.get('type'),
+                store_id,
+                lon,
+                lat,
+                step.get('arrival'),
+                step.get('distance'),
+            ))
+    return rows
+
+
+def cluster_row(plan_id, problem, solution, seconds, error=None):
+    """Summarize one cluster's problem and solve; out-of-reach stores count as jobs left unassigned"""
+    summary = (solution or {}).get('summary') or {}
+    unassigned = summary.get('unassigned')
+    if unassigned is None and (error or not problem['jobs']):
+        unassigned = len(problem['jobs'])
+    return (
+        plan_id,
+        problem['cluster_id'],
+        len(problem['jobs']) + problem['out_of_reach'],
+        len(problem['vehicles']),
+        ",".join(problem['depot_ids']),
+        summary.get('routes'),
+        unassigned + problem['out_of_reach'] if unassigned is not None else None,
+        summary.get('duration'),
+        summary.get('distance'),
+        round(seconds, 3),
+        str(error)[:1000] if error else None,
+    )
+
+
+def print_clusters(clusters):
+    print(f"{'cluster':>8} {'jobs':>6} {'vehicles':>8} {'routes':>6} {'unassigned':>10} {'hours':>8} {'solve s':>8}")
+    for row in sorted(clusters, key=lambda r: r[1]):
+        _, cluster_id, jobs, vehicles, _, routes, unassigned, duration, _, seconds, error = row
+        hours = f"{duration / 3600:.1f}" if duration is not None else '-'
+        print(f"{cluster_id:>8} {jobs:>6} {vehicles:>8} {routes if routes is not None else '-':>6} "
+              f"{unassigned if unassigned is not None else '-':>10} {hours:>8} {seconds:>8.2f}"
+              + (f"  ⚠️ {error}" if error else ""))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plan HGV delivery routes from depots to stores with VROOM")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--country', default='DE', help="ISO code of stores and depots")
+    parser.add_argument('--brands', nargs='+', help="Only stores of these brands (canonical names)")
+    parser.add_argument('--ors-profile', default='driving-hgv', help="Vehicle routing profile")
+    parser.add_argument('--max-jobs', type=int, default=150, help="Stores per cluster problem")
+    parser.add_argument('--depots-per-cluster', type=int, default=3, help="Nearest depots used by a cluster")
+    parser.add_argument('--capacity', type=int, default=20, help="Stores a vehicle can serve per shift")
+    parser.add_argument('--spare-vehicles', type=int, default=1, help="Extra vehicles per cluster")
+    parser.add_argument('--service-minutes', type=float, default=20, help="Unloading time per store")
+    parser.add_argument('--shift-hours', type=float, default=10, help="Vehicle shift length")
+    parser.add_argument('--average-speed-kmh', type=float, default=40,
+                        help="Road speed used to estimate how many stores fit in a shift")
+    parser.add_argument('--workers', type=int, default=4, help="Clusters solved concurrently")
+    parser.add_argument('--plan-id', help="Plan id (default: country and timestamp)")
+    parser.add_argument('--local', metavar='URL',
+                        help="VROOM endpoint to call instead of the native app, e.g. http://localhost:3000")
+    parser.add_argument('--synthetic-stores', type=int, metavar='N',
+                        help="With --local: N random stores (and N/20 depots) in --region, no Snowflake")
+    parser.add_argument('--region', default='germany', help="Region bounds for --synthetic-stores")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the cluster summaries and routes to a JSON file")
+    args = parser.parse_args(argv)
+
+    if args.max_jobs < 1:
+        parser.error("--max-jobs must be at least 1")
+    if args.capacity < 1:
+        parser.error("--capacity must be at least 1")
+    if args.shift_hours <= 0 or args.average_speed_kmh <= 0:
+        parser.error("--shift-hours and --average-speed-kmh must be positive")
+    if args.synthetic_stores and not args.local:
+        parser.error("--synthetic-stores requires --local")
+    if args.synthetic_stores and args.region not in REGION_BOUNDS:
+        parser.error(f"no bounds for region {args.region}; known regions: {', '.join(REGION_BOUNDS)}")
+    args.country = args.country.upper()
+    args.plan_id = args.plan_id or f"{args.country}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    offline = bool(args.synthetic_stores)
+    session = None if offline else create_session(args.connection)
+
+    if offline:
+        bounds = REGION_BOUNDS[args.region]
+        stores = synthetic_points(bounds, args.synthetic_stores, 'store-', args.seed)
+        depots = synthetic_points(bounds, max(1, args.synthetic_stores // 20), 'depot-', args.seed)
+    else:
+        stores = load_stores(session, args.country, args.brands)
+        depots = load_depots(session, args.country)
+    if not stores or not depots:
+        print(f"❌ {len(stores):,} stores and {len(depots):,} depots in {args.country}; nothing to plan")
+        return 1
+
+    client = HttpVroomClient(args.local) if args.local else SnowflakeOrsClient(session)
+    clusters = split_clusters(stores, args.max_jobs)
+    problems = [build_problem(i + 1, cluster, depots, args) for i, cluster in enumerate(clusters)]
+    print(f"🚚 Plan {args.plan_id}: {len(stores):,} stores, {len(depots):,} depots, "
+          f"{len(problems):,} clusters of at most {args.max_jobs} stores")
+    out_of_reach = sum(problem['out_of_reach'] for problem in problems)
+    if out_of_reach:
+        print(f"⚠️ {out_of_reach:,} stores are farther than half a shift from their cluster's depots "
+              f"and are left unassigned")
+
+    if session:
+        ensure_tables(session)
+
+    def solve(problem):
+        return call_with_retries(client.optimization, problem['jobs'], problem['vehicles'])
+
+    start = time.perf_counter()
+    cluster_rows, routes, failed = [], [], 0
+    # Clusters whose stores are all out of reach have nothing to solve
+    solvable = [problem for problem in problems if problem['jobs']]
+    cluster_rows.extend(
+        cluster_row(args.plan_id, problem, None, 0.0) for problem in problems if not problem['jobs']
+    )
+    for problem, solution, error, seconds in run_parallel(solve, solvable, args.workers):
+        if error is not None:
+            failed += 1
+            print(f"⚠️ Cluster {problem['cluster_id']} failed: {error}")
+        rows = route_rows(args.plan_id, problem, solution) if solution else []
+        routes.extend(rows)
+        cluster_rows.append(cluster_row(args.plan_id, problem, solution, seconds, error))
+    wall_seconds = time.perf_counter() - start
+
+    if session:
+        bulk_insert(session, cluster_rows, CLUSTERS_TABLE, CLUSTER_COLUMNS)
+        bulk_insert(session, routes, ROUTES_TABLE, ROUTE_COLUMNS)
+
+    print_clusters(cluster_rows)
+    solve_seconds = [row[9] for row in cluster_rows]
+    unassigned = sum(row[6] or 0 for row in cluster_rows)
+    print(f"⏱️ {wall_seconds:.1f}s wall, {sum(solve_seconds):.1f}s solving, "
+          f"slowest cluster {max(solve_seconds):.2f}s, {unassigned:,} stores unassigned")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'plan_id': args.plan_id,
+                'wall_seconds': round(wall_seconds, 3),
+                'clusters': [dict(zip(CLUSTER_COLUMNS, row)) for row in cluster_rows],
+                'routes': [dict(zip(ROUTE_COLUMNS, row)) for row in routes],
+            }, f, indent=2)
+        print(f"✅ Wrote plan to {args.output}")
+
+    if failed:
+        print(f"❌ {failed:,} clusters failed")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
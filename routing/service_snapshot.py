@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ors_status import poll_readiness
+from profile_switch import (
+    GATEWAY_SERVICE,
+    ORS_APP,
+    ORS_SERVICE,
+    STANDBY_SERVICES,
+    live_ors_service,
+    profile_from_spec,
+)
+
+UNKNOWN_PROFILE = 'Unknown'
+
+
+def list_services(session):
+    """Get status and instance counts of every service in the ORS app schema"""
+    result = session.sql(f"SHOW SERVICES IN SCHEMA {ORS_APP}").collect()
+    return {
+        row['name']: {
+            'status': row['status'],
+            'instances': f"{row['current_instances']}/{row['target_instances']}",
+            'compute_pool': row['compute_pool'],
+        }
+        for row in result
+    }
+
+
+def describe_spec(session, service):
+    """Get a service's specification, or None if it cannot be described"""
+    try:
+        result = session.sql(f"DESC SERVICE {ORS_APP}.{service}").collect()
+    except Exception:
+        return None
+    return str(result[0]['spec']) if result else None
+
+
+def active_region(session):
+    """Get the profile (stage folder) of the ORS service the gateway routes to"""
+    live_service = live_ors_service(describe_spec(session, GATEWAY_SERVICE))
+    return profile_from_spec(describe_spec(session, live_service))
+
+
+def _readiness(session, tracker, service):
+    try:
+        return poll_readiness(session, tracker, service=f"{ORS_APP}.{service}")
+    except Exception as e:
+        return {
+            'is_ready': False,
+            'stage': 'Error',
+            'details': str(e),
+            'profiles_loaded': 0,
+            'total_profiles': len(tracker.profiles),
+            'profile_loads': {},
+        }
+
+
+def collect_snapshot(session, tracker_for, hint=None):
+    """Gather service list, specs, active profile and readiness in one round
+
+    SHOW SERVICES, the DESC of the gateway and of both ORS slots, and the
+    readiness log poll run concurrently. The log poll targets hint, the
+    (active_profile, live_service) of the previous snapshot; only when the
+    specs show the live service or profile changed is it polled again.
+    tracker_for(active_profile, live_service) returns the ReadinessTracker
+    to feed.
+    """
+    spec_services = [GATEWAY_SERVICE] + list(STANDBY_SERVICES)
+    with ThreadPoolExecutor(max_workers=len(spec_services) + 2) as pool:
+        listing = pool.submit(list_services, session)
+        specs = {service: pool.submit(describe_spec, session, service) for service in spec_services}
+        readiness = None
+        if hint:
+            tracker = tracker_for(*hint)
+            readiness = pool.submit(_readiness, session, tracker, hint[1])
+
+        services = listing.result()
+        specs = {service: future.result() for service, future in specs.items()}
+        readiness = readiness.result() if readiness else None
+
+    live_service = live_ors_service(specs[GATEWAY_SERVICE])
+    if specs.get(live_service) is None:
+        live_service = ORS_SERVICE
+    active_profile = profile_from_spec(specs.get(live_service)) or UNKNOWN_PROFILE
+
+    if (active_profile, live_service) != hint:
+        readiness = _readiness(session, tracker_for(active_profile, live_service), live_service)
+
+    return {
+        'services': services,
+        'specs': specs,
+        'live_service': live_service,
+        'active_profile': active_profile,
+        'readiness': readiness,
+        'fetched_at': time.time(),
+    }
@@ -0,0 +1,117 @@
+import math
+
+GB = 1024 ** 3
+
+# Sizing tiers by .osm.pbf size; the first tier whose max_map_gb fits is used.
+# max_heap_gb leaves headroom below the instance family's memory for off-heap use.
+SIZING_TIERS = [
+    {
+        'tier': 'small',
+        'max_map_gb': 0.5,
+        'compute_pool': 'ORS_POOL_SMALL',
+        'instance_family': 'CPU_X64_S',
+        'max_heap_gb': 9,
+        'min_instances': 1,
+        'max_instances': 2,
+    },
+    {
+        'tier': 'medium',
+        'max_map_gb': 5,
+        'compute_pool': 'ORS_POOL_MEDIUM',
+        'instance_family': 'HIGHMEM_X64_S',
+        'max_heap_gb': 44,
+        'min_instances': 1,
+        'max_instances': 3,
+    },
+    {
+        'tier': 'large',
+        'max_map_gb': None,
+        'compute_pool': 'ORS_POOL_LARGE',
+        'instance_family': 'HIGHMEM_X64_M',
+        'max_heap_gb': 180,
+        'min_instances': 1,
+        'max_instances': 4,
+    },
+]
+
+# ORS needs roughly 2x the .osm.pbf size in heap for every routing profile it loads
+HEAP_PER_MAP_GB = 2
+MIN_HEAP_GB = 2
+DEFAULT_ROUTING_PROFILES = 3
+
+# Non-heap memory (metaspace, thread stacks, mmap'd graph files) on top of XMX
+MEMORY_OVERHEAD = 1.25
+
+
+def plan_sizing(map_size, routing_profiles=DEFAULT_ROUTING_PROFILES):
+    """Get JVM heap, instance counts and compute pool for a map of map_size bytes"""
+    map_gb = (map_size or 0) / GB
+    tier = next(
+        t for t in SIZING_TIERS
+        if t['max_map_gb'] is None or map_gb <= t['max_map_gb']
+    )
+
+    heap_gb = math.ceil(map_gb * HEAP_PER_MAP_GB * max(1, routing_profiles))
+    heap_gb = min(max(heap_gb, MIN_HEAP_GB), tier['max_heap_gb'])
+
+    return {
+        'tier': tier['tier'],
+        'compute_pool': tier['compute_pool'],
+        'instance_family': tier['instance_family'],
+        'xms': f"{max(1, heap_gb // 2)}G",
+        'xmx': f"{heap_gb}G",
+        'memory': f"{math.ceil(heap_gb * MEMORY_OVERHEAD)}Gi",
+        'min_instances': tier['min_instances'],
+        'max_instances': tier['max_instances'],
+    }
+
+
+def ors_service_spec(profile_name, sizing, build_graphs=False, rebuild_graphs=False):
+    """Get the ORS service specification serving a profile's map and graphs
+
+    With build_graphs the spec is for a job service that builds the
+    profile's graphs into the graphs stage and exits (ORS preparation mode).
+    With rebuild_graphs the service builds the graphs itself when it
+    starts and then serves them.
+    """
+    if build_graphs:
+        build_env = '\n      ORS_ENGINE_PREPARATION_MODE: "true"'
+        endpoints = ""
+    else:
+        build_env = ""
+        endpoints = (
+            "\n  endpoints:"
+            "\n    - name: ors"
+            "\n      port: 8082"
+            "\n      public: false"
+        )
+
+    return f"""spec:
+  containers:
+  - name: ors
+    image: /openrouteservice_setup/public/image_repository/openrouteservice:v9.0.0
+    volumeMounts:
+      - name: files
+        mountPath: /home/ors/files
+      - name: graphs
+        mountPath: /home/ors/graphs
+      - name: elevation-cache
+        mountPath: /home/ors/elevation_cache
+    env:
+      REBUILD_GRAPHS: "{'true' if build_graphs or rebuild_graphs else 'false'}"
+      ORS_CONFIG_LOCATION: /home/ors/files/ors-config.yml
+      XMS: {sizing['xms']}
+      XMX: {sizing['xmx']}{build_env}
+    resources:
+      requests:
+        memory: {sizing['memory']}
+      limits:
+        memory: {sizing['memory']}{endpoints}
+  volumes:
+    - name: files
+      source: "@CORE.ORS_SPCS_STAGE/{profile_name}"
+    - name: graphs
+      source: "@CORE.ORS_GRAPHS_SPCS_STAGE/{profile_name}"
+    - name: elevation-cache
+      source: "@CORE.ORS_ELEVATION_CACHE_SPCS_STAGE/{profile_name}"
+"""
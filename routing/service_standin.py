@@ -0,0 +1,247 @@
+"""In-memory stand-in for SnowflakeServices
+
+Runs profile switches locally, without Snowflake, for trying out the
+state machine and checking routing availability during a switch:
+
+    clock = SimulatedClock()
+    services = LocalServices(clock)
+    switch = BlueGreenSwitch(services, 'germany', True, ['driving-car'], clock=clock)
+    while not switch.finished:
+        switch.advance()
+        services.record_availability()
+        clock.advance(1)
+    print(switch.state, services.outage_seconds)
+"""
+import time
+
+from profile_switch import (
+    GATEWAY_SERVICE,
+    ORS_HOST_PATTERN,
+    ORS_SERVICE,
+    live_ors_service,
+    profile_from_spec,
+)
+
+GATEWAY_SPEC = """spec:
+  containers:
+  - name: gateway
+    image: /openrouteservice_setup/public/image_repository/routing_reverse_proxy:v0.5.6
+    env:
+      ORS_API: http://ors-service:8082/ors
+      VROOM_API: http://vroom-service:3000
+"""
+
+
+class SimulatedClock:
+    """Manually advanced clock for driving switches step by step"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class LocalServices:
+    """Simulated SPCS services with startup and graph-load delays
+
+    ORS services become RUNNING startup_seconds after a resume, spec update
+    or create, and report graphs ready graph_load_seconds after that.
+    The gateway starts gateway_instances containers and follows later
+    MIN_INSTANCES changes; an added container is ready after
+    gateway_restart_seconds. A gateway spec update rolls its containers one
+    after the other, each down for gateway_restart_seconds, while the service
+    status stays RUNNING as in SPCS; containers that have not restarted yet
+    still route with the previous spec.
+    DIRECTIONS calls advance a SimulatedClock by a latency that starts at
+    cold_latency and decays toward warm_latency as the live service warms.
+    """
+
+    def __init__(self, clock=time.monotonic, startup_seconds=5, graph_load_seconds=30,
+                 profile='SanFrancisco', compute_pools=('ORS_COMPUTE_POOL',),
+                 cold_latency=1.5, warm_latency=0.08, gateway_instances=1,
+                 gateway_restart_seconds=10):
+        self.clock = clock
+        self.compute_pools = set(compute_pools)
+        self.startup_seconds = startup_seconds
+        self.graph_load_seconds = graph_load_seconds
+        self.gateway_restart_seconds = gateway_restart_seconds
+        self.cold_latency = cold_latency
+        self.warm_latency = warm_latency
+        self.calls = []
+        self.outage_seconds = 0.0
+        self._last_check = None
+        self.services = {
+            ORS_SERVICE: self._new_service(profile, 'ors', started_at=clock() - 3600),
+            GATEWAY_SERVICE: self._new_service(None, 'gateway', started_at=clock() - 3600),
+        }
+        self.services[GATEWAY_SERVICE]['spec'] = GATEWAY_SPEC
+        self.services[GATEWAY_SERVICE]['instances'] = (gateway_instances, gateway_instances)
+        self.services[GATEWAY_SERVICE]['instance_added'] = [clock() - 3600] * gateway_instances
+
+    def _new_service(self, profile, kind, started_at=None):
+        return {
+            'kind': kind,
+            'profile': profile,
+            'spec': '',
+            'suspended': False,
+            'started_at': self.clock() if started_at is None else started_at,
+            'compute_pool': 'ORS_COMPUTE_POOL',
+            'instances': (1, 1),
+            'requests': 0,
+            'rolled_at': None,
+            'previous_spec': '',
+        }
+
+    def _restart(self, service):
+        self.services[service]['suspended'] = False
+        self.services[service]['started_at'] = self.clock()
+        self.services[service]['requests'] = 0
+        self.services[service]['rolled_at'] = None
+
+    def _uptime(self, service):
+        entry = self.services[service]
+        if entry['suspended']:
+            return None
+        return self.clock() - entry['started_at']
+
+    def exists(self, service):
+        return service in self.services
+
+    def status(self, service):
+        if service not in self.services:
+            return 'UNKNOWN'
+        uptime = self._uptime(service)
+        if uptime is None:
+            return 'SUSPENDED'
+        return 'RUNNING' if uptime >= self.startup_seconds else 'PENDING'
+
+    def compute_pool(self, service):
+        return self.services[service]['compute_pool']
+
+    def compute_pool_exists(self, compute_pool):
+        return compute_pool in self.compute_pools
+
+    def instances(self, service):
+        return self.services[service]['instances']
+
+    def set_instances(self, service, min_instances, max_instances):
+        self.calls.append(('set_instances', service))
+        entry = self.services[service]
+        entry['instances'] = (min_instances, max_instances)
+        if entry['kind'] == 'gateway':
+            added = entry['instance_added'][:min_instances]
+            entry['instance_added'] = added + [self.clock()] * (min_instances - len(added))
+
+    def drop(self, service):
+        self.calls.append(('drop', service))
+        self.services.pop(service, None)
+
+    def get_spec(self, service):
+        return self.services[service]['spec']
+
+    def containers(self, service):
+        entry = self.services[service]
+        if entry['kind'] != 'gateway':
+            return [('0', {'RUNNING': 'READY'}.get(self.status(service), self.status(service)), entry['started_at'])]
+        return [(str(instance), status, started) for instance, status, started, _ in self._gateway_containers()]
+
+    def _gateway_containers(self):
+        """Get (instance, status, start_time, spec) of the gateway containers during and after a roll"""
+        entry = self.services[GATEWAY_SERVICE]
+        now = self.clock()
+        containers = []
+        for instance, added in enumerate(entry['instance_added']):
+            started, spec = max(entry['started_at'], added), entry['previous_spec']
+            rolled = None if entry['rolled_at'] is None else entry['rolled_at'] + instance * self.gateway_restart_seconds
+            if rolled is None or started >= entry['rolled_at']:
+                spec = entry['spec']
+            elif now >= rolled:
+                started, spec = rolled, entry['spec']
+            if entry['suspended']:
+                status = 'SUSPENDED'
+            else:
+                status = 'READY' if now - started >= self.gateway_restart_seconds else 'PENDING'
+            containers.append((instance, status, started, spec))
+        return containers
+
+    def create(self, service, compute_pool, spec, min_instances=1, max_instances=1):
+        self.calls.append(('create', service))
+        entry = self._new_service(None, 'ors')
+        entry['compute_pool'] = compute_pool
+        entry['instances'] = (min_instances, max_instances)
+        self.services[service] = entry
+        self.update_spec(service, spec)
+
+    def suspend(self, service):
+        self.calls.append(('suspend', service))
+        self.services[service]['suspended'] = True
+
+    def resume(self, service):
+        self.calls.append(('resume', service))
+        if self.services[service]['suspended']:
+            self._restart(service)
+
+    def update_spec(self, service, spec):
+        self.calls.append(('update_spec', service))
+        entry = self.services[service]
+        entry['previous_spec'], entry['spec'] = entry['spec'], spec
+        if entry['kind'] == 'ors' and profile_from_spec(spec):
+            entry['profile'] = profile_from_spec(spec)
+        # ORS containers restart to mount the new stages; the gateway rolls its instances
+        if entry['kind'] == 'ors' and not entry['suspended']:
+            self._restart(service)
+        elif entry['kind'] == 'gateway' and not entry['suspended']:
+            entry['rolled_at'] = self.clock()
+
+    def start_graph_build(self):
+        self.calls.append(('start_graph_build', None))
+
+    def graphs_ready(self, service):
+        uptime = self._uptime(service)
+        return uptime is not None and uptime >= self.startup_seconds + self.graph_load_seconds
+
+    def readiness(self, tracker, service=ORS_SERVICE):
+        ready = self.graphs_ready(service)
+        return {
+            'is_ready': ready,
+            'stage': 'Ready' if ready else 'Loading',
+            'details': 'All profiles loaded, service is ready' if ready else 'Loading graphs...',
+            'profiles_loaded': len(tracker.profiles) if ready else 0,
+            'total_profiles': len(tracker.profiles),
+        }
+
+    def warmup_routes(self, profile_name, limit=20):
+        return [([-122.42, 37.77 + i * 0.001], [-122.40, 37.79 - i * 0.001]) for i in range(limit)]
+
+    def directions(self, routing_profile, start, end):
+        if not self.routable():
+            raise RuntimeError("routing unavailable")
+        entry = self.services[live_ors_service(self.services[GATEWAY_SERVICE]['spec'])]
+        entry['requests'] += 1
+        latency = self.warm_latency + (self.cold_latency - self.warm_latency) / entry['requests']
+        if hasattr(self.clock, 'advance'):
+            self.clock.advance(latency)
+        return {'type': 'FeatureCollection', 'features': []}
+
+    def routable(self):
+        """Check whether a DIRECTIONS call would succeed right now"""
+        if self.status(GATEWAY_SERVICE) != 'RUNNING':
+            return False
+        for _, status, _, spec in self._gateway_containers():
+            if status != 'READY' or not ORS_HOST_PATTERN.search(spec):
+                continue
+            target = live_ors_service(spec)
+            if target in self.services and self.graphs_ready(target):
+                return True
+        return False
+
+    def record_availability(self):
+        """Accumulate the time routing was unavailable since the previous call"""
+        now = self.clock()
+        if self._last_check is not None and not self.routable():
+            self.outage_seconds += now - self._last_check
+        self._last_check = now
@@ -0,0 +1,276 @@
+"""Export GEOLIFE_CLEAN as zoom-levelled binary trajectory tiles to a stage
+
+For every zoom level one query projects the points to Web Mercator,
+simplifies the trips for that zoom and cuts them into tiles:
+
+- Consecutive points of a trip within the same --tolerance-px screen
+  pixel collapse into one (the first), with the average segment speed of
+  the points they replace; trips shorter than a pixel vanish at that zoom
+- A feature is a run of simplified points in one tile and one speed
+  bucket (< 10, 10-30, 30-60, > 60 km/h), ending on the first point of
+  the next run so paths join across tile borders
+- Tiles keep the features with most points, at most --max-features of
+  them and --max-points points in all (the largest feature is always
+  kept), so no tile is too large for the dashboard to decode
+
+Tiles are encoded with tile_format.py and uploaded to the stage as
+<zoom>/<x>/<y>.glt with bounded parallelism; GEOLIFE_TILE_INDEX lists the
+tiles with their sizes, so readers only fetch tiles that exist. A zoom
+level is replaced as a whole: its files and index rows are removed before
+it is written again.
+
+Usage:
+    python routing/tile_export.py
+    python routing/tile_export.py --min-zoom 10 --max-zoom 12 --workers 16
+"""
+import argparse
+import io
+import json
+import sys
+import time
+
+from job_utils import bulk_insert, create_session, run_parallel
+from tile_format import EXTENT, MAX_LATITUDE, TILE_SIZE_PX, encode, tile_path
+
+POINTS_TABLE = "FLEET_DEMOS.ROUTING.GEOLIFE_CLEAN"
+STAGE = "FLEET_DEMOS.ROUTING.GEOLIFE_TILES"
+INDEX_TABLE = "FLEET_DEMOS.ROUTING.GEOLIFE_TILE_INDEX"
+
+INDEX_COLUMNS = ['ZOOM', 'TILE_X', 'TILE_Y', 'FEATURE_COUNT', 'POINT_COUNT', 'TILE_BYTES']
+
+
+def tiles_query(zoom, tolerance_px, max_features, max_points):
+    """SQL returning one row per tile of a zoom level with its features"""
+    scale = 2 ** zoom
+    cells = TILE_SIZE_PX / tolerance_px
+    return f"""
+        WITH projected AS (
+            SELECT
+                UID,
+                TID,
+                EVENT_TIMESTAMP,
+                (LNG + 180) / 360 * {scale} AS world_x,
+                (1 - LN(TAN(RADIANS(LAT)) + 1 / COS(RADIANS(LAT))) / PI()) / 2 * {scale} AS world_y,
+                (SPEED + LEAD(SPEED) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)) / 2 AS segment_speed
+            FROM {POINTS_TABLE}
+            WHERE LAT BETWEEN -{MAX_LATITUDE} AND {MAX_LATITUDE}
+        ),
+        cells AS (
+            SELECT
+                *,
+                FLOOR(world_x * {cells}) IS DISTINCT FROM
+                    LAG(FLOOR(world_x * {cells})) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+                    OR FLOOR(world_y * {cells}) IS DISTINCT FROM
+                    LAG(FLOOR(world_y * {cells})) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+                    AS is_cell_start
+            FROM projected
+        ),
+        simplified AS (
+            SELECT
+                UID,
+                TID,
+                cell_no,
+                MIN(EVENT_TIMESTAMP) AS EVENT_TIMESTAMP,
+                MIN_BY(world_x, EVENT_TIMESTAMP) AS world_x,
+                MIN_BY(world_y, EVENT_TIMESTAMP) AS world_y,
+                AVG(IFF(segment_speed >= 0, segment_speed, NULL)) AS speed
+            FROM (
+                SELECT
+                    *,
+                    SUM(IFF(is_cell_start, 1, 0)) OVER (
+                        PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                    ) AS cell_no
+                FROM cells
+            )
+            GROUP BY UID, TID, cell_no
+        ),
+        bucketed AS (
+            SELECT
+                *,
+                FLOOR(world_x) AS tile_x,
+                FLOOR(world_y) AS tile_y,
+                CASE
+                    WHEN speed > 60 THEN 3
+                    WHEN speed > 30 THEN 2
+                    WHEN speed > 10 THEN 1
+                    ELSE 0
+                END AS speed_bucket,
+                LEAD(world_x) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP) AS next_x,
+                LEAD(world_y) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP) AS next_y
+            FROM simplified
+        ),
+        marked AS (
+            SELECT
+                *,
+                tile_x IS DISTINCT FROM LAG(tile_x) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+                    OR tile_y IS DISTINCT FROM LAG(tile_y) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+                    OR speed_bucket IS DISTINCT FROM
+                    LAG(speed_bucket) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP)
+                    AS is_feature_start
+            FROM bucketed
+        ),
+        numbered AS (
+            SELECT
+                *,
+                SUM(IFF(is_feature_start, 1, 0)) OVER (
+                    PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) AS feature_no,
+                LEAD(is_feature_start) OVER (PARTITION BY UID, TID ORDER BY EVENT_TIMESTAMP) AS ends_feature
+            FROM marked
+        ),
+        features AS (
+            SELECT
+                UID,
+                TID,
+                feature_no,
+                ANY_VALUE(tile_x) AS tile_x,
+                ANY_VALUE(tile_y) AS tile_y,
+                ANY_VALUE(speed_bucket) AS speed_bucket,
+                ROUND(COALESCE(AVG(speed), 0)) AS avg_speed,
+                ARRAY_CAT(
+                    ARRAY_AGG(ARRAY_CONSTRUCT(
+                        ROUND((world_x - tile_x) * {EXTENT}),
+                        ROUND((world_y - tile_y) * {EXTENT})
+                    )) WITHIN GROUP (ORDER BY EVENT_TIMESTAMP),
+                    ARRAY_AGG(IFF(ends_feature, ARRAY_CONSTRUCT(
+                        ROUND((next_x - tile_x) * {EXTENT}),
+                        ROUND((next_y - tile_y) * {EXTENT})
+                    ), NULL))
+                ) AS points
+            FROM numbered
+            GROUP BY UID, TID, feature_no
+            HAVING ARRAY_SIZE(points) > 1
+        ),
+        ranked AS (
+            SELECT
+                *,
+                ROW_NUMBER() OVER (
+                    PARTITION BY tile_x, tile_y ORDER BY ARRAY_SIZE(points) DESC, UID, TID, feature_no
+                ) AS feature_rank,
+                SUM(ARRAY_SIZE(points)) OVER (
+                    PARTITION BY tile_x, tile_y ORDER BY ARRAY_SIZE(points) DESC, UID, TID, feature_no
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) AS tile_points
+            FROM features
+        ),
+        kept AS (
+            SELECT *
+            FROM ranked
+            WHERE feature_rank = 1
+                OR (feature_rank <= {max_features} AND tile_points <= {max_points})
+        )
+        SELECT
+            tile_x,
+            tile_y,
+            COUNT(*) AS feature_count,
+            SUM(ARRAY_SIZE(points)) AS point_count,
+            ARRAY_AGG(OBJECT_CONSTRUCT(
+                'bucket', speed_bucket,
+                'avg_speed', avg_speed,
+                'points', points
+            )) AS features
+        FROM kept
+        GROUP BY tile_x, tile_y
+    """
+
+
+def tile_features(features):
+    """Features of a tile row as (bucket, avg_speed, points) tuples"""
+    if isinstance(features, str):
+        features = json.loads(features)
+    return [(int(feature['bucket']), feature['avg_speed'], feature['points']) for feature in features]
+
+
+def export_zoom(session, zoom, args):
+    """Replace the tiles of one zoom level; returns (tiles, bytes, failed tiles)"""
+    session.sql(f"REMOVE @{args.stage}/{zoom}/").collect()
+    session.sql(f"DELETE FROM {args.index_table} WHERE ZOOM = {zoom}").collect()
+
+    def upload(row):
+        x, y = int(row['TILE_X']), int(row['TILE_Y'])
+        data = encode(zoom, x, y, tile_features(row['FEATURES']))
+        session.file.put_stream(
+            io.BytesIO(data),
+            f"@{args.stage}/{tile_path(zoom, x, y)}",
+            auto_compress=False,
+            overwrite=True
+        )
+        return (zoom, x, y, int(row['FEATURE_COUNT']), int(row['POINT_COUNT']), len(data))
+
+    rows = session.sql(
+        tiles_query(zoom, args.tolerance_px, args.max_features, args.max_points)
+    ).to_local_iterator()
+    tiles, total_bytes, failed = 0, 0, 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) < args.batch_size:
+            continue
+        done, size, errors = _upload_batch(session, upload, batch, args)
+        tiles, total_bytes, failed = tiles + done, total_bytes + size, failed + errors
+        batch = []
+    done, size, errors = _upload_batch(session, upload, batch, args)
+    return tiles + done, total_bytes + size, failed + errors
+
+
+def _upload_batch(session, upload, batch, args):
+    index_rows, errors = [], 0
+    for row, index_row, error, _ in run_parallel(upload, batch, args.workers):
+        if error is not None:
+            print(f"⚠️ Tile {row['TILE_X']}/{row['TILE_Y']} failed: {error}")
+            errors += 1
+            continue
+        index_rows.append(index_row)
+    bulk_insert(session, index_rows, args.index_table, INDEX_COLUMNS)
+    return len(index_rows), sum(index_row[-1] for index_row in index_rows), errors
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export GeoLife trajectories as binary map tiles")
+    parser.add_argument('--connection', help="connections.toml connection name")
+    parser.add_argument('--stage', default=STAGE, help="Stage the tiles are written to")
+    parser.add_argument('--index-table', default=INDEX_TABLE, help="Table listing the exported tiles")
+    parser.add_argument('--min-zoom', type=int, default=6, help="Lowest zoom level exported")
+    parser.add_argument('--max-zoom', type=int, default=14, help="Highest zoom level exported")
+    parser.add_argument('--tolerance-px', type=float, default=1.0,
+                        help="Screen pixels within which consecutive points are merged")
+    parser.add_argument('--max-features', type=int, default=5000, help="Features kept per tile")
+    parser.add_argument('--max-points', type=int, default=20000, help="Points kept per tile")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent tile uploads")
+    parser.add_argument('--batch-size', type=int, default=500, help="Tiles per index insert")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.min_zoom <= args.max_zoom <= 20:
+        parser.error("zoom levels must satisfy 0 <= --min-zoom <= --max-zoom <= 20")
+    if args.tolerance_px <= 0:
+        parser.error("--tolerance-px must be positive")
+    if args.max_features < 1 or args.max_points < 1:
+        parser.error("--max-features and --max-points must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    session = create_session(args.connection)
+
+    start = time.perf_counter()
+    failed = 0
+    for zoom in range(args.min_zoom, args.max_zoom + 1):
+        zoom_start = time.perf_counter()
+        tiles, total_bytes, errors = export_zoom(session, zoom, args)
+        failed += errors
+        print(f"🗺️ Zoom {zoom}: {tiles:,} tiles, {total_bytes / 1024 / 1024:,.1f} MB "
+              f"({time.perf_counter() - zoom_start:.0f}s)")
+
+    print(f"⏱️ Zoom levels {args.min_zoom}-{args.max_zoom} exported in {time.perf_counter() - start:.1f}s")
+    if failed:
+        print(f"❌ {failed:,} tiles failed; re-run the affected zoom levels with --min-zoom/--max-zoom")
+        return 1
+    print(f"✅ Tiles written to @{args.stage}, listed in {args.index_table}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
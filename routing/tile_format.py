@@ -0,0 +1,115 @@
+"""Binary trajectory tiles of GEOLIFE_CLEAN
+
+Tiles use the slippy map scheme (Web Mercator, z/x/y with y counted from
+the north, 256 px per tile). A tile holds the trip paths crossing it as
+features: runs of points with one speed bucket (the buckets of
+GEOLIFE_TRIPS.SPEED_BREAKS) and their average speed. Coordinates are
+integers on the tile's own grid of EXTENT units per side; the last point
+of a feature may lie outside the grid so it joins the next feature. A
+point beyond the i16 range (a join 8 tiles away or more) is moved back
+along its segment to the edge of that range, keeping the segment's
+direction.
+
+Layout (little-endian), zlib-compressed:
+    header:  b'GLT1', zoom (u8), x (u32), y (u32), feature count (u32)
+    feature: speed bucket (u8), average speed km/h (u8), point count (u16),
+             then point count pairs of (i16 x, i16 y)
+
+    data = encode(zoom, x, y, [(bucket, avg_speed, [[x, y], ...]), ...])
+    zoom, x, y, features = decode(data)
+
+Written by tile_export.py and read by the dashboard's Fleet Map page;
+snowflake.yml maps this file into the dashboard's bundle.
+"""
+import math
+import struct
+import zlib
+
+MAGIC = b'GLT1'
+EXTENT = 4096
+TILE_SIZE_PX = 256
+MAX_LATITUDE = 85.05112878
+
+_HEADER = struct.Struct('<4sBIII')
+_FEATURE = struct.Struct('<BBH')
+_MIN_COORDINATE = -0x8000
+_MAX_COORDINATE = 0x7fff
+
+
+def tile_path(zoom, x, y):
+    """Path of a tile file relative to the stage root"""
+    return f"{zoom}/{x}/{y}.glt"
+
+
+def _clip(previous, point):
+    """Move point along the segment from previous to the edge of the i16 range"""
+    fraction = 1.0
+    for start, end in zip(previous, point):
+        if end > _MAX_COORDINATE:
+            fraction = min(fraction, (_MAX_COORDINATE - start) / (end - start))
+        elif end < _MIN_COORDINATE:
+            fraction = min(fraction, (_MIN_COORDINATE - start) / (end - start))
+    return [start + (end - start) * fraction for start, end in zip(previous, point)]
+
+
+def encode(zoom, x, y, features):
+    """Encode (bucket, avg_speed, points) features of tile zoom/x/y"""
+    chunks = [_HEADER.pack(MAGIC, zoom, x, y, len(features))]
+    for bucket, avg_speed, points in features:
+        points = points[:0xffff]
+        values = []
+        for i, point in enumerate(points):
+            if i and not all(_MIN_COORDINATE <= value <= _MAX_COORDINATE for value in point):
+                point = _clip(points[i - 1], point)
+            values.extend(min(max(int(round(value)), _MIN_COORDINATE), _MAX_COORDINATE) for value in point)
+        chunks.append(_FEATURE.pack(bucket, min(max(int(avg_speed), 0), 0xff), len(points)))
+        chunks.append(struct.pack(f'<{len(values)}h', *values))
+    return zlib.compress(b''.join(chunks))
+
+
+def decode(data):
+    """Decode a tile into (zoom, x, y, [(bucket, avg_speed, points), ...])"""
+    data = zlib.decompress(data)
+    magic, zoom, x, y, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a trajectory tile: {magic!r}")
+    offset = _HEADER.size
+    features = []
+    for _ in range(count):
+        bucket, avg_speed, length = _FEATURE.unpack_from(data, offset)
+        offset += _FEATURE.size
+        values = struct.unpack_from(f'<{2 * length}h', data, offset)
+        offset += 4 * length
+        features.append((bucket, avg_speed, [list(values[i:i + 2]) for i in range(0, len(values), 2)]))
+    return zoom, x, y, features
+
+
+def to_world(lon, lat, zoom):
+    """Fractional tile coordinates (x, y) of a point at a zoom level"""
+    lat = min(max(lat, -MAX_LATITUDE), MAX_LATITUDE)
+    scale = 2 ** zoom
+    x = (lon + 180) / 360 * scale
+    y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * scale
+    return x, y
+
+
+def to_lon_lat(zoom, x, y, point):
+    """[lon, lat] of a point on the grid of tile zoom/x/y"""
+    scale = 2 ** zoom
+    world_x = x + point[0] / EXTENT
+    world_y = y + point[1] / EXTENT
+    lon = world_x / scale * 360 - 180
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * world_y / scale))))
+    return [lon, lat]
+
+
+def visible_tiles(lon, lat, zoom, width_px, height_px):
+    """Tiles (x, y) of a width_px x height_px map centered on lon/lat"""
+    center_x, center_y = to_world(lon, lat, zoom)
+    half_width = width_px / TILE_SIZE_PX / 2
+    half_height = height_px / TILE_SIZE_PX / 2
+    scale = 2 ** zoom
+    min_y = max(int(math.floor(center_y - half_height)), 0)
+    max_y = min(int(math.floor(center_y + half_height)), scale - 1)
+    xs = range(int(math.floor(center_x - half_width)), int(math.floor(center_x + half_width)) + 1)
+    return sorted({(x % scale, y) for x in xs for y in range(min_y, max_y + 1)})
@@ -0,0 +1,199 @@
+"""Local HTTP stand-in for the VROOM optimization API
+
+Answers POST / with {"jobs": [...], "vehicles": [...]} like vroom-express.
+Vehicles are filled in order with a nearest-neighbor tour from their start
+until their capacity or time window is used up; travel times come from
+straight-line distance with a detour factor, like ors_http_standin.py.
+The simulated solve time grows with the square of the job count, so a
+single huge problem is slow the way a real solver is, and `--workers` caps
+concurrent solves like the cores of one VROOM instance.
+
+Usage:
+    python routing/vroom_standin.py --port 3000 --workers 4
+    python routing/route_planner.py --local http://localhost:3000 --synthetic-stores 2000 --region germany
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ors_http_standin import DETOUR_FACTOR, PROFILE_SPEEDS, haversine_km
+
+DEFAULT_PROFILE = 'driving-hgv'
+
+# Simulated solve cost: fixed overhead plus time per squared job count (seconds)
+BASE_SOLVE_SECONDS = 0.05
+SOLVE_SECONDS_PER_JOB_SQUARED = 0.00002
+
+
+def travel(profile, start, end):
+    """Get (seconds, meters) between two [lon, lat] locations"""
+    km = haversine_km(start, end) * DETOUR_FACTOR
+    speed = PROFILE_SPEEDS.get(profile, PROFILE_SPEEDS[DEFAULT_PROFILE])
+    return int(round(km / speed * 3600)), int(round(km * 1000))
+
+
+def solve(jobs, vehicles):
+    """Build a VROOM-shaped solution with greedy nearest-neighbor tours"""
+    unassigned = {job['id']: job for job in jobs}
+    routes = []
+
+    for vehicle in vehicles:
+        profile = vehicle.get('profile', DEFAULT_PROFILE)
+        capacity = (vehicle.get('capacity') or [None])[0]
+        shift_start, shift_end = vehicle.get('time_window', [0, None])
+        start = vehicle.get('start')
+        end = vehicle.get('end', start)
+        location = start
+        now, load, distance, service, driving = shift_start, 0, 0, 0, 0
+        steps = [{'type': 'start', 'location': start, 'arrival': now, 'duration': 0, 'distance': 0}]
+
+        while unassigned:
+            job = min(unassigned.values(), key=lambda j: haversine_km(location, j['location']))
+            amount = (job.get('delivery') or job.get('amount') or [1])[0]
+            seconds, meters = travel(profile, location, job['location'])
+            back_seconds, _ = travel(profile, job['location'], end) if end else (0, 0)
+            arrival = now + seconds
+            if capacity is not None and load + amount > capacity:
+                break
+            if shift_end is not None and arrival + job.get('service', 0) + back_seconds > shift_end:
+                break
+            now = arrival + job.get('service', 0)
+            load += amount
+            driving += seconds
+            distance += meters
+            service += job.get('service', 0)
+            location = job['location']
+            steps.append({
+                'type': 'job',
+                'id': job['id'],
+                'job': job['id'],
+                'location': job['location'],
+                'arrival': arrival,
+                'duration': driving,
+                'distance': distance,
+            })
+            del unassigned[job['id']]
+
+        if len(steps) == 1:
+            continue
+        if end:
+            seconds, meters = travel(profile, location, end)
+            now += seconds
+            driving += seconds
+            distance += meters
+            steps.append({
+                'type': 'end', 'location': end, 'arrival': now,
+                'duration': driving, 'distance': distance,
+            })
+        routes.append({
+            'vehicle': vehicle['id'],
+            'cost': driving,
+            'service': service,
+            'duration': driving,
+            'distance': distance,
+            'steps': steps,
+        })
+
+    return {
+        'code': 0,
+        'summary': {
+            'cost': sum(route['cost'] for route in routes),
+            'routes': len(routes),
+            'unassigned': len(unassigned),
+            'service': sum(route['service'] for route in routes),
+            'duration': sum(route['duration'] for route in routes),
+            'distance': sum(route['distance'] for route in routes),
+        },
+        'unassigned': [
+            {'id': job['id'], 'type': 'job', 'location': job['location']}
+            for job in unassigned.values()
+        ],
+        'routes': routes,
+    }
+
+
+class VroomStandinHandler(BaseHTTPRequestHandler):
+    server_version = "VROOMStandin/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._send_json(200, {'status': 'ready'})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ('', '/optimization'):
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        problem = json.loads(self.rfile.read(length) or b'{}')
+        jobs = problem.get('jobs') or []
+        vehicles = problem.get('vehicles') or []
+        if not vehicles:
+            self._send_json(400, {'code': 2, 'error': "Invalid input: no vehicles"})
+            return
+
+        with self.server.solver_slots:
+            started = time.perf_counter()
+            time.sleep(BASE_SOLVE_SECONDS + SOLVE_SECONDS_PER_JOB_SQUARED * len(jobs) ** 2)
+            solution = solve(jobs, vehicles)
+            failed = random.random() < self.server.error_rate
+        solution['summary']['computing_times'] = {
+            'loading': 0, 'solving': int((time.perf_counter() - started) * 1000), 'routing': 0,
+        }
+
+        if failed:
+            self._send_json(500, {'code': 3, 'error': "Simulated solver failure"})
+        else:
+            self._send_json(200, solution)
+
+
+def make_server(host='localhost', port=3000, workers=4, error_rate=0.0):
+    """Create the stand-in server; call serve_forever() (optionally in a thread) to run it"""
+    server = ThreadingHTTPServer((host, port), VroomStandinHandler)
+    server.daemon_threads = True
+    server.solver_slots = threading.Semaphore(workers)
+    server.error_rate = error_rate
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP stand-in for the VROOM optimization API")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Problems solved at once, like the cores of one VROOM instance")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 500")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = make_server(args.host, args.port, args.workers, args.error_rate)
+    print(f"🚚 VROOM stand-in on http://{args.host}:{args.port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import math
+
+# One row per trip with its first and last point
+TRIPS_TABLE = "FLEET_DEMOS.ROUTING.GEOLIFE_TRIPS"
+
+# Region bounding boxes (min_lon, min_lat, max_lon, max_lat) used to pick trips in a profile's map
+REGION_BOUNDS = {
+    'SanFrancisco': (-122.52, 37.70, -122.35, 37.84),
+    'germany': (5.87, 47.27, 15.04, 55.06),
+    'USA': (-124.85, 24.40, -66.88, 49.38),
+}
+
+WARMUP_ROUTES = 20
+
+# Trips shorter than this are mostly GPS noise, longer ones make warm-up slow (km)
+MIN_TRIP_KM = 0.5
+MAX_TRIP_KM = 50
+
+
+def sample_trip_routes(session, bounds, limit=WARMUP_ROUTES):
+    """Sample start/end points of recorded trips that start and end inside bounds
+
+    Returns a list of ([lon, lat], [lon, lat]) pairs.
+    """
+    min_lon, min_lat, max_lon, max_lat = bounds
+    result = session.sql(f"""
+        SELECT
+            start_lng AS start_lon,
+            start_lat,
+            end_lng AS end_lon,
+            end_lat
+        FROM {TRIPS_TABLE}
+        WHERE point_count > 1
+          AND start_lng BETWEEN {min_lon} AND {max_lon}
+          AND start_lat BETWEEN {min_lat} AND {max_lat}
+          AND end_lng BETWEEN {min_lon} AND {max_lon}
+          AND end_lat BETWEEN {min_lat} AND {max_lat}
+          AND HAVERSINE(start_lat, start_lng, end_lat, end_lng) BETWEEN {MIN_TRIP_KM} AND {MAX_TRIP_KM}
+        ORDER BY RANDOM()
+        LIMIT {limit}
+    """).collect()
+    return [
+        ([row['START_LON'], row['START_LAT']], [row['END_LON'], row['END_LAT']])
+        for row in result
+    ]
+
+
+def percentile(values, q):
+    """Get the q-th percentile (0-100) of values with linear interpolation"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def latency_summary(latencies, errors=0):
+    """Summarize request latencies (seconds) as milliseconds percentiles"""
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'p50_ms': None if not latencies else percentile(latencies, 50) * 1000,
+        'p95_ms': None if not latencies else percentile(latencies, 95) * 1000,
+    }